@@ -4,7 +4,7 @@ This module provides a client interface to interact with the Open Notebook API.
 """
 
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 import httpx
 from loguru import logger
@@ -90,6 +90,7 @@ class APIClient:
         search_sources: bool = True,
         search_notes: bool = True,
         minimum_score: float = 0.2,
+        notebook_id: Optional[Union[str, List[str]]] = None,
     ) -> Dict:
         """Search the knowledge base."""
         data = {
@@ -99,6 +100,7 @@ class APIClient:
             "search_sources": search_sources,
             "search_notes": search_notes,
             "minimum_score": minimum_score,
+            "notebook_id": notebook_id,
         }
         return self._make_request("POST", "/api/search", json=data)
 
@@ -289,13 +291,15 @@ class APIClient:
         transformations: Optional[List[str]] = None,
         embed: bool = False,
         delete_source: bool = False,
+        async_processing: bool = False,
     ) -> Dict:
-        """Create a new source."""
+        """Create a new source; with async_processing it is filled in by a job."""
         data = {
             "notebook_id": notebook_id,
             "type": source_type,
             "embed": embed,
             "delete_source": delete_source,
+            "async_processing": async_processing,
         }
         if url:
             data["url"] = url
@@ -18,6 +18,9 @@ from api.routers import (
     speaker_profiles,
     transformations,
 )
+from open_notebook.database.connection_pool import close_pool, pool_metrics
+from open_notebook.domain.embedding_cache import get_embedding_cache
+from open_notebook.processing import shutdown_process_pool
 
 # Import commands to register them in the API process
 try:
@@ -71,6 +74,16 @@ async def root():
     return {"message": "Open Notebook API is running"}
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    await close_pool()
+    shutdown_process_pool()
+
+
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "database_pool": pool_metrics(),
+        "embedding_cache": get_embedding_cache().metrics(),
+    }
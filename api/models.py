@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Union
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -26,17 +26,23 @@ class NotebookResponse(BaseModel):
 # Search models
 class SearchRequest(BaseModel):
     query: str = Field(..., description="Search query")
-    type: Literal["text", "vector"] = Field("text", description="Search type")
+    type: Literal["text", "vector", "hybrid"] = Field("text", description="Search type")
     limit: int = Field(100, description="Maximum number of results", le=1000)
     search_sources: bool = Field(True, description="Include sources in search")
     search_notes: bool = Field(True, description="Include notes in search")
     minimum_score: float = Field(0.2, description="Minimum score for vector search", ge=0, le=1)
+    notebook_id: Optional[Union[str, List[str]]] = Field(
+        None, description="Restrict the search to one or more notebooks"
+    )
 
 
 class SearchResponse(BaseModel):
     results: List[Dict[str, Any]] = Field(..., description="Search results")
     total_count: int = Field(..., description="Total number of results")
     search_type: str = Field(..., description="Type of search performed")
+    timings: Dict[str, float] = Field(
+        default_factory=dict, description="Wall time per search leg in milliseconds"
+    )
 
 
 class AskRequest(BaseModel):
@@ -44,6 +50,9 @@ class AskRequest(BaseModel):
     strategy_model: str = Field(..., description="Model ID for query strategy")
     answer_model: str = Field(..., description="Model ID for individual answers")
     final_answer_model: str = Field(..., description="Model ID for final answer")
+    notebook_id: Optional[Union[str, List[str]]] = Field(
+        None, description="Restrict the searches to one or more notebooks"
+    )
 
 
 class AskResponse(BaseModel):
@@ -155,6 +164,72 @@ class EmbedResponse(BaseModel):
     message: str = Field(..., description="Result message")
     item_id: str = Field(..., description="ID of the item that was embedded")
     item_type: str = Field(..., description="Type of item that was embedded")
+    job_id: Optional[str] = Field(
+        default=None, description="Background job id when embedding runs on the worker"
+    )
+
+
+class RebuildVectorIndexResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    dimension: int = Field(..., description="Embedding dimension of the new indexes")
+    model_id: Optional[str] = Field(None, description="Embedding model the indexes were built for")
+    message: str = Field(..., description="Result message")
+
+
+class EmbeddingModelCount(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    embedding_model: Optional[str] = Field(
+        None, description="Model that produced the vectors (None if untagged)"
+    )
+    embedding_dimension: Optional[int] = Field(None, description="Vector dimension")
+    count: int = Field(..., description="Number of rows")
+
+
+class EmbeddingDistributionResponse(BaseModel):
+    active_model: Optional[str] = Field(
+        None, description="Model used for queries and new vectors"
+    )
+    default_model: Optional[str] = Field(
+        None, description="Configured default embedding model"
+    )
+    index_dimension: Optional[int] = Field(
+        None, description="Dimension of the vector indexes"
+    )
+    tables: Dict[str, List[EmbeddingModelCount]] = Field(
+        default_factory=dict, description="Vector counts per table"
+    )
+    searchable: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Rows per table that match the active model and dimension",
+    )
+
+
+class ReembedRequest(BaseModel):
+    shards: int = Field(
+        1, ge=1, le=16, description="Number of worker jobs to split the corpus into"
+    )
+    page_size: int = Field(200, ge=1, description="Rows embedded per checkpoint")
+
+
+class ReembedStatusResponse(BaseModel):
+    migration: Optional[Dict[str, Any]] = Field(
+        None, description="Migration record (from_model, to_model, status, ...)"
+    )
+    remaining: Dict[str, int] = Field(
+        default_factory=dict, description="Rows per table still to re-embed"
+    )
+    checkpoints: List[Dict[str, Any]] = Field(
+        default_factory=list, description="Progress of each shard and table"
+    )
+    failures: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Rows given up on after repeated failures (first 100)",
+    )
+    job_ids: List[str] = Field(
+        default_factory=list, description="Worker jobs submitted by this request"
+    )
 
 
 # Settings API models
@@ -190,6 +265,14 @@ class SourceCreate(BaseModel):
     transformations: Optional[List[str]] = Field(default_factory=list, description="Transformation IDs to apply")
     embed: bool = Field(False, description="Whether to embed content for vector search")
     delete_source: bool = Field(False, description="Whether to delete uploaded file after processing")
+    async_processing: bool = Field(
+        False,
+        description=(
+            "Process on the worker and return the source and job IDs immediately. "
+            "Off by default so existing clients keep getting the processed source, "
+            "with its text, in the response"
+        ),
+    )
 
 
 class SourceUpdate(BaseModel):
@@ -204,6 +287,11 @@ class SourceResponse(BaseModel):
     asset: Optional[AssetModel]
     full_text: Optional[str]
     embedded_chunks: int
+    embedding_progress: Optional[Dict[str, Any]] = None
+    embedding_job_id: Optional[str] = None
+    command_id: Optional[str] = Field(default=None, description="process_source job, for async processing")
+    processing: Optional[Dict[str, Any]] = Field(default=None, description="Status and stage of async processing; status \"reused\" carries the source_id of the existing source used instead")
+    failed_transformations: List[Dict[str, Any]] = Field(default_factory=list, description="Transformations whose last run failed")
     created: str
     updated: str
 
@@ -219,6 +307,53 @@ class SourceListResponse(BaseModel):
     updated: str
 
 
+class RetryTransformationsRequest(BaseModel):
+    transformation_ids: Optional[List[str]] = Field(None, description="Failed transformations to retry; all when omitted")
+
+
+class RetryTransformationsResponse(BaseModel):
+    source_id: str
+    command_id: str = Field(..., description="retry_transformations job")
+    transformations: List[str] = Field(..., description="Names of the transformations being retried")
+
+
+class SourceBatchItem(BaseModel):
+    type: str = Field(..., description="Source type: link, upload, or text")
+    url: Optional[str] = Field(None, description="URL for link type")
+    file_path: Optional[str] = Field(None, description="File path for upload type")
+    content: Optional[str] = Field(None, description="Text content for text type")
+    title: Optional[str] = Field(None, description="Source title, replaces the extracted one")
+    delete_source: bool = Field(False, description="Whether to delete uploaded file after processing")
+
+
+class SourceBatchCreate(BaseModel):
+    notebook_id: str = Field(..., description="Notebook ID to add the sources to")
+    items: List[SourceBatchItem] = Field(..., min_length=1, max_length=1000, description="Sources to ingest")
+    transformations: List[str] = Field(default_factory=list, description="Transformation IDs to apply to every source")
+    embed: bool = Field(False, description="Whether to embed content for vector search")
+
+
+class SourceBatchItemStatus(BaseModel):
+    id: str
+    position: int
+    label: Optional[str] = None
+    status: str = Field(..., description="queued, running, completed or failed")
+    stage: Optional[str] = Field(None, description="extract, save, embed or transform")
+    error: Optional[str] = None
+    source: Optional[str] = Field(None, description="ID of the created source")
+    embedding_job_id: Optional[str] = None
+
+
+class SourceBatchResponse(BaseModel):
+    batch_id: str
+    status: str = Field(
+        ..., description="running, completed, failed, cancelled or interrupted"
+    )
+    total: int
+    counts: Dict[str, int] = Field(default_factory=dict, description="Items per status")
+    items: List[SourceBatchItemStatus] = Field(default_factory=list)
+
+
 # Context API models
 class ContextConfig(BaseModel):
     sources: Dict[str, str] = Field(default_factory=dict, description="Source inclusion config {source_id: level}")
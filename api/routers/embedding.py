@@ -1,9 +1,37 @@
+from typing import Union
+
+from esperanto import EmbeddingModel
 from fastapi import APIRouter, HTTPException
 from loguru import logger
 
-from api.models import EmbedRequest, EmbedResponse
+from api.command_service import CommandService
+from api.models import (
+    EmbeddingDistributionResponse,
+    EmbeddingModelCount,
+    EmbedRequest,
+    EmbedResponse,
+    RebuildVectorIndexResponse,
+    ReembedRequest,
+    ReembedStatusResponse,
+)
+from open_notebook.database.numpy_index import (
+    numpy_backend_enabled,
+    rebuild_numpy_index,
+)
+from open_notebook.database.vector_index import (
+    get_embedding_distribution,
+    get_vector_index_state,
+    rebuild_vector_indexes,
+)
+from open_notebook.domain.embedding import embedding_in_background
+from open_notebook.domain.embedding_migration import (
+    claim_catch_up,
+    get_migration_status,
+    start_migration,
+)
 from open_notebook.domain.models import model_manager
 from open_notebook.domain.notebook import Note, Source
+from open_notebook.exceptions import InvalidInputError
 
 router = APIRouter()
 
@@ -29,33 +57,36 @@ async def embed_content(embed_request: EmbedRequest):
             )
 
         # Get the item and embed it
+        item: Union[Source, Note, None]
         if item_type == "source":
-            source_item = await Source.get(item_id)
-            if not source_item:
-                raise HTTPException(status_code=404, detail="Source not found")
-
-            # Check if already embedded
-            if await source_item.get_embedded_chunks() > 0:
-                return EmbedResponse(
-                    success=True,
-                    message="Source is already embedded",
-                    item_id=item_id,
-                    item_type=item_type,
-                )
-
-            # Perform embedding
-            await source_item.vectorize()
-            message = "Source embedded successfully"
-
-        elif item_type == "note":
-            note_item = await Note.get(item_id)
-            if not note_item:
-                raise HTTPException(status_code=404, detail="Note not found")
+            item = await Source.get(item_id)
+        else:
+            item = await Note.get(item_id)
+        if not item:
+            raise HTTPException(
+                status_code=404, detail=f"{item_type.capitalize()} not found"
+            )
 
-            await note_item.vectorize()
+        if embedding_in_background():
+            job_id = await CommandService.submit_command_job(
+                "open_notebook", f"embed_{item_type}", {f"{item_type}_id": item_id}
+            )
+            return EmbedResponse(
+                success=True,
+                message=f"Embedding of {item_type} queued",
+                item_id=item_id,
+                item_type=item_type,
+                job_id=job_id,
+            )
 
+        # Source.vectorize only embeds chunks that are new or changed since
+        # the last run, so re-embedding an up-to-date source is cheap
+        await item.vectorize()
         return EmbedResponse(
-            success=True, message=message, item_id=item_id, item_type=item_type
+            success=True,
+            message=f"{item_type.capitalize()} embedded successfully",
+            item_id=item_id,
+            item_type=item_type,
         )
 
     except HTTPException:
@@ -67,3 +98,137 @@ async def embed_content(embed_request: EmbedRequest):
         raise HTTPException(
             status_code=500, detail=f"Error embedding content: {str(e)}"
         )
+
+
+@router.post("/embed/rebuild-index", response_model=RebuildVectorIndexResponse)
+async def rebuild_vector_index():
+    """
+    Rebuild the vector indexes for the current default embedding model.
+
+    This switches search to the default model right away. Vectors made with a
+    previous model are not converted; use /embed/reembed for that.
+    """
+    try:
+        model_id = await model_manager.get_default_embedding_model_id()
+        embedding_model = await model_manager.get_model(model_id) if model_id else None
+        if not embedding_model:
+            raise HTTPException(
+                status_code=400,
+                detail="No embedding model configured. Please configure one in the Models section.",
+            )
+
+        assert isinstance(embedding_model, EmbeddingModel), (
+            f"Expected EmbeddingModel but got {type(embedding_model)}"
+        )
+
+        # The model does not expose its dimension, so embed a probe to learn it
+        dimension = len((await embedding_model.aembed(["dimension probe"]))[0])
+        await rebuild_vector_indexes(dimension, model_id)
+        if numpy_backend_enabled():
+            await rebuild_numpy_index(dimension, model_id)
+
+        return RebuildVectorIndexResponse(
+            dimension=dimension,
+            model_id=model_id,
+            message="Vector indexes are being rebuilt in the background",
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error rebuilding vector indexes: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error rebuilding vector indexes: {str(e)}"
+        )
+
+
+@router.post("/embed/reembed", response_model=ReembedStatusResponse)
+async def start_reembed(reembed_request: ReembedRequest):
+    """
+    Re-embed every chunk, insight and note with the default embedding model.
+
+    Runs as one resumable worker job per shard. Search keeps using the old
+    vectors until all rows are done, then switches to the new model.
+    """
+    try:
+        await start_migration(reembed_request.shards)
+        job_ids = [
+            await CommandService.submit_command_job(
+                "open_notebook",
+                "reembed_corpus",
+                {
+                    "shard": shard,
+                    "shards": reembed_request.shards,
+                    "page_size": reembed_request.page_size,
+                },
+            )
+            for shard in range(reembed_request.shards)
+        ]
+        status = await get_migration_status()
+        return ReembedStatusResponse(**status, job_ids=job_ids)
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting re-embedding: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error starting re-embedding: {str(e)}"
+        )
+
+
+@router.get("/embed/reembed", response_model=ReembedStatusResponse)
+async def get_reembed_status():
+    """
+    Get the progress of the corpus re-embedding.
+
+    Queues a catch-up worker if the migration is still running but its shard
+    jobs have stopped, so rows written after the last pass get re-embedded and
+    the cutover still happens.
+    """
+    try:
+        job_ids = []
+        if await claim_catch_up():
+            job_ids.append(
+                await CommandService.submit_command_job(
+                    "open_notebook", "reembed_corpus", {"shard": 0, "shards": 1}
+                )
+            )
+        return ReembedStatusResponse(**await get_migration_status(), job_ids=job_ids)
+    except Exception as e:
+        logger.error(f"Error fetching re-embedding status: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching re-embedding status: {str(e)}"
+        )
+
+
+@router.get("/embed/distribution", response_model=EmbeddingDistributionResponse)
+async def get_embedding_model_distribution():
+    """Report which embedding models and dimensions the stored vectors come from."""
+    try:
+        active_model = await model_manager.get_embedding_model_id()
+        state = await get_vector_index_state(refresh=True)
+        dimension = state["dimension"] if state else None
+        tables = await get_embedding_distribution()
+        searchable = {
+            table: sum(
+                row["count"]
+                for row in rows
+                if row.get("embedding_dimension") == dimension
+                and row.get("embedding_model") in (None, active_model)
+            )
+            for table, rows in tables.items()
+        }
+        return EmbeddingDistributionResponse(
+            active_model=active_model,
+            default_model=await model_manager.get_default_embedding_model_id(),
+            index_dimension=dimension,
+            tables={
+                table: [EmbeddingModelCount(**row) for row in rows]
+                for table, rows in tables.items()
+            },
+            searchable=searchable,
+        )
+    except Exception as e:
+        logger.error(f"Error fetching embedding distribution: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching embedding distribution: {str(e)}"
+        )
@@ -60,20 +60,23 @@ async def create_note(note_data: NoteCreate):
             })
             title = result.get("output", "Untitled Note")
         
-        new_note = Note(
-            title=title,
-            content=note_data.content,
-            note_type=note_data.note_type,
-        )
-        await new_note.save()
-        
-        # Add to notebook if specified
+        # Validate the notebook before writing so the note and its relation are saved together
         if note_data.notebook_id:
             from open_notebook.domain.notebook import Notebook
             notebook = await Notebook.get(note_data.notebook_id)
             if not notebook:
                 raise HTTPException(status_code=404, detail="Notebook not found")
-            await new_note.add_to_notebook(note_data.notebook_id)
+
+        new_note = Note(
+            title=title,
+            content=note_data.content,
+            note_type=note_data.note_type,
+        )
+        await new_note.save(
+            relations=[("artifact", note_data.notebook_id)]
+            if note_data.notebook_id
+            else None
+        )
         
         return NoteResponse(
             id=new_note.id,
@@ -1,5 +1,6 @@
 import asyncio
-from typing import AsyncGenerator, Dict
+import time
+from typing import AsyncGenerator, Dict, List, Optional, Union
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
@@ -7,7 +8,7 @@ from loguru import logger
 
 from api.models import AskRequest, AskResponse, SearchRequest, SearchResponse
 from open_notebook.domain.models import Model, model_manager
-from open_notebook.domain.notebook import text_search, vector_search
+from open_notebook.domain.notebook import hybrid_search, text_search, vector_search
 from open_notebook.exceptions import DatabaseOperationError, InvalidInputError
 from open_notebook.graphs.ask import graph as ask_graph
 
@@ -16,9 +17,11 @@ router = APIRouter()
 
 @router.post("/search", response_model=SearchResponse)
 async def search_knowledge_base(search_request: SearchRequest):
-    """Search the knowledge base using text or vector search."""
+    """Search the knowledge base using text, vector or hybrid search."""
     try:
-        if search_request.type == "vector":
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        if search_request.type in ("vector", "hybrid"):
             # Check if embedding model is available for vector search
             if not await model_manager.get_embedding_model():
                 raise HTTPException(
@@ -26,12 +29,23 @@ async def search_knowledge_base(search_request: SearchRequest):
                     detail="Vector search requires an embedding model. Please configure one in the Models section.",
                 )
 
+        if search_request.type == "hybrid":
+            results, timings = await hybrid_search(
+                keyword=search_request.query,
+                results=search_request.limit,
+                source=search_request.search_sources,
+                note=search_request.search_notes,
+                minimum_score=search_request.minimum_score,
+                notebook_ids=search_request.notebook_id,
+            )
+        elif search_request.type == "vector":
             results = await vector_search(
                 keyword=search_request.query,
                 results=search_request.limit,
                 source=search_request.search_sources,
                 note=search_request.search_notes,
                 minimum_score=search_request.minimum_score,
+                notebook_ids=search_request.notebook_id,
             )
         else:
             # Text search
@@ -40,12 +54,19 @@ async def search_knowledge_base(search_request: SearchRequest):
                 results=search_request.limit,
                 source=search_request.search_sources,
                 note=search_request.search_notes,
+                notebook_ids=search_request.notebook_id,
             )
 
+        if not timings:
+            timings = {
+                search_request.type: round((time.perf_counter() - start) * 1000, 2)
+            }
+
         return SearchResponse(
             results=results or [],
             total_count=len(results) if results else 0,
             search_type=search_request.type,
+            timings=timings,
         )
 
     except InvalidInputError as e:
@@ -59,14 +80,18 @@ async def search_knowledge_base(search_request: SearchRequest):
 
 
 async def stream_ask_response(
-    question: str, strategy_model: Model, answer_model: Model, final_answer_model: Model
+    question: str,
+    strategy_model: Model,
+    answer_model: Model,
+    final_answer_model: Model,
+    notebook_ids: Optional[Union[str, List[str]]] = None,
 ) -> AsyncGenerator[str, None]:
     """Stream the ask response as Server-Sent Events."""
     try:
         final_answer = None
 
         async for chunk in ask_graph.astream(
-            input=dict(question=question),
+            input=dict(question=question, notebook_ids=notebook_ids),
             config=dict(
                 configurable=dict(
                     strategy_model=strategy_model.id,
@@ -141,7 +166,11 @@ async def ask_knowledge_base(ask_request: AskRequest):
         # For streaming response
         return StreamingResponse(
             await stream_ask_response(
-                ask_request.question, strategy_model, answer_model, final_answer_model
+                ask_request.question,
+                strategy_model,
+                answer_model,
+                final_answer_model,
+                ask_request.notebook_id,
             ),
             media_type="text/plain",
         )
@@ -188,7 +217,9 @@ async def ask_knowledge_base_simple(ask_request: AskRequest):
         # Run the ask graph and get final result
         final_answer = None
         async for chunk in ask_graph.astream(
-            input=dict(question=ask_request.question),
+            input=dict(
+                question=ask_request.question, notebook_ids=ask_request.notebook_id
+            ),
             config=dict(
                 configurable=dict(
                     strategy_model=strategy_model.id,
@@ -1,25 +1,68 @@
-from typing import List, Optional
+import asyncio
+import json
+from typing import List, Optional, Union
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
+from api.command_service import CommandService
 from api.models import (
     AssetModel,
     CreateSourceInsightRequest,
+    RetryTransformationsRequest,
+    RetryTransformationsResponse,
+    SourceBatchCreate,
+    SourceBatchItem,
+    SourceBatchResponse,
     SourceCreate,
     SourceInsightResponse,
     SourceListResponse,
     SourceResponse,
     SourceUpdate,
 )
-from open_notebook.domain.notebook import Notebook, Source
+from open_notebook.domain.notebook import Asset, Notebook, Source
 from open_notebook.domain.transformation import Transformation
 from open_notebook.exceptions import InvalidInputError
 from open_notebook.graphs.source import source_graph
+from open_notebook.ingestion import (
+    TERMINAL_STATUSES,
+    create_batch,
+    get_batch_status,
+    start_batch,
+)
 
 router = APIRouter()
 
 
+def build_content_state(source_data: Union[SourceCreate, SourceBatchItem]) -> dict:
+    """The content_state source_graph extracts, validated for the source type."""
+    content_state: dict = {}
+    if source_data.type == "link":
+        if not source_data.url:
+            raise HTTPException(status_code=400, detail="URL is required for link type")
+        content_state["url"] = source_data.url
+    elif source_data.type == "upload":
+        if not source_data.file_path:
+            raise HTTPException(
+                status_code=400, detail="File path is required for upload type"
+            )
+        content_state["file_path"] = source_data.file_path
+        content_state["delete_source"] = source_data.delete_source
+    elif source_data.type == "text":
+        if not source_data.content:
+            raise HTTPException(
+                status_code=400, detail="Content is required for text type"
+            )
+        content_state["content"] = source_data.content
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid source type. Must be link, upload, or text",
+        )
+    return content_state
+
+
 @router.get("/sources", response_model=List[SourceListResponse])
 async def get_sources(
     notebook_id: Optional[str] = Query(None, description="Filter by notebook ID"),
@@ -66,9 +109,60 @@ async def get_sources(
         raise HTTPException(status_code=500, detail=f"Error fetching sources: {str(e)}")
 
 
+async def _submit_source_processing(
+    source_data: SourceCreate, content_state: dict
+) -> SourceResponse:
+    """Create the source record now and process it with a process_source job."""
+    source = Source(
+        title=source_data.title,
+        asset=Asset(url=source_data.url, file_path=source_data.file_path)
+        if source_data.url or source_data.file_path
+        else None,
+    )
+    await source.save(relations=[("reference", source_data.notebook_id)])
+    await source.set_processing_status("queued")
+    try:
+        command_id = await CommandService.submit_command_job(
+            "open_notebook",
+            "process_source",
+            {
+                "source_id": str(source.id),
+                "content_state": content_state,
+                "notebook_id": source_data.notebook_id,
+                "transformations": source_data.transformations or [],
+                "embed": source_data.embed,
+            },
+        )
+    except Exception:
+        await source.delete()
+        raise
+
+    return SourceResponse(
+        id=str(source.id),
+        title=source.title,
+        topics=source.topics or [],
+        asset=AssetModel(file_path=source.asset.file_path, url=source.asset.url)
+        if source.asset
+        else None,
+        full_text=None,
+        embedded_chunks=0,
+        command_id=command_id,
+        processing=await source.get_processing_status(),
+        created=str(source.created),
+        updated=str(source.updated),
+    )
+
+
 @router.post("/sources", response_model=SourceResponse)
 async def create_source(source_data: SourceCreate):
-    """Create a new source."""
+    """
+    Create a new source.
+
+    With async_processing the source is returned right away, without text,
+    and a process_source job (command_id) fills it in; its stage is reported
+    in processing by GET /sources/{source_id}. Without it the request blocks
+    until the source is extracted and saved, as it always has; the UI opts in.
+    """
     try:
         # Verify notebook exists
         notebook = await Notebook.get(source_data.notebook_id)
@@ -76,32 +170,7 @@ async def create_source(source_data: SourceCreate):
             raise HTTPException(status_code=404, detail="Notebook not found")
 
         # Prepare content_state for source_graph
-        content_state = {}
-
-        if source_data.type == "link":
-            if not source_data.url:
-                raise HTTPException(
-                    status_code=400, detail="URL is required for link type"
-                )
-            content_state["url"] = source_data.url
-        elif source_data.type == "upload":
-            if not source_data.file_path:
-                raise HTTPException(
-                    status_code=400, detail="File path is required for upload type"
-                )
-            content_state["file_path"] = source_data.file_path
-            content_state["delete_source"] = source_data.delete_source
-        elif source_data.type == "text":
-            if not source_data.content:
-                raise HTTPException(
-                    status_code=400, detail="Content is required for text type"
-                )
-            content_state["content"] = source_data.content
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid source type. Must be link, upload, or text",
-            )
+        content_state = build_content_state(source_data)
 
         # Get transformations to apply
         transformations = []
@@ -114,6 +183,9 @@ async def create_source(source_data: SourceCreate):
                     )
                 transformations.append(transformation)
 
+        if source_data.async_processing:
+            return await _submit_source_processing(source_data, content_state)
+
         # Process source using the source_graph
         result = await source_graph.ainvoke(
             {
@@ -138,6 +210,7 @@ async def create_source(source_data: SourceCreate):
             else None,
             full_text=source.full_text,
             embedded_chunks=await source.get_embedded_chunks(),
+            embedding_job_id=result.get("embedding_job_id"),
             created=str(source.created),
             updated=str(source.updated),
         )
@@ -150,11 +223,154 @@ async def create_source(source_data: SourceCreate):
         raise HTTPException(status_code=500, detail=f"Error creating source: {str(e)}")
 
 
+def _batch_response(batch: dict) -> SourceBatchResponse:
+    return SourceBatchResponse(
+        batch_id=batch["id"],
+        status=batch["status"],
+        total=batch["total"],
+        counts=batch["counts"],
+        items=batch["items"],
+    )
+
+
+@router.post("/sources/batch", response_model=SourceBatchResponse)
+async def create_source_batch(batch_data: SourceBatchCreate):
+    """
+    Ingest many sources at once.
+
+    Items run through extraction, save, embedding and transformations in the
+    background; poll GET /sources/batch/{batch_id} or stream its events.
+    """
+    try:
+        notebook = await Notebook.get(batch_data.notebook_id)
+        if not notebook:
+            raise HTTPException(status_code=404, detail="Notebook not found")
+
+        items = []
+        for position, item in enumerate(batch_data.items):
+            try:
+                content_state = build_content_state(item)
+            except HTTPException as e:
+                raise HTTPException(
+                    status_code=400, detail=f"Item {position}: {e.detail}"
+                )
+            label = item.url or item.file_path or item.title or "text"
+            items.append(
+                {"content_state": content_state, "title": item.title, "label": label}
+            )
+
+        transformations = []
+        for trans_id in batch_data.transformations:
+            transformation = await Transformation.get(trans_id)
+            if not transformation:
+                raise HTTPException(
+                    status_code=404, detail=f"Transformation {trans_id} not found"
+                )
+            transformations.append(transformation)
+
+        batch_id, batch_items = await create_batch(
+            items,
+            batch_data.notebook_id,
+            batch_data.transformations,
+            batch_data.embed,
+        )
+        start_batch(
+            batch_id,
+            batch_items,
+            batch_data.notebook_id,
+            transformations,
+            batch_data.embed,
+        )
+
+        batch = await get_batch_status(batch_id)
+        if not batch:
+            raise HTTPException(status_code=500, detail="Batch was not recorded")
+        return _batch_response(batch)
+    except HTTPException:
+        raise
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating source batch: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error creating source batch: {str(e)}"
+        )
+
+
+@router.get("/sources/batch/{batch_id}", response_model=SourceBatchResponse)
+async def get_source_batch(batch_id: str):
+    """Get the state of a source batch and of each of its items."""
+    try:
+        batch = await get_batch_status(batch_id)
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        return _batch_response(batch)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching source batch {batch_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching source batch: {str(e)}"
+        )
+
+
+async def stream_batch_events(batch_id: str, interval: float, max_duration: float):
+    """
+    Yield a Server-Sent Event for every item change, then a final summary.
+
+    After max_duration seconds a timeout event ends the stream; clients
+    reconnect to keep following the batch.
+    """
+    seen: dict = {}
+    deadline = asyncio.get_running_loop().time() + max_duration
+    while True:
+        batch = await get_batch_status(batch_id)
+        if not batch:
+            error = {"type": "error", "message": "Batch not found"}
+            yield f"data: {json.dumps(error)}\n\n"
+            return
+        response = _batch_response(batch)
+        for item in response.items:
+            state = (item.status, item.stage)
+            if seen.get(item.id) != state:
+                seen[item.id] = state
+                event = {"type": "item", **item.model_dump()}
+                yield f"data: {json.dumps(event)}\n\n"
+        if response.status != "running" or all(
+            item.status in TERMINAL_STATUSES for item in response.items
+        ):
+            summary = {"type": "complete", **response.model_dump(exclude={"items"})}
+            yield f"data: {json.dumps(summary)}\n\n"
+            return
+        if asyncio.get_running_loop().time() + interval > deadline:
+            timeout = {"type": "timeout", "batch_id": response.batch_id}
+            yield f"data: {json.dumps(timeout)}\n\n"
+            return
+        await asyncio.sleep(interval)
+
+
+@router.get("/sources/batch/{batch_id}/events")
+async def stream_source_batch(
+    batch_id: str,
+    interval: float = Query(1.0, ge=0.2, le=30, description="Seconds between polls"),
+    max_duration: float = Query(
+        600, ge=1, le=3600, description="Seconds before the stream closes"
+    ),
+):
+    """Stream item state changes of a source batch as Server-Sent Events."""
+    if not await get_batch_status(batch_id):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return StreamingResponse(
+        stream_batch_events(batch_id, interval, max_duration),
+        media_type="text/event-stream",
+    )
+
+
 @router.get("/sources/{source_id}", response_model=SourceResponse)
 async def get_source(source_id: str):
     """Get a specific source by ID."""
     try:
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, include=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -170,6 +386,9 @@ async def get_source(source_id: str):
             else None,
             full_text=source.full_text,
             embedded_chunks=await source.get_embedded_chunks(),
+            embedding_progress=await source.get_embedding_progress(),
+            processing=await source.get_processing_status(),
+            failed_transformations=await source.get_transformation_failures(),
             created=str(source.created),
             updated=str(source.updated),
         )
@@ -184,7 +403,7 @@ async def get_source(source_id: str):
 async def update_source(source_id: str, source_update: SourceUpdate):
     """Update a source."""
     try:
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, include=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -238,6 +457,49 @@ async def delete_source(source_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting source: {str(e)}")
 
 
+@router.post(
+    "/sources/{source_id}/transformations/retry",
+    response_model=RetryTransformationsResponse,
+)
+async def retry_source_transformations(
+    source_id: str, request: Optional[RetryTransformationsRequest] = None
+):
+    """Re-run failed transformations of a source on the worker."""
+    try:
+        source = await Source.get(source_id)
+        if not source:
+            raise HTTPException(status_code=404, detail="Source not found")
+
+        wanted = request.transformation_ids if request else None
+        failures = [
+            failure
+            for failure in await source.get_transformation_failures()
+            if not wanted or str(failure["transformation"]) in wanted
+        ]
+        if not failures:
+            raise HTTPException(
+                status_code=400, detail="No failed transformations to retry"
+            )
+
+        command_id = await CommandService.submit_command_job(
+            "open_notebook",
+            "retry_transformations",
+            {"source_id": source_id, "transformation_ids": wanted},
+        )
+        return RetryTransformationsResponse(
+            source_id=source_id,
+            command_id=command_id,
+            transformations=[failure["name"] for failure in failures],
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrying transformations of {source_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error retrying transformations: {str(e)}"
+        )
+
+
 @router.get("/sources/{source_id}/insights", response_model=List[SourceInsightResponse])
 async def get_source_insights(source_id: str):
     """Get all insights for a specific source."""
@@ -273,7 +535,7 @@ async def create_source_insight(
     """Create a new insight for a source by running a transformation."""
     try:
         # Get source
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, include=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -2,7 +2,7 @@
 Search service layer using API.
 """
 
-from typing import Dict, List, Any
+from typing import Any, Dict, List, Optional, Union
 
 from loguru import logger
 
@@ -22,7 +22,8 @@ class SearchService:
         limit: int = 100,
         search_sources: bool = True,
         search_notes: bool = True,
-        minimum_score: float = 0.2
+        minimum_score: float = 0.2,
+        notebook_id: Optional[Union[str, List[str]]] = None,
     ) -> List[Dict[str, Any]]:
         """Search the knowledge base."""
         response = api_client.search(
@@ -31,7 +32,8 @@ class SearchService:
             limit=limit,
             search_sources=search_sources,
             search_notes=search_notes,
-            minimum_score=minimum_score
+            minimum_score=minimum_score,
+            notebook_id=notebook_id,
         )
         return response.get("results", [])
     
@@ -123,6 +123,7 @@ class SourcesService:
         transformations: Optional[List[str]] = None,
         embed: bool = False,
         delete_source: bool = False,
+        async_processing: bool = False,
     ) -> Source:
         """Create a new source."""
         source_data = api_client.create_source(
@@ -135,6 +136,7 @@ class SourcesService:
             transformations=transformations,
             embed=embed,
             delete_source=delete_source,
+            async_processing=async_processing,
         )
 
         source = Source(
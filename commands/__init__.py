@@ -1,10 +1,28 @@
 """Surreal-commands integration for Open Notebook"""
 
+from .embedding_commands import (
+    embed_note_command,
+    embed_source_command,
+    reembed_corpus_command,
+)
 from .example_commands import analyze_data_command, process_text_command
 from .podcast_commands import generate_podcast_command
+from .search_commands import backfill_search_documents_command
+from .source_commands import (
+    merge_duplicate_sources_command,
+    process_source_command,
+    retry_transformations_command,
+)
 
 __all__ = [
     "generate_podcast_command",
+    "embed_source_command",
+    "embed_note_command",
+    "reembed_corpus_command",
+    "backfill_search_documents_command",
+    "process_source_command",
+    "retry_transformations_command",
+    "merge_duplicate_sources_command",
     "process_text_command",
     "analyze_data_command",
 ]
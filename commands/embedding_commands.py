@@ -0,0 +1,135 @@
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from surreal_commands import CommandInput, CommandOutput, command
+
+from open_notebook.domain.embedding_migration import run_shard
+from open_notebook.domain.notebook import Note, Source
+
+logger.info("=== IMPORTING embedding_commands.py ===")
+
+
+class EmbedSourceInput(CommandInput):
+    source_id: str
+
+
+class EmbedSourceOutput(CommandOutput):
+    success: bool
+    source_id: str
+    embedded_chunks: int = 0
+    progress: Optional[Dict[str, Any]] = None
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+class EmbedNoteInput(CommandInput):
+    note_id: str
+
+
+class EmbedNoteOutput(CommandOutput):
+    success: bool
+    note_id: str
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+@command("embed_source", app="open_notebook")
+async def embed_source_command(input_data: EmbedSourceInput) -> EmbedSourceOutput:
+    """
+    Chunk and embed a source in the background.
+
+    Progress (chunks embedded / total) is written to source.embedding_progress
+    after every batch, so it can be polled while the job runs.
+    """
+    start_time = time.time()
+    source: Optional[Source] = None
+    try:
+        source = await Source.get(input_data.source_id)
+        await source.vectorize()
+        return EmbedSourceOutput(
+            success=True,
+            source_id=input_data.source_id,
+            embedded_chunks=await source.get_embedded_chunks(),
+            progress=await source.get_embedding_progress(),
+            processing_time=time.time() - start_time,
+        )
+    except Exception as e:
+        logger.error(f"Embedding source {input_data.source_id} failed: {e}")
+        logger.exception(e)
+        return EmbedSourceOutput(
+            success=False,
+            source_id=input_data.source_id,
+            progress=await source.get_embedding_progress() if source else None,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
+
+
+@command("embed_note", app="open_notebook")
+async def embed_note_command(input_data: EmbedNoteInput) -> EmbedNoteOutput:
+    """Embed a note's content in the background."""
+    start_time = time.time()
+    try:
+        note = await Note.get(input_data.note_id)
+        await note.vectorize()
+        return EmbedNoteOutput(
+            success=True,
+            note_id=input_data.note_id,
+            processing_time=time.time() - start_time,
+        )
+    except Exception as e:
+        logger.error(f"Embedding note {input_data.note_id} failed: {e}")
+        logger.exception(e)
+        return EmbedNoteOutput(
+            success=False,
+            note_id=input_data.note_id,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
+
+
+class ReembedCorpusInput(CommandInput):
+    shard: int = 0
+    shards: int = 1
+    page_size: int = 200
+
+
+class ReembedCorpusOutput(CommandOutput):
+    success: bool
+    shard: int
+    tables: Dict[str, Dict[str, int]] = {}
+    cut_over: bool = False
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+@command("reembed_corpus", app="open_notebook")
+async def reembed_corpus_command(input_data: ReembedCorpusInput) -> ReembedCorpusOutput:
+    """
+    Re-embed one shard of the corpus with the new default embedding model.
+
+    Resumes from the shard's checkpoint. The job that finishes the last rows
+    swaps in the new vectors and switches search to the new model.
+    """
+    start_time = time.time()
+    try:
+        result = await run_shard(
+            input_data.shard, input_data.shards, input_data.page_size
+        )
+        return ReembedCorpusOutput(
+            success=True,
+            shard=input_data.shard,
+            tables=result["tables"],
+            cut_over=result["cut_over"],
+            processing_time=time.time() - start_time,
+        )
+    except Exception as e:
+        logger.error(f"Re-embedding shard {input_data.shard} failed: {e}")
+        logger.exception(e)
+        return ReembedCorpusOutput(
+            success=False,
+            shard=input_data.shard,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
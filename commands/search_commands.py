@@ -0,0 +1,77 @@
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+from surreal_commands import CommandInput, CommandOutput, command
+
+from open_notebook.database.repository import repo_query
+
+logger.info("=== IMPORTING search_commands.py ===")
+
+SEARCH_DOCUMENT_TABLES = ["source", "note", "source_insight", "source_embedding"]
+
+
+class BackfillSearchDocumentsInput(CommandInput):
+    tables: List[str] = SEARCH_DOCUMENT_TABLES
+    batch_size: int = 200
+
+
+class BackfillSearchDocumentsOutput(CommandOutput):
+    success: bool
+    indexed: Dict[str, int] = {}
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+@command("backfill_search_documents", app="open_notebook")
+async def backfill_search_documents_command(
+    input_data: BackfillSearchDocumentsInput,
+) -> BackfillSearchDocumentsOutput:
+    """
+    Build search_document rows for records written before the table existed.
+
+    Safe to re-run: documents are upserted by the id of the record they index.
+    """
+    start_time = time.time()
+    indexed: Dict[str, int] = {}
+
+    try:
+        for table in input_data.tables:
+            if table not in SEARCH_DOCUMENT_TABLES:
+                raise ValueError(f"Table {table} is not part of the search index")
+            indexed[table] = 0
+            last_id = None
+            while True:
+                # Keyset pagination; ids stay RecordIDs so they can be bound back
+                ids = await repo_query(
+                    f"SELECT VALUE id FROM {table} "
+                    + ("WHERE id > $last_id " if last_id is not None else "")
+                    + "ORDER BY id LIMIT $limit",
+                    {"last_id": last_id, "limit": input_data.batch_size},
+                    record_id_paths=[],
+                )
+                if not ids:
+                    break
+                await repo_query(
+                    "FOR $id IN $ids { fn::index_search_document($id); };",
+                    {"ids": ids},
+                )
+                indexed[table] += len(ids)
+                last_id = ids[-1]
+                logger.info(f"Indexed {indexed[table]} {table} records for search")
+
+        return BackfillSearchDocumentsOutput(
+            success=True,
+            indexed=indexed,
+            processing_time=time.time() - start_time,
+        )
+
+    except Exception as e:
+        logger.error(f"Search document backfill failed: {e}")
+        logger.exception(e)
+        return BackfillSearchDocumentsOutput(
+            success=False,
+            indexed=indexed,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
@@ -0,0 +1,206 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from surreal_commands import CommandInput, CommandOutput, command
+
+from open_notebook.domain.notebook import Source
+from open_notebook.domain.source_dedup import (
+    backfill_fingerprints,
+    delete_redirected_sources,
+    find_duplicate_groups,
+    merge_sources,
+)
+from open_notebook.domain.transformation import Transformation
+from open_notebook.graphs.source import retry_failed_transformations, source_graph
+
+logger.info("=== IMPORTING source_commands.py ===")
+
+
+class ProcessSourceInput(CommandInput):
+    source_id: str
+    content_state: Dict[str, Any]
+    notebook_id: Optional[str] = None
+    transformations: List[str] = []
+    embed: bool = False
+
+
+class ProcessSourceOutput(CommandOutput):
+    success: bool
+    source_id: str
+    reused: bool = False
+    embedding_job_id: Optional[str] = None
+    insights: int = 0
+    failed_transformations: List[str] = []
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+@command("process_source", app="open_notebook")
+async def process_source_command(input_data: ProcessSourceInput) -> ProcessSourceOutput:
+    """
+    Extract, save, embed and transform a source created by the API.
+
+    The stage is written to source.processing as it advances. If the content
+    matches an existing source, that source is added to the notebook instead,
+    the placeholder is kept with processing status "reused" pointing to it,
+    and source_id is the existing one.
+    """
+    start_time = time.time()
+    placeholder = Source(id=input_data.source_id)
+    try:
+        transformations = [
+            await Transformation.get(trans_id)
+            for trans_id in input_data.transformations
+        ]
+        result = await source_graph.ainvoke(
+            {
+                "content_state": input_data.content_state,
+                "notebook_id": input_data.notebook_id,
+                "apply_transformations": transformations,
+                "embed": input_data.embed,
+                "source_id": input_data.source_id,
+            }
+        )
+        source = result["source"]
+        reused = str(source.id) != input_data.source_id
+        entries = result.get("transformation") or []
+        failed = [entry["transformation_name"] for entry in entries if "error" in entry]
+        if not reused:
+            # Failed transformations leave the source completed; they can be retried
+            await placeholder.set_processing_status(
+                "completed",
+                error=f"Transformations failed: {', '.join(failed)}" if failed else None,
+            )
+        return ProcessSourceOutput(
+            success=True,
+            source_id=str(source.id),
+            reused=reused,
+            embedding_job_id=result.get("embedding_job_id"),
+            insights=len(entries) - len(failed),
+            failed_transformations=failed,
+            processing_time=time.time() - start_time,
+        )
+
+    except Exception as e:
+        logger.error(f"Processing source {input_data.source_id} failed: {e}")
+        logger.exception(e)
+        try:
+            status = await placeholder.get_processing_status() or {}
+            await placeholder.set_processing_status(
+                "failed", status.get("stage"), str(e)
+            )
+        except Exception:
+            pass
+        return ProcessSourceOutput(
+            success=False,
+            source_id=input_data.source_id,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
+
+
+class RetryTransformationsInput(CommandInput):
+    source_id: str
+    transformation_ids: Optional[List[str]] = None
+
+
+class RetryTransformationsOutput(CommandOutput):
+    success: bool
+    source_id: str
+    succeeded: List[str] = []
+    failed: List[str] = []
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+@command("retry_transformations", app="open_notebook")
+async def retry_transformations_command(
+    input_data: RetryTransformationsInput,
+) -> RetryTransformationsOutput:
+    """Re-run the transformations that failed on a source, without re-processing it."""
+    start_time = time.time()
+    try:
+        outcome = await retry_failed_transformations(
+            input_data.source_id, input_data.transformation_ids
+        )
+        return RetryTransformationsOutput(
+            success=not outcome["failed"],
+            source_id=input_data.source_id,
+            succeeded=outcome["succeeded"],
+            failed=outcome["failed"],
+            processing_time=time.time() - start_time,
+        )
+    except Exception as e:
+        logger.error(f"Retrying transformations of {input_data.source_id} failed: {e}")
+        logger.exception(e)
+        return RetryTransformationsOutput(
+            success=False,
+            source_id=input_data.source_id,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
+
+
+class MergeDuplicateSourcesInput(CommandInput):
+    dry_run: bool = False
+    batch_size: int = 100
+
+
+class MergeDuplicateSourcesOutput(CommandOutput):
+    success: bool
+    fingerprinted: int = 0
+    groups: List[List[str]] = []
+    merged: Dict[str, int] = {}
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+@command("merge_duplicate_sources", app="open_notebook")
+async def merge_duplicate_sources_command(
+    input_data: MergeDuplicateSourcesInput,
+) -> MergeDuplicateSourcesOutput:
+    """
+    Fingerprint sources saved without one, then merge sources with equal content.
+
+    The oldest source of each group is kept, and placeholders left by
+    process_source for reused sources are deleted. With dry_run the groups are
+    only reported. Safe to re-run.
+    """
+    start_time = time.time()
+    fingerprinted = 0
+    groups: List[List[str]] = []
+    merged: Dict[str, int] = {}
+
+    try:
+        fingerprinted = await backfill_fingerprints(input_data.batch_size)
+        duplicate_groups = await find_duplicate_groups()
+        groups = [[str(source_id) for source_id in ids] for ids in duplicate_groups]
+        logger.info(f"Found {len(groups)} groups of duplicate sources")
+
+        if not input_data.dry_run:
+            for keep, *duplicates in duplicate_groups:
+                stats = await merge_sources(keep, duplicates)
+                for key, value in stats.items():
+                    merged[key] = merged.get(key, 0) + value
+            merged["redirects"] = await delete_redirected_sources()
+
+        return MergeDuplicateSourcesOutput(
+            success=True,
+            fingerprinted=fingerprinted,
+            groups=groups,
+            merged=merged,
+            processing_time=time.time() - start_time,
+        )
+
+    except Exception as e:
+        logger.error(f"Merging duplicate sources failed: {e}")
+        logger.exception(e)
+        return MergeDuplicateSourcesOutput(
+            success=False,
+            fingerprinted=fingerprinted,
+            groups=groups,
+            merged=merged,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
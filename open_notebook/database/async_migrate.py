@@ -103,6 +103,18 @@ class AsyncMigrationManager:
             AsyncMigration.from_file("migrations/5.surrealql"),
             AsyncMigration.from_file("migrations/6.surrealql"),
             AsyncMigration.from_file("migrations/7.surrealql"),
+            AsyncMigration.from_file("migrations/8.surrealql"),
+            AsyncMigration.from_file("migrations/9.surrealql"),
+            AsyncMigration.from_file("migrations/10.surrealql"),
+            AsyncMigration.from_file("migrations/11.surrealql"),
+            AsyncMigration.from_file("migrations/12.surrealql"),
+            AsyncMigration.from_file("migrations/13.surrealql"),
+            AsyncMigration.from_file("migrations/14.surrealql"),
+            AsyncMigration.from_file("migrations/15.surrealql"),
+            AsyncMigration.from_file("migrations/16.surrealql"),
+            AsyncMigration.from_file("migrations/17.surrealql"),
+            AsyncMigration.from_file("migrations/18.surrealql"),
+            AsyncMigration.from_file("migrations/19.surrealql"),
         ]
         self.down_migrations = [
             AsyncMigration.from_file("migrations/1_down.surrealql"),
@@ -112,6 +124,18 @@ class AsyncMigrationManager:
             AsyncMigration.from_file("migrations/5_down.surrealql"),
             AsyncMigration.from_file("migrations/6_down.surrealql"),
             AsyncMigration.from_file("migrations/7_down.surrealql"),
+            AsyncMigration.from_file("migrations/8_down.surrealql"),
+            AsyncMigration.from_file("migrations/9_down.surrealql"),
+            AsyncMigration.from_file("migrations/10_down.surrealql"),
+            AsyncMigration.from_file("migrations/11_down.surrealql"),
+            AsyncMigration.from_file("migrations/12_down.surrealql"),
+            AsyncMigration.from_file("migrations/13_down.surrealql"),
+            AsyncMigration.from_file("migrations/14_down.surrealql"),
+            AsyncMigration.from_file("migrations/15_down.surrealql"),
+            AsyncMigration.from_file("migrations/16_down.surrealql"),
+            AsyncMigration.from_file("migrations/17_down.surrealql"),
+            AsyncMigration.from_file("migrations/18_down.surrealql"),
+            AsyncMigration.from_file("migrations/19_down.surrealql"),
         ]
         self.runner = AsyncMigrationRunner(
             up_migrations=self.up_migrations,
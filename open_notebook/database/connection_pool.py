@@ -0,0 +1,292 @@
+"""
+Pooled, long-lived SurrealDB connections.
+
+Each event loop owns its own pool because websocket connections are bound to the
+loop that opened them. Connections are opened lazily up to ``max_size``, health
+checked when they have been idle for a while and discarded when they fail. A
+loop's pool is closed when the loop shuts down, so short-lived loops (scripts,
+``asyncio.run`` in worker threads) do not leave connections behind.
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, Optional
+
+from loguru import logger
+
+try:
+    from websockets.exceptions import ConnectionClosed
+except ImportError:  # pragma: no cover - websockets ships with surrealdb
+    ConnectionClosed = ConnectionError  # type: ignore
+
+CONNECTION_ERRORS = (ConnectionError, ConnectionClosed, OSError, asyncio.TimeoutError)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid value for {name}, using default {default}")
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid value for {name}, using default {default}")
+        return default
+
+
+def pool_enabled() -> bool:
+    """Whether repository calls should draw from the pool (SURREAL_POOL_ENABLED)."""
+    return os.getenv("SURREAL_POOL_ENABLED", "true").lower() not in ("false", "0", "no")
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Return True if the error means the underlying socket is unusable."""
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+class _PooledConnection:
+    __slots__ = ("connection", "last_used")
+
+    def __init__(self, connection: Any):
+        self.connection = connection
+        self.last_used = time.monotonic()
+
+
+class SurrealConnectionPool:
+    """
+    A bounded pool of authenticated SurrealDB connections for a single event loop.
+
+    Args:
+        connect: Coroutine factory returning a connection that is signed in and
+            bound to the namespace/database.
+        min_size: Connections opened on first use and kept when idle.
+        max_size: Maximum number of connections checked out at the same time.
+        acquire_timeout: Seconds to wait for a free connection before failing.
+        health_check_interval: Idle seconds after which a connection is pinged
+            before being handed out.
+        max_idle_time: Idle seconds after which connections above ``min_size``
+            are closed.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[Any]],
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+        max_idle_time: float = 300.0,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.max_idle_time = max_idle_time
+
+        self._idle: Deque[_PooledConnection] = deque()
+        self._slots = asyncio.Semaphore(max_size)
+        self._warmed_up = False
+        self._closed = False
+        self._shutdown_watch: Optional[AsyncGenerator[None, None]] = None
+
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._created = 0
+        self._discarded = 0
+        self._acquired = 0
+
+    async def _open(self) -> _PooledConnection:
+        connection = await self._connect()
+        self._size += 1
+        self._created += 1
+        return _PooledConnection(connection)
+
+    async def _close(self, pooled: _PooledConnection) -> None:
+        self._size -= 1
+        self._discarded += 1
+        try:
+            await pooled.connection.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled SurrealDB connection: {e}")
+
+    async def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        try:
+            await asyncio.wait_for(
+                pooled.connection.query("RETURN true;"), self.health_check_interval
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy SurrealDB connection: {e}")
+            return False
+
+    async def _until_loop_shutdown(self) -> AsyncGenerator[None, None]:
+        try:
+            yield
+        finally:
+            await self.close()
+
+    async def _watch_loop_shutdown(self) -> None:
+        # loop.shutdown_asyncgens(), which asyncio.run calls before closing the
+        # loop, finalizes this generator while the loop can still close sockets.
+        # The loop only holds a weak reference to it.
+        self._shutdown_watch = self._until_loop_shutdown()
+        await self._shutdown_watch.__anext__()
+
+    async def _warm_up(self) -> None:
+        self._warmed_up = True
+        await self._watch_loop_shutdown()
+        for _ in range(self.min_size - len(self._idle) - self._in_use):
+            try:
+                self._idle.append(await self._open())
+            except Exception as e:
+                logger.warning(f"Could not pre-open SurrealDB connection: {e}")
+                break
+
+    async def _prune_idle(self) -> None:
+        now = time.monotonic()
+        while len(self._idle) + self._in_use > self.min_size and self._idle:
+            if now - self._idle[0].last_used < self.max_idle_time:
+                break
+            await self._close(self._idle.popleft())
+
+    async def acquire(self) -> Any:
+        """Check out a connection, opening or replacing one if needed."""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Timed out after {self.acquire_timeout}s waiting for a database connection"
+            )
+        finally:
+            self._waiting -= 1
+
+        try:
+            if not self._warmed_up:
+                await self._warm_up()
+            await self._prune_idle()
+
+            pooled: Optional[_PooledConnection] = None
+            while self._idle:
+                candidate = self._idle.pop()
+                idle_for = time.monotonic() - candidate.last_used
+                if idle_for < self.health_check_interval or await self._is_healthy(
+                    candidate
+                ):
+                    pooled = candidate
+                    break
+                await self._close(candidate)
+
+            if pooled is None:
+                pooled = await self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self._in_use += 1
+        self._acquired += 1
+        return pooled.connection
+
+    async def release(self, connection: Any, discard: bool = False) -> None:
+        """Return a connection to the pool, or close it if it is broken."""
+        self._in_use -= 1
+        try:
+            pooled = _PooledConnection(connection)
+            if discard or self._closed:
+                await self._close(pooled)
+            else:
+                self._idle.append(pooled)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        connection = await self.acquire()
+        discard = False
+        try:
+            yield connection
+        except BaseException as e:
+            discard = is_connection_error(e) or isinstance(e, asyncio.CancelledError)
+            raise
+        finally:
+            await self.release(connection, discard=discard)
+
+    async def close(self) -> None:
+        """Close idle connections; checked-out ones are closed on release."""
+        self._closed = True
+        while self._idle:
+            await self._close(self._idle.popleft())
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "waiting": self._waiting,
+            "created": self._created,
+            "discarded": self._discarded,
+            "acquired": self._acquired,
+            "max_size": self.max_size,
+        }
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SurrealConnectionPool]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_pool(connect: Callable[[], Awaitable[Any]]) -> SurrealConnectionPool:
+    """Return the pool owned by the running event loop, creating it if needed."""
+    loop = asyncio.get_running_loop()
+    # Connections reference their loop, so entries never leave the weak mapping
+    # on their own; drop pools closed at loop shutdown and those of loops that
+    # were closed without shutting down their async generators
+    for stale in [
+        old for old, pool in _pools.items() if pool._closed or old.is_closed()
+    ]:
+        del _pools[stale]
+    pool = _pools.get(loop)
+    if pool is None or pool._closed:
+        pool = SurrealConnectionPool(
+            connect,
+            min_size=_env_int("SURREAL_POOL_MIN_SIZE", 1),
+            max_size=_env_int("SURREAL_POOL_MAX_SIZE", 10),
+            acquire_timeout=_env_float("SURREAL_POOL_ACQUIRE_TIMEOUT", 30.0),
+            health_check_interval=_env_float("SURREAL_POOL_HEALTH_CHECK_INTERVAL", 30.0),
+            max_idle_time=_env_float("SURREAL_POOL_MAX_IDLE_TIME", 300.0),
+        )
+        _pools[loop] = pool
+    return pool
+
+
+def pool_metrics() -> Dict[str, Any]:
+    """Metrics for the running loop's pool, or an empty dict if none exists."""
+    try:
+        pool = _pools.get(asyncio.get_running_loop())
+    except RuntimeError:
+        pool = None
+    if pool is None:
+        return {"enabled": pool_enabled()}
+    return {"enabled": pool_enabled(), **pool.metrics()}
+
+
+async def close_pool() -> None:
+    """Close the running loop's pool (e.g. on application shutdown)."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool:
+        await pool.close()
@@ -0,0 +1,510 @@
+"""
+In-process vector index backed by a memory-mapped float32 matrix.
+
+Selected with VECTOR_SEARCH_BACKEND=numpy. Chunk, insight and note embeddings
+are stored L2-normalised in DATA_FOLDER/vector_index/vectors.f32, so a search is
+one matrix-vector product plus argpartition. rows.log maps matrix rows to record
+ids; it is append-only and replayed on load, and a row whose id is empty has
+been deleted. Writers hold an exclusive file lock, and every process picks up
+rows appended by others before searching, so the API and the worker can share
+the index. meta.json carries a generation that changes on every reset, so a
+process reloads from scratch when another one has rebuilt the index.
+
+The index only answers searches once it has been built from every embedding in
+SurrealDB (meta.json "complete"); until then numpy_search returns None, so
+search falls back to SurrealDB, and starts the build in the background.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from loguru import logger
+
+from open_notebook.config import DATA_FOLDER
+from open_notebook.database.repository import ensure_record_id, repo_query
+
+INDEX_FOLDER = f"{DATA_FOLDER}/vector_index"
+
+# Row kinds, used to filter sources vs notes without touching SurrealDB
+_DELETED, _SOURCE, _NOTE = 0, 1, 2
+
+# Matrix rows requested per growth step (the file doubles beyond this)
+_MIN_CAPACITY = 1024
+
+
+def numpy_backend_enabled() -> bool:
+    """Whether vector_search should use this index (VECTOR_SEARCH_BACKEND=numpy)."""
+    return os.getenv("VECTOR_SEARCH_BACKEND", "surreal").lower() == "numpy"
+
+
+def _kind_for(record_id: str) -> int:
+    return _NOTE if record_id.startswith("note:") else _SOURCE
+
+
+class NumpyVectorIndex:
+    """A float32 matrix on disk plus row <-> record id maps."""
+
+    def __init__(self, folder: str = INDEX_FOLDER):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self._vectors_path = os.path.join(folder, "vectors.f32")
+        self._rows_path = os.path.join(folder, "rows.log")
+        self._meta_path = os.path.join(folder, "meta.json")
+        self._lock_path = os.path.join(folder, ".lock")
+        self._build_lock_path = os.path.join(folder, ".build.lock")
+
+        self.dimension: Optional[int] = None
+        self.model_id: Optional[str] = None
+        self.generation: Optional[str] = None
+        self.complete = False
+        self.capacity = 0
+        self._matrix: Optional[np.memmap] = None
+        self._kinds = np.zeros(0, dtype=np.int8)
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._log_offset = 0
+        self._thread_lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Number of live vectors."""
+        return len(self._rows)
+
+    @contextmanager
+    def _file_lock(self):
+        with self._thread_lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Dict[str, Any]:
+        if not os.path.exists(self._meta_path):
+            return {}
+        with open(self._meta_path) as f:
+            return json.load(f)
+
+    def _write_meta(self) -> None:
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "dimension": self.dimension,
+                    "model_id": self.model_id,
+                    "capacity": self.capacity,
+                    "generation": self.generation,
+                    "complete": self.complete,
+                },
+                f,
+            )
+        os.replace(tmp_path, self._meta_path)
+
+    def _map(self, capacity: int) -> None:
+        assert self.dimension
+        self.capacity = capacity
+        self._matrix = np.memmap(
+            self._vectors_path,
+            dtype=np.float32,
+            mode="r+",
+            shape=(capacity, self.dimension),
+        )
+        if len(self._kinds) < capacity:
+            self._kinds = np.concatenate(
+                [self._kinds, np.zeros(capacity - len(self._kinds), dtype=np.int8)]
+            )
+
+    def _grow(self, rows_needed: int) -> None:
+        assert self.dimension
+        if rows_needed <= self.capacity:
+            return
+        capacity = max(_MIN_CAPACITY, self.capacity)
+        while capacity < rows_needed:
+            capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dimension * 4)
+        self._map(capacity)
+
+    def _apply_row(self, row: int, record_id: Optional[str]) -> None:
+        while len(self._ids) <= row:
+            self._ids.append(None)
+        previous = self._ids[row]
+        if previous and self._rows.get(previous) == row:
+            del self._rows[previous]
+        self._ids[row] = record_id or None
+        if record_id:
+            self._rows[record_id] = row
+        self._kinds[row] = _kind_for(record_id) if record_id else _DELETED
+
+    def refresh(self) -> None:
+        """Pick up dimension, capacity and rows written by other processes."""
+        meta = self._read_meta()
+        if not meta.get("dimension"):
+            return
+        if (
+            meta["dimension"] != self.dimension
+            or meta.get("generation") != self.generation
+        ):
+            # Reset by another process, possibly with the same dimension and
+            # capacity: the rows held here no longer match the files
+            self._reset_memory()
+            self.dimension = meta["dimension"]
+            self.generation = meta.get("generation")
+        self.model_id = meta.get("model_id")
+        self.complete = bool(meta.get("complete"))
+        if meta["capacity"] != self.capacity or self._matrix is None:
+            self._map(meta["capacity"])
+
+        if not os.path.exists(self._rows_path):
+            return
+        with open(self._rows_path, "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        # Only consume complete lines; a writer may be mid-append
+        complete = data[: data.rfind(b"\n") + 1]
+        for line in complete.decode().splitlines():
+            row, _, record_id = line.partition("\t")
+            self._apply_row(int(row), record_id)
+        self._log_offset += len(complete)
+
+    def _reset_memory(self) -> None:
+        self._matrix = None
+        self.capacity = 0
+        self._kinds = np.zeros(0, dtype=np.int8)
+        self._ids = []
+        self._rows = {}
+        self._log_offset = 0
+
+    def reset(self, dimension: int, model_id: Optional[str] = None) -> None:
+        """Drop every vector and start over with a new dimension."""
+        with self._file_lock():
+            for path in (self._vectors_path, self._rows_path, self._meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._reset_memory()
+            self.dimension = dimension
+            self.model_id = model_id
+            self.generation = uuid.uuid4().hex
+            self.complete = False
+            open(self._vectors_path, "wb").close()
+            self._grow(_MIN_CAPACITY)
+            self._write_meta()
+
+    def mark_complete(self, generation: Optional[str]) -> bool:
+        """Record that a full build of this generation finished."""
+        with self._file_lock():
+            self.refresh()
+            if self.generation != generation:
+                return False  # reset again while the build ran
+            self.complete = True
+            self._write_meta()
+            return True
+
+    @contextmanager
+    def build_lock(self):
+        """Exclusive across processes; yields False if a build is already running."""
+        with open(self._build_lock_path, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add(
+        self,
+        items: Sequence[Tuple[str, Sequence[float]]],
+        model_id: Optional[str] = None,
+    ) -> None:
+        """Insert or replace the vectors of the given record ids."""
+        items = [(record_id, vector) for record_id, vector in items if len(vector)]
+        if not items:
+            return
+        dimension = len(items[0][1])
+        if self._read_meta().get("dimension") is None:
+            self.reset(dimension, model_id)
+
+        with self._file_lock():
+            self.refresh()
+            if dimension != self.dimension:
+                logger.warning(
+                    f"Skipping {len(items)} vectors of dimension {dimension}; "
+                    f"the in-process index uses {self.dimension}"
+                )
+                return
+            if model_id and self.model_id and model_id != self.model_id:
+                logger.warning(
+                    f"Skipping {len(items)} vectors of {model_id}; "
+                    f"the in-process index holds {self.model_id}"
+                )
+                return
+
+            vectors = np.asarray([vector for _, vector in items], dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms == 0, 1, norms)
+
+            next_row = len(self._ids)
+            rows = []
+            for record_id, _ in items:
+                row = self._rows.get(record_id)
+                if row is None:
+                    row = next_row
+                    next_row += 1
+                rows.append(row)
+
+            capacity = self.capacity
+            self._grow(next_row)
+            assert self._matrix is not None
+            self._matrix[rows] = vectors
+            self._matrix.flush()
+
+            # Vectors are on disk before the rows pointing at them are logged
+            with open(self._rows_path, "a") as f:
+                f.write("".join(f"{row}\t{rid}\n" for row, (rid, _) in zip(rows, items)))
+            if self.capacity != capacity:
+                self._write_meta()
+            self.refresh()
+
+    def remove(self, record_ids: Sequence[str]) -> None:
+        """Tombstone the rows of the given record ids."""
+        with self._file_lock():
+            self.refresh()
+            rows = [self._rows[rid] for rid in record_ids if rid in self._rows]
+            if not rows:
+                return
+            with open(self._rows_path, "a") as f:
+                f.write("".join(f"{row}\t\n" for row in rows))
+            self.refresh()
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int,
+        source: bool = True,
+        note: bool = True,
+        minimum_score: float = 0.0,
+        model_id: Optional[str] = None,
+    ) -> Optional[List[Tuple[str, float]]]:
+        """
+        Return up to k (record_id, cosine similarity) pairs, best first.
+
+        Returns None if the index is incomplete, empty or built for another
+        dimension or model.
+        """
+        with self._thread_lock:
+            self.refresh()
+            if not self.complete:
+                return None
+            if not self._rows or self.dimension != len(query) or self._matrix is None:
+                return None
+            if model_id and self.model_id and model_id != self.model_id:
+                return None
+
+            q = np.asarray(query, dtype=np.float32)
+            q /= np.linalg.norm(q) or 1.0
+            count = len(self._ids)
+            scores = self._matrix[:count] @ q
+
+            kinds = self._kinds[:count]
+            allowed = (kinds == _SOURCE) if source else np.zeros(count, dtype=bool)
+            if note:
+                allowed |= kinds == _NOTE
+            scores = np.where(allowed & (scores >= minimum_score), scores, -np.inf)
+
+            k = min(k, count)
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (self._ids[row], float(scores[row]))  # type: ignore[misc]
+                for row in top
+                if np.isfinite(scores[row])
+            ]
+
+
+_index: Optional[NumpyVectorIndex] = None
+_build_tasks: Set[asyncio.Task] = set()
+
+
+def get_numpy_index() -> NumpyVectorIndex:
+    global _index
+    if _index is None:
+        _index = NumpyVectorIndex()
+    return _index
+
+
+async def index_embeddings(
+    items: Sequence[Tuple[str, Sequence[float]]], model_id: Optional[str] = None
+) -> None:
+    """Add freshly written embeddings to the index, if the backend is enabled."""
+    if not numpy_backend_enabled() or not items:
+        return
+    try:
+        await asyncio.to_thread(get_numpy_index().add, items, model_id)
+    except Exception as e:
+        logger.error(f"Failed to update in-process vector index: {e}")
+
+
+async def remove_embeddings(record_ids: Sequence[str]) -> None:
+    """Drop deleted records from the index, if the backend is enabled."""
+    if not numpy_backend_enabled() or not record_ids:
+        return
+    try:
+        await asyncio.to_thread(get_numpy_index().remove, record_ids)
+    except Exception as e:
+        logger.error(f"Failed to update in-process vector index: {e}")
+
+
+_DETAIL_QUERIES = {
+    "source_embedding": """
+        SELECT id as row_id, source.id as id, source.title as title, content,
+            source.id as parent_id FROM $ids
+    """,
+    "source_insight": """
+        SELECT id as row_id, id, insight_type + ' - ' + (source.title OR '') as title,
+            content, source.id as parent_id FROM $ids
+    """,
+    "note": """
+        SELECT id as row_id, id, title, content, id as parent_id FROM $ids
+    """,
+}
+
+
+async def numpy_search(
+    embedding: List[float],
+    results: int,
+    source: bool = True,
+    note: bool = True,
+    minimum_score: float = 0.2,
+    model_id: Optional[str] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Search the in-process index and hydrate hits from SurrealDB.
+
+    Returns None when the index cannot answer, so the caller falls back to the
+    SurrealDB search. Result rows match fn::vector_search.
+    """
+    index = get_numpy_index()
+    hits = await asyncio.to_thread(
+        index.search,
+        embedding,
+        results * 3,
+        source,
+        note,
+        minimum_score,
+        model_id,
+    )
+    if hits is None:
+        if not index.complete and not _build_tasks:
+            start_numpy_index_build(len(embedding), model_id)
+        return None
+
+    scores = dict(hits)
+    by_table: Dict[str, List[str]] = {}
+    for record_id, _ in hits:
+        by_table.setdefault(record_id.split(":", 1)[0], []).append(record_id)
+
+    grouped: Dict[Tuple[str, str, Any], Dict[str, Any]] = {}
+    for table, ids in by_table.items():
+        if table not in _DETAIL_QUERIES:
+            continue
+        rows = await repo_query(
+            _DETAIL_QUERIES[table],
+            {"ids": [ensure_record_id(rid) for rid in ids]},
+            record_id_paths=["row_id", "id", "parent_id"],
+        )
+        for row in rows:
+            similarity = scores.get(row["row_id"], 0.0)
+            key = (row["id"], row["parent_id"], row.get("title"))
+            group = grouped.setdefault(
+                key,
+                {
+                    "id": row["id"],
+                    "parent_id": row["parent_id"],
+                    "title": row.get("title"),
+                    "similarity": similarity,
+                    "matches": [],
+                },
+            )
+            group["similarity"] = max(group["similarity"], similarity)
+            group["matches"].append(row.get("content"))
+
+    ranked = sorted(grouped.values(), key=lambda r: r["similarity"], reverse=True)
+    return ranked[:results]
+
+
+async def rebuild_numpy_index(
+    dimension: int, model_id: Optional[str] = None, page_size: int = 1000
+) -> int:
+    """
+    Rebuild the index from every embedding stored in SurrealDB.
+
+    Returns the number of vectors indexed, or 0 if another process is already
+    building the index.
+    """
+    index = get_numpy_index()
+    with index.build_lock() as acquired:
+        if not acquired:
+            logger.info("In-process vector index is being built by another process")
+            return 0
+        await asyncio.to_thread(index.reset, dimension, model_id)
+        generation = index.generation
+        total = 0
+        for table in _DETAIL_QUERIES:
+            start = 0
+            while True:
+                rows = await repo_query(
+                    f"SELECT id, embedding FROM {table} "
+                    "WHERE embedding_dimension = $dimension "
+                    "AND (embedding_model IS NONE OR embedding_model = $model_id) "
+                    "ORDER BY id LIMIT $limit START $start",
+                    {
+                        "dimension": dimension,
+                        "model_id": model_id,
+                        "limit": page_size,
+                        "start": start,
+                    },
+                    record_id_paths=["id"],
+                )
+                if not rows:
+                    break
+                await asyncio.to_thread(
+                    index.add, [(row["id"], row["embedding"]) for row in rows], model_id
+                )
+                total += len(rows)
+                start += page_size
+        if not await asyncio.to_thread(index.mark_complete, generation):
+            logger.warning("In-process vector index was reset during its rebuild")
+            return 0
+    logger.info(f"Rebuilt in-process vector index with {total} vectors")
+    return total
+
+
+def start_numpy_index_build(dimension: int, model_id: Optional[str]) -> None:
+    """Build the index in the background of the current event loop."""
+
+    async def build() -> None:
+        try:
+            await rebuild_numpy_index(dimension, model_id)
+        except Exception as e:
+            logger.error(f"Failed to build in-process vector index: {e}")
+
+    logger.info("In-process vector index is incomplete, building it")
+    task = asyncio.create_task(build())
+    # The loop only keeps weak references to tasks
+    _build_tasks.add(task)
+    task.add_done_callback(_build_tasks.discard)
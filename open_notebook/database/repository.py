@@ -1,13 +1,18 @@
 import os
+import re
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, TypeVar, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
 
 from loguru import logger
 from surrealdb import AsyncSurreal, RecordID  # type: ignore
 
+from open_notebook.database.connection_pool import get_pool, pool_enabled
+
 T = TypeVar("T", Dict[str, Any], List[Dict[str, Any]])
 
+Statement = Tuple[str, Optional[Dict[str, Any]]]
+
 
 def get_database_url():
     """Get database URL with backward compatibility"""
@@ -26,14 +31,80 @@ def get_database_password():
     return os.getenv("SURREAL_PASSWORD") or os.getenv("SURREAL_PASS")
 
 
-def parse_record_ids(obj: Any) -> Any:
-    """Recursively parse and convert RecordIDs into strings."""
-    if isinstance(obj, dict):
-        return {k: parse_record_ids(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [parse_record_ids(item) for item in obj]
-    elif isinstance(obj, RecordID):
+def _is_numeric_vector(value: List[Any]) -> bool:
+    """Cheap check for embedding-style lists that can never hold RecordIDs."""
+    if not value or type(value[0]) not in (float, int):
+        return False
+    try:
+        # sum() walks the list in C and fails on the first non-number
+        sum(value)
+        return True
+    except TypeError:
+        return False
+
+
+def _parse_record_id_paths(obj: Any, paths: Iterable[str]) -> Any:
+    """Convert RecordIDs only at the given dotted paths of each row."""
+    rows = obj if isinstance(obj, list) else [obj]
+    split_paths = [path.split(".") for path in paths]
+    for row in rows:
+        for parts in split_paths:
+            stack = [(row, 0)]
+            while stack:
+                node, depth = stack.pop()
+                if isinstance(node, list):
+                    stack.extend((item, depth) for item in node)
+                    continue
+                if not isinstance(node, dict) or parts[depth] not in node:
+                    continue
+                key = parts[depth]
+                value = node[key]
+                if depth == len(parts) - 1:
+                    if isinstance(value, RecordID):
+                        node[key] = str(value)
+                    elif isinstance(value, list):
+                        node[key] = [
+                            str(v) if isinstance(v, RecordID) else v for v in value
+                        ]
+                else:
+                    stack.append((value, depth + 1))
+    return obj
+
+
+def parse_record_ids(obj: Any, paths: Optional[Iterable[str]] = None) -> Any:
+    """
+    Convert RecordIDs into strings, in place.
+
+    Walks the result iteratively and skips numeric lists such as embeddings
+    without copying them. If paths is given (e.g. ["id", "source.id"]), only
+    those dotted paths of each row are converted.
+    """
+    if isinstance(obj, RecordID):
         return str(obj)
+    if paths is not None:
+        return _parse_record_id_paths(obj, paths)
+
+    # Decoded query results only contain plain dicts and lists, so exact type
+    # checks are safe and noticeably cheaper than isinstance in this hot loop
+    stack = [obj]
+    while stack:
+        container = stack.pop()
+        if type(container) is dict:
+            entries: Iterable[Tuple[Any, Any]] = container.items()
+        elif type(container) is list:
+            entries = enumerate(container)
+        else:
+            continue
+        for key, value in entries:
+            value_type = type(value)
+            if value_type is str or value_type is float or value_type is int:
+                continue
+            if value_type is RecordID:
+                container[key] = str(value)
+            elif value_type is dict:
+                stack.append(value)
+            elif value_type is list and not _is_numeric_vector(value):
+                stack.append(value)
     return obj
 
 
@@ -44,8 +115,7 @@ def ensure_record_id(value: Union[str, RecordID]) -> RecordID:
     return RecordID.parse(value)
 
 
-@asynccontextmanager
-async def db_connection():
+async def _open_connection() -> AsyncSurreal:
     db = AsyncSurreal(get_database_url())
     await db.signin(
         {
@@ -56,6 +126,23 @@ async def db_connection():
     await db.use(
         os.environ.get("SURREAL_NAMESPACE"), os.environ.get("SURREAL_DATABASE")
     )
+    return db
+
+
+@asynccontextmanager
+async def db_connection():
+    """
+    Yield an authenticated connection.
+
+    Connections come from the event loop's pool unless SURREAL_POOL_ENABLED is
+    false, in which case a dedicated connection is opened and closed per call.
+    """
+    if pool_enabled():
+        async with get_pool(_open_connection).connection() as db:
+            yield db
+        return
+
+    db = await _open_connection()
     try:
         yield db
     finally:
@@ -63,13 +150,21 @@ async def db_connection():
 
 
 async def repo_query(
-    query_str: str, vars: Optional[Dict[str, Any]] = None
+    query_str: str,
+    vars: Optional[Dict[str, Any]] = None,
+    record_id_paths: Optional[Iterable[str]] = None,
 ) -> List[Dict[str, Any]]:
-    """Execute a SurrealQL query and return the results"""
+    """
+    Execute a SurrealQL query and return the results.
+
+    record_id_paths restricts RecordID conversion to known fields of each row.
+    """
 
     async with db_connection() as connection:
         try:
-            result = parse_record_ids(await connection.query(query_str, vars))
+            result = parse_record_ids(
+                await connection.query(query_str, vars), record_id_paths
+            )
             if isinstance(result, str):
                 raise RuntimeError(result)
             return result
@@ -180,3 +275,99 @@ async def repo_insert(
             return []
         logger.exception(e)
         raise RuntimeError("Failed to create record")
+
+
+def get_batch_size() -> int:
+    """Number of statements or records sent per round trip (SURREAL_BATCH_SIZE)."""
+    try:
+        return max(1, int(os.getenv("SURREAL_BATCH_SIZE", "100")))
+    except ValueError:
+        return 100
+
+
+def _scope_statement(
+    statement: str, vars: Optional[Dict[str, Any]], prefix: str
+) -> Tuple[str, Dict[str, Any]]:
+    """Rename a statement's parameters so several statements can share one query."""
+    scoped: Dict[str, Any] = {}
+    for name in sorted(vars or {}, key=len, reverse=True):
+        scoped_name = f"{prefix}{name}"
+        statement = re.sub(rf"\${re.escape(name)}\b", f"${scoped_name}", statement)
+        scoped[scoped_name] = vars[name]  # type: ignore[index]
+    return statement.strip().rstrip(";"), scoped
+
+
+async def repo_transaction(statements: List[Statement]) -> List[Any]:
+    """
+    Execute statements atomically in a single BEGIN ... COMMIT round trip.
+
+    Each statement is a (query, vars) tuple; vars are scoped per statement so
+    names may repeat. Returns the result of every statement in order.
+    """
+    if not statements:
+        return []
+
+    parts = []
+    params: Dict[str, Any] = {}
+    for idx, (statement, vars) in enumerate(statements):
+        scoped_statement, scoped_vars = _scope_statement(statement, vars, f"tx{idx}_")
+        parts.append(f"{scoped_statement};")
+        params.update(scoped_vars)
+    query = "BEGIN TRANSACTION;\n" + "\n".join(parts) + "\nCOMMIT TRANSACTION;"
+
+    async with db_connection() as connection:
+        try:
+            response = await connection.query_raw(query, params)
+        except Exception as e:
+            logger.error(f"Transaction with {len(statements)} statements failed")
+            logger.exception(e)
+            raise
+
+    if response.get("error"):
+        raise RuntimeError(response["error"].get("message", str(response["error"])))
+
+    results = response.get("result") or []
+    errors = [r.get("result") for r in results if r.get("status") == "ERR"]
+    if errors:
+        # Every statement of a failed transaction reports an error; surface the cause
+        cause = next(
+            (e for e in errors if "failed transaction" not in str(e)), errors[0]
+        )
+        logger.error(f"Transaction failed: {cause} query: {query[:200]}")
+        raise RuntimeError(f"Transaction failed: {cause}")
+    return [parse_record_ids(r.get("result")) for r in results]
+
+
+async def repo_batch(
+    statements: List[Statement], batch_size: Optional[int] = None
+) -> List[Any]:
+    """
+    Execute many statements in transactions of at most batch_size statements.
+
+    Each batch is atomic on its own; the whole list is not.
+    """
+    batch_size = batch_size or get_batch_size()
+    results: List[Any] = []
+    for start in range(0, len(statements), batch_size):
+        results.extend(await repo_transaction(statements[start : start + batch_size]))
+    return results
+
+
+async def repo_batch_insert(
+    table: str, data: List[Dict[str, Any]], batch_size: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Insert records with one multi-row INSERT per batch over a single connection"""
+    batch_size = batch_size or get_batch_size()
+    inserted: List[Dict[str, Any]] = []
+    try:
+        async with db_connection() as connection:
+            for start in range(0, len(data), batch_size):
+                result = await connection.insert(table, data[start : start + batch_size])
+                if isinstance(result, str):
+                    raise RuntimeError(result)
+                inserted.extend(parse_record_ids(result))
+        return inserted
+    except Exception as e:
+        logger.error(f"Batch insert into {table} failed after {len(inserted)} records")
+        logger.exception(e)
+        raise RuntimeError(f"Failed to insert records: {str(e)}")
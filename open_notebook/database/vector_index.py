@@ -0,0 +1,200 @@
+"""
+HNSW vector indexes on the embedding fields and index-backed KNN search.
+
+Index dimensions depend on the embedding model, so the indexes are defined at
+runtime (on the first embedding write, or explicitly through
+rebuild_vector_indexes) rather than in a static migration. The active dimension
+and model are recorded in open_notebook:vector_index. When no index matches the
+query dimension, searches fall back to the brute-force fn::vector_search.
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from open_notebook.database.repository import ensure_record_id, repo_query
+
+VECTOR_INDEX_RECORD = "open_notebook:vector_index"
+
+# table -> index name
+VECTOR_INDEXES = {
+    "source_embedding": "idx_source_embedding_vector",
+    "source_insight": "idx_source_insight_vector",
+    "note": "idx_note_vector",
+}
+
+_index_state: Optional[Dict[str, Any]] = None
+_index_state_loaded = 0.0
+
+# Other processes (e.g. the worker after a re-embed cutover) may change the
+# state, so the cached copy is refreshed periodically
+_INDEX_STATE_TTL = 30.0
+
+
+def _hnsw_options() -> str:
+    m = int(os.getenv("VECTOR_INDEX_HNSW_M", "12"))
+    efc = int(os.getenv("VECTOR_INDEX_HNSW_EFC", "150"))
+    return f"DIST COSINE EFC {efc} M {m}"
+
+
+def _search_ef(k: int) -> int:
+    return max(k, int(os.getenv("VECTOR_INDEX_SEARCH_EF", "64")))
+
+
+async def get_vector_index_state(refresh: bool = False) -> Optional[Dict[str, Any]]:
+    """Return {dimension, model_id} for the active indexes, or None."""
+    global _index_state, _index_state_loaded
+    stale = time.monotonic() - _index_state_loaded > _INDEX_STATE_TTL
+    if _index_state is None or refresh or stale:
+        result = await repo_query(
+            "SELECT * FROM ONLY $record",
+            {"record": ensure_record_id(VECTOR_INDEX_RECORD)},
+        )
+        row = result[0] if isinstance(result, list) and result else result
+        _index_state = row if isinstance(row, dict) and row.get("dimension") else {}
+        _index_state_loaded = time.monotonic()
+    return _index_state or None
+
+
+async def rebuild_vector_indexes(dimension: int, model_id: Optional[str]) -> None:
+    """
+    Drop and redefine the HNSW indexes for the given embedding dimension.
+
+    Indexes are built CONCURRENTLY, so writes and brute-force searches keep
+    working while SurrealDB indexes existing rows.
+    """
+    global _index_state, _index_state_loaded
+    if dimension <= 0:
+        raise ValueError("Vector index dimension must be positive")
+
+    logger.info(f"Rebuilding vector indexes with dimension {dimension} ({model_id})")
+    for table, index in VECTOR_INDEXES.items():
+        await repo_query(f"REMOVE INDEX IF EXISTS {index} ON TABLE {table};")
+        await repo_query(
+            f"DEFINE INDEX {index} ON TABLE {table} FIELDS embedding "
+            f"HNSW DIMENSION {int(dimension)} {_hnsw_options()} CONCURRENTLY;"
+        )
+    await repo_query(
+        "UPSERT $record CONTENT {dimension: $dimension, model_id: $model_id, updated: time::now()};",
+        {
+            "record": ensure_record_id(VECTOR_INDEX_RECORD),
+            "dimension": dimension,
+            "model_id": model_id,
+        },
+    )
+    _index_state = {"dimension": dimension, "model_id": model_id}
+    _index_state_loaded = time.monotonic()
+
+
+async def remove_vector_indexes() -> None:
+    """Drop the HNSW indexes, e.g. before replacing vectors with another dimension."""
+    for table, index in VECTOR_INDEXES.items():
+        await repo_query(f"REMOVE INDEX IF EXISTS {index} ON TABLE {table};")
+
+
+async def ensure_vector_indexes(dimension: int, model_id: Optional[str]) -> None:
+    """
+    Define the indexes the first time embeddings are written.
+
+    Existing indexes for another dimension are left alone: rebuilding them is an
+    explicit step because existing vectors belong to the previous model.
+    """
+    if not dimension:
+        return
+    try:
+        state = await get_vector_index_state()
+        if state is None:
+            await rebuild_vector_indexes(dimension, model_id)
+        elif state["dimension"] != dimension:
+            logger.warning(
+                f"Vector indexes use dimension {state['dimension']} but the embedding "
+                f"model produces {dimension}. Rebuild the index to use it for search."
+            )
+    except Exception as e:
+        logger.error(f"Could not ensure vector indexes: {e}")
+
+
+# Rows embedded by another model may share the dimension; untagged legacy rows
+# are assumed to belong to the indexed model
+_MODEL_FILTER = "(embedding_model IS NONE OR embedding_model = $model_id)"
+
+
+async def get_embedding_distribution() -> Dict[str, List[Dict[str, Any]]]:
+    """Count stored vectors per table by (embedding_model, embedding_dimension)."""
+    distribution = {}
+    for table in VECTOR_INDEXES:
+        distribution[table] = await repo_query(
+            f"SELECT embedding_model, embedding_dimension, count() AS count "
+            f"FROM {table} GROUP BY embedding_model, embedding_dimension;"
+        )
+    return distribution
+
+
+def _knn_selects(k: int, ef: int, source: bool, note: bool) -> List[str]:
+    knn = f"<|{int(k)},{int(ef)}|>"
+    selects = []
+    if source:
+        selects.append(
+            f"""(SELECT source.id as id, source.title as title, content,
+                source.id as parent_id, 1 - vector::distance::knn() as similarity
+                FROM source_embedding WHERE embedding {knn} $query AND {_MODEL_FILTER})"""
+        )
+        selects.append(
+            f"""(SELECT id, insight_type + ' - ' + (source.title OR '') as title, content,
+                source.id as parent_id, 1 - vector::distance::knn() as similarity
+                FROM source_insight WHERE embedding {knn} $query AND {_MODEL_FILTER})"""
+        )
+    if note:
+        selects.append(
+            f"""(SELECT id, title, content, id as parent_id,
+                1 - vector::distance::knn() as similarity
+                FROM note WHERE embedding {knn} $query AND {_MODEL_FILTER})"""
+        )
+    return selects
+
+
+async def knn_search(
+    embedding: List[float],
+    results: int,
+    source: bool = True,
+    note: bool = True,
+    minimum_score: float = 0.2,
+    model_id: Optional[str] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Search through the HNSW indexes.
+
+    Returns None when no index matches the embedding dimension or model, so the
+    caller can fall back to fn::vector_search. Result rows have the same shape.
+    """
+    state = await get_vector_index_state()
+    if not state or state["dimension"] != len(embedding):
+        return None
+    if model_id and state.get("model_id") and state["model_id"] != model_id:
+        return None
+
+    selects = _knn_selects(results, _search_ef(results), source, note)
+    if not selects:
+        return []
+    union = selects[0]
+    for select in selects[1:]:
+        union = f"array::union({union}, {select})"
+
+    return await repo_query(
+        f"""
+        SELECT id, parent_id, title, math::max(similarity) as similarity,
+            array::flatten(content) as matches
+        FROM {union}
+        WHERE id IS NOT NONE AND similarity >= $minimum_score
+        GROUP BY id, parent_id, title ORDER BY similarity DESC LIMIT $results
+        """,
+        {
+            "query": embedding,
+            "results": results,
+            "minimum_score": minimum_score,
+            "model_id": model_id,
+        },
+        record_id_paths=["id", "parent_id"],
+    )
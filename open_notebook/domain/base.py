@@ -1,18 +1,38 @@
-from datetime import datetime
-from typing import Any, ClassVar, Dict, List, Optional, Type, TypeVar, cast
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    ClassVar,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
 
 from loguru import logger
-from pydantic import BaseModel, ValidationError, field_validator, model_validator
+from pydantic import (
+    BaseModel,
+    PrivateAttr,
+    ValidationError,
+    field_validator,
+    model_validator,
+)
 
+from open_notebook.database.numpy_index import index_embeddings, remove_embeddings
 from open_notebook.database.repository import (
     ensure_record_id,
     repo_create,
     repo_delete,
     repo_query,
     repo_relate,
+    repo_transaction,
     repo_update,
     repo_upsert,
 )
+from open_notebook.database.vector_index import ensure_vector_indexes
 from open_notebook.exceptions import (
     DatabaseOperationError,
     InvalidInputError,
@@ -27,9 +47,94 @@ class ObjectModel(BaseModel):
     table_name: ClassVar[str] = ""
     created: Optional[datetime] = None
     updated: Optional[datetime] = None
+    # Large fields (embeddings, full text) left out of default projections. They
+    # are fetched with get(include=...)/get_all(include=...) or load_fields().
+    heavy_fields: ClassVar[List[str]] = []
+    _unloaded_fields: Set[str] = PrivateAttr(default_factory=set)
+    # Field values as last read from or written to the database, used by save()
+    # to send only changed fields and to skip re-embedding unchanged content.
+    # None for objects that were not loaded through get/get_all.
+    _snapshot: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    _embedded_content: Optional[str] = PrivateAttr(default=None)
+
+    @classmethod
+    def _projection(cls, include: Optional[List[str]] = None) -> Tuple[str, List[str]]:
+        """Return the SELECT field list and the heavy fields it leaves out."""
+        omitted = [f for f in cls.heavy_fields if f not in (include or [])]
+        if not omitted:
+            return "*", []
+        return f"* OMIT {', '.join(omitted)}", omitted
 
     @classmethod
-    async def get_all(cls: Type[T], order_by=None) -> List[T]:
+    def from_projection(cls: Type[T], data: Dict[str, Any], omitted: List[str]) -> T:
+        """Build an instance from a row that left out the given heavy fields."""
+        obj = cls(**data)
+        obj._unloaded_fields = {f for f in omitted if f in cls.model_fields}
+        obj._take_snapshot()
+        return obj
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # An assigned heavy field holds a real value now, so save() must send it
+        if name in self.__class__.model_fields and getattr(
+            self, "__pydantic_private__", None
+        ):
+            self._unloaded_fields.discard(name)
+        super().__setattr__(name, value)
+
+    def __getattribute__(self, name: str) -> Any:
+        # An unloaded heavy field reads as None, not as the stored value.
+        # Attribute access cannot await the database, so warn instead of loading
+        if name in type(self).heavy_fields:
+            private = object.__getattribute__(self, "__pydantic_private__")
+            if private and name in private.get("_unloaded_fields", ()):
+                logger.warning(
+                    f"{type(self).__name__}.{name} was read without being loaded; "
+                    f"fetch it with include=['{name}'] or load_fields('{name}')"
+                )
+        return super().__getattribute__(name)
+
+    def _take_snapshot(self) -> None:
+        """Record the current values as the persisted state."""
+        self._snapshot = self.model_dump()
+        if self.needs_embedding():
+            self._embedded_content = self.get_embedding_content()
+
+    def dirty_fields(self) -> Set[str]:
+        """Fields changed since the object was loaded or last saved."""
+        data = self.model_dump()
+        if self._snapshot is None:
+            return set(data)
+        return {
+            key
+            for key, value in data.items()
+            if key not in self._unloaded_fields
+            and (key not in self._snapshot or self._snapshot[key] != value)
+        }
+
+    async def load_fields(self, *fields: str) -> None:
+        """
+        Load heavy fields that were left out when this object was fetched.
+
+        Fields already loaded are not fetched again; with no arguments every
+        unloaded heavy field is loaded.
+        """
+        missing = [f for f in (fields or self.heavy_fields) if f in self._unloaded_fields]
+        if not missing or not self.id:
+            return
+        result = await repo_query(
+            f"SELECT {', '.join(missing)} FROM $id", {"id": ensure_record_id(self.id)}
+        )
+        if result:
+            for key in missing:
+                setattr(self, key, result[0].get(key))
+                if self._snapshot is not None:
+                    self._snapshot[key] = getattr(self, key)
+        self._unloaded_fields.difference_update(missing)
+
+    @classmethod
+    async def get_all(
+        cls: Type[T], order_by=None, include: Optional[List[str]] = None
+    ) -> List[T]:
         try:
             # If called from a specific subclass, use its table_name
             if cls.table_name:
@@ -40,16 +145,17 @@ class ObjectModel(BaseModel):
                 raise InvalidInputError(
                     "get_all() must be called from a specific model class"
                 )
+            fields, omitted = target_class._projection(include)
             if order_by:
-                query = f"SELECT * FROM {table_name} ORDER BY {order_by}"
+                query = f"SELECT {fields} FROM {table_name} ORDER BY {order_by}"
             else:
-                query = f"SELECT * FROM {table_name}"
+                query = f"SELECT {fields} FROM {table_name}"
 
             result = await repo_query(query)
             objects = []
             for obj in result:
                 try:
-                    objects.append(target_class(**obj))
+                    objects.append(target_class.from_projection(obj, omitted))
                 except Exception as e:
                     logger.critical(f"Error creating object: {str(e)}")
 
@@ -60,7 +166,7 @@ class ObjectModel(BaseModel):
             raise DatabaseOperationError(e)
 
     @classmethod
-    async def get(cls: Type[T], id: str) -> T:
+    async def get(cls: Type[T], id: str, include: Optional[List[str]] = None) -> T:
         if not id:
             raise InvalidInputError("ID cannot be empty")
         try:
@@ -77,9 +183,12 @@ class ObjectModel(BaseModel):
                     raise InvalidInputError(f"No class found for table {table_name}")
                 target_class = cast(Type[T], found_class)
 
-            result = await repo_query("SELECT * FROM $id", {"id": ensure_record_id(id)})
+            fields, omitted = target_class._projection(include)
+            result = await repo_query(
+                f"SELECT {fields} FROM $id", {"id": ensure_record_id(id)}
+            )
             if result:
-                return target_class(**result[0])
+                return target_class.from_projection(result[0], omitted)
             else:
                 raise NotFoundError(f"{table_name} with id {id} not found")
         except Exception as e:
@@ -109,48 +218,78 @@ class ObjectModel(BaseModel):
     def get_embedding_content(self) -> Optional[str]:
         return None
 
-    async def save(self) -> None:
+    async def save(self, relations: Optional[List[Tuple[str, str]]] = None) -> None:
+        """
+        Create or update the record.
+
+        Relationships given as (relationship, target_id) are created in the same
+        transaction as the record write.
+        """
+        from open_notebook.domain.embedding_cache import cached_embed
         from open_notebook.domain.models import model_manager
 
         try:
             self.model_validate(self.model_dump(), strict=True)
+            embedded_content = self._embedded_content
             data = self._prepare_save_data()
             data["updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
             if self.needs_embedding():
                 embedding_content = self.get_embedding_content()
-                if embedding_content:
+                content_changed = (
+                    self.id is None
+                    or self._snapshot is None
+                    or embedding_content != self._embedded_content
+                )
+                if embedding_content and content_changed:
                     EMBEDDING_MODEL = await model_manager.get_embedding_model()
                     if not EMBEDDING_MODEL:
                         logger.warning(
                             "No embedding model found. Content will not be searchable."
                         )
+                    model_id = await model_manager.get_embedding_model_id()
                     data["embedding"] = (
-                        (await EMBEDDING_MODEL.aembed([embedding_content]))[0]
+                        await cached_embed(EMBEDDING_MODEL, model_id, embedding_content)
                         if EMBEDDING_MODEL
                         else []
                     )
+                    data["embedding_model"] = model_id if data["embedding"] else None
+                    data["embedding_dimension"] = len(data["embedding"])
+                    await ensure_vector_indexes(len(data["embedding"]), model_id)
 
-            if self.id is None:
+            if relations:
+                repo_result = await self._save_with_relations(data, relations)
+            elif self.id is None:
                 data["created"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 repo_result = await repo_create(self.__class__.table_name, data)
             else:
-                data["created"] = (
-                    self.created.strftime("%Y-%m-%d %H:%M:%S")
-                    if isinstance(self.created, datetime)
-                    else self.created
-                )
+                if "created" in data:
+                    data["created"] = (
+                        self.created.strftime("%Y-%m-%d %H:%M:%S")
+                        if isinstance(self.created, datetime)
+                        else self.created
+                    )
                 logger.debug(f"Updating record with id {self.id}")
                 repo_result = await repo_update(
                     self.__class__.table_name, self.id, data
                 )
             # Update the current instance with the result
             for key, value in repo_result[0].items():
+                self._unloaded_fields.discard(key)
                 if hasattr(self, key):
                     if isinstance(getattr(self, key), BaseModel):
                         setattr(self, key, type(getattr(self, key))(**value))
                     else:
                         setattr(self, key, value)
+            self._take_snapshot()
+            if "embedding" in data and not data["embedding"]:
+                # Nothing was embedded, so the next save must try again
+                self._embedded_content = embedded_content
+
+            if data.get("embedding") and self.id:
+                await index_embeddings(
+                    [(str(self.id), data["embedding"])], data["embedding_model"]
+                )
 
         except ValidationError as e:
             logger.error(f"Validation failed: {e}")
@@ -159,8 +298,46 @@ class ObjectModel(BaseModel):
             logger.error(f"Error saving record: {e}")
             raise DatabaseOperationError(e)
 
+    async def _save_with_relations(
+        self, data: Dict[str, Any], relations: List[Tuple[str, str]]
+    ) -> List[Dict[str, Any]]:
+        data.pop("id", None)
+        now = datetime.now(timezone.utc)
+        data["updated"] = now
+        if self.id is None:
+            data["created"] = now
+            statements: List[Tuple[str, Optional[Dict[str, Any]]]] = [
+                (
+                    "LET $rid = (CREATE type::table($table) CONTENT $data)[0].id",
+                    {"table": self.__class__.table_name, "data": data},
+                )
+            ]
+        else:
+            if isinstance(self.created, datetime):
+                data["created"] = self.created
+            statements = [
+                (
+                    "LET $rid = (UPDATE $id MERGE $data)[0].id",
+                    {"id": ensure_record_id(self.id), "data": data},
+                )
+            ]
+        for relationship, target_id in relations:
+            statements.append(
+                (
+                    f"RELATE $rid->{relationship}->$target",
+                    {"target": ensure_record_id(target_id)},
+                )
+            )
+        statements.append(("SELECT * FROM $rid", None))
+        results = await repo_transaction(statements)
+        return results[-1]
+
     def _prepare_save_data(self) -> Dict[str, Any]:
         data = self.model_dump()
+        if self.id is not None and self._snapshot is not None:
+            # MERGE leaves the other fields untouched, so only send changes
+            dirty = self.dirty_fields()
+            data = {key: value for key, value in data.items() if key in dirty}
         return {key: value for key, value in data.items() if value is not None}
 
     async def delete(self) -> bool:
@@ -168,7 +345,10 @@ class ObjectModel(BaseModel):
             raise InvalidInputError("Cannot delete object without an ID")
         try:
             logger.debug(f"Deleting record with id {self.id}")
-            return await repo_delete(self.id)
+            result = await repo_delete(self.id)
+            if "embedding" in self.heavy_fields:
+                await remove_embeddings([str(self.id)])
+            return result
         except Exception as e:
             logger.error(
                 f"Error deleting {self.__class__.table_name} with id {self.id}: {str(e)}"
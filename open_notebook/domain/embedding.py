@@ -0,0 +1,157 @@
+"""
+Batched embedding with bounded concurrency and per-batch retries.
+
+Texts are sent to the provider in multi-text aembed calls of EMBEDDING_BATCH_SIZE,
+with at most EMBEDDING_CONCURRENCY calls in flight. A failing batch is retried
+with exponential backoff; batches that still fail are reported back instead of
+failing the whole run, so callers can persist everything that succeeded.
+"""
+
+import asyncio
+import os
+import random
+from itertools import islice
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from loguru import logger
+
+BatchHandler = Callable[[List[int], List[List[float]]], Awaitable[None]]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid value for {name}, using default {default}")
+        return default
+
+
+def embedding_in_background() -> bool:
+    """Whether embedding runs on the command worker (EMBEDDING_IN_BACKGROUND)."""
+    return os.getenv("EMBEDDING_IN_BACKGROUND", "true").lower() not in (
+        "false",
+        "0",
+        "no",
+    )
+
+
+def embedding_batch_size() -> int:
+    return _env_int("EMBEDDING_BATCH_SIZE", 32)
+
+
+def embedding_concurrency() -> int:
+    return _env_int("EMBEDDING_CONCURRENCY", 4)
+
+
+def embedding_max_retries() -> int:
+    return _env_int("EMBEDDING_MAX_RETRIES", 3)
+
+
+async def embed_batch_with_retry(
+    model: Any, texts: List[str], max_retries: int, backoff: float = 1.0
+) -> List[List[float]]:
+    """Embed one batch, retrying with exponential backoff and jitter."""
+    attempt = 0
+    while True:
+        try:
+            embeddings = await model.aembed(texts)
+            if len(embeddings) != len(texts):
+                raise ValueError(
+                    f"Provider returned {len(embeddings)} embeddings for {len(texts)} texts"
+                )
+            return embeddings
+        except Exception as e:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            delay = backoff * 2 ** (attempt - 1) * (1 + random.random())
+            logger.warning(
+                f"Embedding batch of {len(texts)} failed ({e}), "
+                f"retry {attempt}/{max_retries} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+async def embed_in_batches(
+    model: Any,
+    texts: Sequence[str],
+    on_batch: BatchHandler,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    max_retries: Optional[int] = None,
+) -> List[int]:
+    """
+    Embed texts in batches and hand each successful batch to on_batch.
+
+    on_batch receives the indexes of the texts in the batch and their
+    embeddings, and is called as soon as the batch is done, so results can be
+    persisted incrementally. Returns the indexes of texts that could not be
+    embedded after all retries.
+    """
+    return await embed_stream(
+        model, enumerate(texts), on_batch, batch_size, concurrency, max_retries
+    )
+
+
+async def embed_stream(
+    model: Any,
+    items: Iterable[Tuple[int, str]],
+    on_batch: BatchHandler,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    max_retries: Optional[int] = None,
+) -> List[int]:
+    """
+    Like embed_in_batches, for (key, text) pairs produced lazily.
+
+    Items are pulled only when a batch slot is free, so at most
+    concurrency * batch_size texts are held at once however long the input
+    is. on_batch receives the keys of the batch; the keys of texts that could
+    not be embedded are returned.
+    """
+    batch_size = batch_size or embedding_batch_size()
+    slots = concurrency or embedding_concurrency()
+    retries = max_retries if max_retries is not None else embedding_max_retries()
+    failed: List[int] = []
+
+    async def run(keys: List[int], texts: List[str]) -> None:
+        try:
+            embeddings = await embed_batch_with_retry(model, texts, retries)
+        except Exception as e:
+            logger.error(f"Giving up on embedding texts {keys[0]}-{keys[-1]}: {e}")
+            failed.extend(keys)
+            return
+        await on_batch(keys, embeddings)
+
+    pending: Set[asyncio.Task] = set()
+    iterator = iter(items)
+    try:
+        while True:
+            if len(pending) >= slots:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task.result()  # surface on_batch errors
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            keys = [key for key, _ in batch]
+            texts = [text for _, text in batch]
+            pending.add(asyncio.create_task(run(keys, texts)))
+        await asyncio.gather(*pending)
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        raise
+    return sorted(failed)
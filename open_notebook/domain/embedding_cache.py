@@ -0,0 +1,199 @@
+"""
+Bounded, TTL-aware cache for embeddings.
+
+Search queries are keyed by (embedding model id, normalized text) and stored
+content (notes, insights) by (embedding model id, sha256 of the text), so
+switching the default embedding model never serves stale vectors. Entries live
+in an in-process LRU shared by every request in the process, and can also be
+persisted to SQLite (EMBEDDING_CACHE_PERSIST=true) to survive restarts.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from open_notebook.config import sqlite_folder
+
+EMBEDDING_CACHE_FILE = f"{sqlite_folder}/embedding_cache.sqlite"
+
+
+def _normalize_query(text: str) -> str:
+    return " ".join(text.split())
+
+
+def query_key(model_id: str, text: str) -> str:
+    return f"query:{model_id}:{_normalize_query(text)}"
+
+
+def content_hash(text: str) -> str:
+    """Hex sha256 of the text, the same value SurrealDB's crypto::sha256 returns."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def content_key(model_id: str, text: str) -> str:
+    return f"content:{model_id}:{content_hash(text)}"
+
+
+class EmbeddingCache:
+    """
+    LRU of embeddings with a per-entry time to live.
+
+    Args:
+        max_size: Entries kept in memory; the least recently used is evicted.
+        ttl: Seconds an entry stays valid, in memory and on disk. 0 disables expiry.
+        sqlite_path: Optional SQLite file backing the in-memory entries.
+    """
+
+    def __init__(
+        self, max_size: int = 1024, ttl: float = 3600, sqlite_path: Optional[str] = None
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sqlite_path = sqlite_path
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if sqlite_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embedding_cache "
+                    "(key TEXT PRIMARY KEY, created REAL, embedding BLOB)"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        assert self.sqlite_path
+        return sqlite3.connect(self.sqlite_path, timeout=5)
+
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl) and time.time() - created > self.ttl
+
+    def _remember(self, key: str, created: float, embedding: List[float]) -> None:
+        with self._lock:
+            self._entries[key] = (created, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[Tuple[float, List[float]]]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT created, embedding FROM embedding_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read embedding cache: {e}")
+            return None
+        if not row:
+            return None
+        return row[0], array("d", row[1]).tolist()
+
+    def _store(self, key: str, created: float, embedding: List[float]) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO embedding_cache VALUES (?, ?, ?)",
+                    (key, created, array("d", embedding).tobytes()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write embedding cache: {e}")
+
+    async def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and not self._expired(entry[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+
+        if self.sqlite_path:
+            stored = await asyncio.to_thread(self._load, key)
+            if stored and not self._expired(stored[0]):
+                self._remember(key, *stored)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return stored[1]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def put(self, key: str, embedding: List[float]) -> None:
+        if not embedding:
+            return
+        created = time.time()
+        self._remember(key, created, embedding)
+        if self.sqlite_path:
+            await asyncio.to_thread(self._store, key, created, embedding)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.sqlite_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM embedding_cache")
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "persistent": bool(self.sqlite_path),
+        }
+
+
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide cache configured from EMBEDDING_CACHE_* settings."""
+    global _cache
+    if _cache is None:
+        persist = os.getenv("EMBEDDING_CACHE_PERSIST", "false").lower()
+        _cache = EmbeddingCache(
+            max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("EMBEDDING_CACHE_TTL", "86400")),
+            sqlite_path=EMBEDDING_CACHE_FILE
+            if persist in ("true", "1", "yes")
+            else None,
+        )
+    return _cache
+
+
+async def cached_embed(
+    model: Any, model_id: Optional[str], text: str, query: bool = False
+) -> List[float]:
+    """
+    Embed a single text through the cache.
+
+    Queries are keyed by their whitespace-normalized text, stored content by
+    its hash. Without a model id nothing is cached.
+    """
+    if query:
+        text = _normalize_query(text)
+    if not model_id:
+        return (await model.aembed([text]))[0]
+
+    cache = get_embedding_cache()
+    key = query_key(model_id, text) if query else content_key(model_id, text)
+    embedding = await cache.get(key)
+    if embedding is None:
+        embedding = (await model.aembed([text]))[0]
+        await cache.put(key, embedding)
+    return embedding
@@ -0,0 +1,488 @@
+"""
+Corpus-wide re-embedding after the default embedding model changes.
+
+New vectors are written next to the old ones (embedding_next), so search keeps
+using the old vectors and the old model (see ModelManager.get_embedding_model_id)
+until every row has been re-embedded. The last worker to finish then swaps the
+fields one bucket at a time and rebuilds the vector indexes, which switches
+search to the new model. Search filters on embedding_model, so rows swapped
+before the rebuild are simply left out until it completes.
+
+Every row carries an indexed reembed_bucket, the first two hex digits of
+md5(record id); shards own the buckets under their first digit and read one
+bucket per page, never the whole table. Each shard checkpoints the bucket and
+last id it processed in reembed_checkpoint, so a restarted job resumes where it
+stopped. Rows are selected by embedding_next_model != target, which also makes
+re-runs idempotent and picks up rows written mid-migration.
+
+A row that still fails after _MAX_ATTEMPTS attempts is given an empty vector
+and listed in reembed_failure, so it cannot hold up the cutover; it can be
+embedded again later through POST /api/embed.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from open_notebook.database.numpy_index import (
+    numpy_backend_enabled,
+    rebuild_numpy_index,
+)
+from open_notebook.database.repository import (
+    Statement,
+    ensure_record_id,
+    repo_batch,
+    repo_query,
+    repo_transaction,
+)
+from open_notebook.database.vector_index import (
+    get_vector_index_state,
+    rebuild_vector_indexes,
+    remove_vector_indexes,
+)
+from open_notebook.domain.embedding import embed_in_batches
+from open_notebook.domain.models import model_manager
+from open_notebook.exceptions import ExternalServiceError, InvalidInputError
+
+MIGRATION_RECORD = "open_notebook:embedding_migration"
+REEMBED_TABLES = ["source_embedding", "source_insight", "note"]
+_HEX_DIGITS = "0123456789abcdef"
+ALL_BUCKETS = [a + b for a in _HEX_DIGITS for b in _HEX_DIGITS]
+
+# Passes over a shard before giving up on rows that keep appearing
+_MAX_PASSES = 3
+# Failed embedding attempts before a row is given up on
+_MAX_ATTEMPTS = 3
+# A cutover without progress for this long was left by a stopped worker
+_CUTOVER_STALE = "10m"
+# A running migration without shard progress for this long has no live worker
+_SHARD_STALE = "10m"
+
+
+def shard_prefixes(shard: int, shards: int) -> List[str]:
+    """The md5 leading hex digits owned by a shard."""
+    if not 1 <= shards <= len(_HEX_DIGITS) or not 0 <= shard < shards:
+        raise InvalidInputError(f"Invalid shard {shard} of {shards} (max 16 shards)")
+    return [digit for i, digit in enumerate(_HEX_DIGITS) if i % shards == shard]
+
+
+def shard_buckets(shard: int, shards: int) -> List[str]:
+    """The reembed_bucket values owned by a shard, in order."""
+    prefixes = shard_prefixes(shard, shards)
+    return [bucket for bucket in ALL_BUCKETS if bucket[0] in prefixes]
+
+
+async def get_migration() -> Optional[Dict[str, Any]]:
+    result = await repo_query(
+        "SELECT * FROM ONLY $record;",
+        {"record": ensure_record_id(MIGRATION_RECORD)},
+        record_id_paths=["id"],
+    )
+    return result if isinstance(result, dict) else None
+
+
+async def start_migration(shards: int = 1) -> Dict[str, Any]:
+    """
+    Record a migration from the active to the default embedding model.
+
+    Raises InvalidInputError if there is nothing to migrate or a migration to
+    another model is still running.
+    """
+    target = await model_manager.get_default_embedding_model_id()
+    if not target:
+        raise InvalidInputError("No default embedding model configured")
+    state = await get_vector_index_state(refresh=True)
+    source_model = state.get("model_id") if state else None
+    if source_model == target:
+        raise InvalidInputError(f"Stored vectors already use {target}")
+
+    current = await get_migration()
+    if current and current.get("status") == "running":
+        if current.get("to_model") != target:
+            raise InvalidInputError(
+                f"A migration to {current.get('to_model')} is still running"
+            )
+        return current
+
+    shard_prefixes(0, shards)
+    result = await repo_query(
+        """
+        UPSERT $record CONTENT {
+            from_model: $from_model,
+            to_model: $to_model,
+            shards: $shards,
+            status: 'running',
+            started: time::now()
+        };
+        DELETE reembed_checkpoint;
+        DELETE reembed_failure;
+        UPDATE source_embedding, source_insight, note
+            SET embedding_next_failures = NONE WHERE embedding_next_failures != NONE;
+        """,
+        {
+            "record": ensure_record_id(MIGRATION_RECORD),
+            "from_model": source_model,
+            "to_model": target,
+            "shards": shards,
+        },
+        record_id_paths=["id"],
+    )
+    logger.info(f"Started re-embedding from {source_model} to {target}")
+    return result[0] if isinstance(result, list) else result
+
+
+async def remaining_rows(
+    to_model: str, buckets: Optional[List[str]] = None
+) -> Dict[str, int]:
+    """Rows per table that have no vector from the target model yet."""
+    counts = {}
+    shard_filter = "AND reembed_bucket IN $buckets" if buckets else ""
+    for table in REEMBED_TABLES:
+        result = await repo_query(
+            f"SELECT count() AS count FROM {table} "
+            f"WHERE embedding_next_model != $to_model {shard_filter} GROUP ALL;",
+            {"to_model": to_model, "buckets": buckets},
+        )
+        counts[table] = result[0]["count"] if result else 0
+    return counts
+
+
+async def get_checkpoints() -> List[Dict[str, Any]]:
+    return await repo_query("SELECT * FROM reembed_checkpoint ORDER BY id;")
+
+
+async def get_failures(limit: int = 100) -> List[Dict[str, Any]]:
+    """Rows given up on, oldest first."""
+    return await repo_query(
+        "SELECT * FROM reembed_failure ORDER BY created LIMIT $limit;",
+        {"limit": limit},
+    )
+
+
+async def _save_checkpoint(
+    table: str,
+    shard: int,
+    shards: int,
+    bucket: str,
+    last_id: Any,
+    stats: Dict[str, int],
+) -> None:
+    await repo_query(
+        """
+        UPSERT type::thing('reembed_checkpoint', [$table, $shard, $shards]) CONTENT {
+            table: $table, shard: $shard, shards: $shards, bucket: $bucket,
+            last_id: $last_id, processed: $processed, failed: $failed,
+            given_up: $given_up, updated: time::now()
+        };
+        """,
+        {
+            "table": table,
+            "shard": shard,
+            "shards": shards,
+            "bucket": bucket,
+            "last_id": last_id,
+            **stats,
+        },
+    )
+
+
+async def _load_checkpoint(table: str, shard: int, shards: int) -> Dict[str, Any]:
+    result = await repo_query(
+        "SELECT * FROM ONLY "
+        "type::thing('reembed_checkpoint', [$table, $shard, $shards]);",
+        {"table": table, "shard": shard, "shards": shards},
+        record_id_paths=[],
+    )
+    return result if isinstance(result, dict) else {}
+
+
+async def _reembed_rows(
+    table: str, model: Any, to_model: str, rows: List[Dict[str, Any]]
+) -> Dict[str, int]:
+    """Write the target model's vectors for a page of rows; returns counts."""
+    texts = [row.get("content") or "" for row in rows]
+    updates: List[Statement] = [
+        # Nothing to embed: mark as done with an empty vector
+        (
+            "UPDATE $id SET embedding_next = [], embedding_next_model = $model, "
+            "embedding_next_failures = NONE;",
+            {"id": row["id"], "model": to_model},
+        )
+        for row, text in zip(rows, texts)
+        if not text.strip()
+    ]
+    to_embed = [i for i, text in enumerate(texts) if text.strip()]
+
+    async def collect(indexes: List[int], embeddings: List[List[float]]):
+        updates.extend(
+            (
+                "UPDATE $id SET embedding_next = $embedding, "
+                "embedding_next_model = $model, embedding_next_failures = NONE;",
+                {
+                    "id": rows[to_embed[i]]["id"],
+                    "embedding": embedding,
+                    "model": to_model,
+                },
+            )
+            for i, embedding in zip(indexes, embeddings)
+        )
+
+    failed = await embed_in_batches(model, [texts[i] for i in to_embed], collect)
+    if updates:
+        await repo_batch(updates)
+    if failed and len(failed) == len(to_embed) > 1:
+        # Most likely the model is unavailable, which says nothing about the rows
+        raise ExternalServiceError(
+            f"Could not embed any of {len(failed)} {table} rows with {to_model}"
+        )
+
+    given_up = 0
+    failures: List[Statement] = []
+    for i in failed:
+        row = rows[to_embed[i]]
+        attempts = (row.get("embedding_next_failures") or 0) + 1
+        if attempts < _MAX_ATTEMPTS:
+            failures.append(
+                (
+                    "UPDATE $id SET embedding_next_failures = $attempts;",
+                    {"id": row["id"], "attempts": attempts},
+                )
+            )
+            continue
+        given_up += 1
+        failures.extend(
+            [
+                (
+                    "UPDATE $id SET embedding_next = [], "
+                    "embedding_next_model = $model, embedding_next_failures = $attempts;",
+                    {"id": row["id"], "model": to_model, "attempts": attempts},
+                ),
+                (
+                    "CREATE reembed_failure CONTENT { table: $table, record: $id, "
+                    "to_model: $model, attempts: $attempts, created: time::now() };",
+                    {
+                        "table": table,
+                        "id": row["id"],
+                        "model": to_model,
+                        "attempts": attempts,
+                    },
+                ),
+            ]
+        )
+    if failures:
+        await repo_batch(failures)
+    if given_up:
+        logger.warning(
+            f"Gave up re-embedding {given_up} {table} rows after {_MAX_ATTEMPTS} attempts"
+        )
+    return {
+        "processed": len(rows) - len(failed),
+        "failed": len(failed),
+        "given_up": given_up,
+    }
+
+
+async def _reembed_table(
+    table: str,
+    model: Any,
+    to_model: str,
+    shard: int,
+    shards: int,
+    page_size: int,
+) -> Dict[str, int]:
+    buckets = shard_buckets(shard, shards)
+    checkpoint = await _load_checkpoint(table, shard, shards)
+    resume_bucket = checkpoint.get("bucket")
+    resume_id = checkpoint.get("last_id") if resume_bucket else None
+    stats = {
+        key: checkpoint.get(key, 0) for key in ("processed", "failed", "given_up")
+    }
+
+    for _ in range(_MAX_PASSES):
+        for bucket in buckets:
+            if resume_bucket and bucket < resume_bucket:
+                continue
+            last_id = resume_id if bucket == resume_bucket else None
+            while True:
+                # Keyset pagination within one bucket; ids stay RecordIDs so
+                # they can be bound back
+                rows = await repo_query(
+                    f"SELECT id, content, embedding_next_failures FROM {table} "
+                    "WHERE reembed_bucket = $bucket "
+                    "AND embedding_next_model != $to_model "
+                    + ("AND id > $last_id " if last_id is not None else "")
+                    + "ORDER BY id LIMIT $limit;",
+                    {
+                        "bucket": bucket,
+                        "to_model": to_model,
+                        "last_id": last_id,
+                        "limit": page_size,
+                    },
+                    record_id_paths=[],
+                )
+                if not rows:
+                    break
+
+                page = await _reembed_rows(table, model, to_model, rows)
+                for key, value in page.items():
+                    stats[key] += value
+                last_id = rows[-1]["id"]
+                await _save_checkpoint(table, shard, shards, bucket, last_id, stats)
+                logger.info(
+                    f"Re-embedded {stats['processed']} {table} rows "
+                    f"(shard {shard}/{shards}, bucket {bucket})"
+                )
+                if len(rows) < page_size:
+                    break
+
+        # Rows written behind the cursor or failed in this pass need another one
+        remaining = await remaining_rows(to_model, buckets)
+        if not remaining[table]:
+            break
+        resume_bucket = resume_id = None
+
+    return stats
+
+
+async def run_shard(
+    shard: int = 0, shards: int = 1, page_size: int = 200
+) -> Dict[str, Any]:
+    """Re-embed one shard of every table, then cut over if the corpus is done."""
+    migration = await get_migration()
+    if not migration or migration.get("status") != "running":
+        raise InvalidInputError("No re-embedding migration is running")
+    to_model = migration["to_model"]
+    model = await model_manager.get_model(to_model)
+    if not model:
+        raise InvalidInputError(f"Embedding model {to_model} not found")
+
+    stats = {
+        table: await _reembed_table(table, model, to_model, shard, shards, page_size)
+        for table in REEMBED_TABLES
+    }
+    cut_over = await maybe_cut_over()
+    return {"tables": stats, "cut_over": cut_over}
+
+
+async def _target_dimension(to_model: str) -> Optional[int]:
+    """Dimension of the target model's vectors, swapped in or not."""
+    sample = await repo_query(
+        "SELECT VALUE array::len(embedding_next) "
+        "FROM source_embedding, source_insight, note "
+        "WHERE array::len(embedding_next) > 0 LIMIT 1;",
+    )
+    if not sample:
+        # A resumed cutover may already have swapped every vector
+        sample = await repo_query(
+            "SELECT VALUE embedding_dimension "
+            "FROM source_embedding, source_insight, note "
+            "WHERE embedding_model = $to_model AND embedding_dimension > 0 LIMIT 1;",
+            {"to_model": to_model},
+        )
+    dimension = sample[0] if sample else None
+    return int(dimension) if isinstance(dimension, (int, float)) else None
+
+
+async def maybe_cut_over() -> bool:
+    """
+    Swap in the new vectors once no row is left, by one worker at a time.
+
+    The swap runs one bucket per transaction and records a heartbeat, so a
+    cutover left by a stopped worker is resumed by the next call after
+    _CUTOVER_STALE. Returns True if this call completed the cutover.
+    """
+    migration = await get_migration()
+    if not migration or migration.get("status") not in ("running", "cutover"):
+        return False
+    to_model = migration["to_model"]
+    if migration["status"] == "running" and any(
+        (await remaining_rows(to_model)).values()
+    ):
+        return False
+
+    record = ensure_record_id(MIGRATION_RECORD)
+    claimed = await repo_query(
+        "UPDATE $record SET status = 'cutover', heartbeat = time::now() "
+        "WHERE status = 'running' OR "
+        f"(status = 'cutover' AND heartbeat < time::now() - {_CUTOVER_STALE});",
+        {"record": record},
+        record_id_paths=["id"],
+    )
+    if not claimed:
+        return False
+
+    dimension = await _target_dimension(to_model)
+
+    # The old indexes would reject vectors of another dimension
+    await remove_vector_indexes()
+    for table in REEMBED_TABLES:
+        for bucket in ALL_BUCKETS:
+            await repo_transaction(
+                [
+                    (
+                        f"UPDATE {table} SET embedding = embedding_next, "
+                        "embedding_model = embedding_next_model, "
+                        "embedding_dimension = array::len(embedding_next), "
+                        "embedding_next = NONE "
+                        "WHERE reembed_bucket = $bucket "
+                        "AND embedding_next_model = $to_model "
+                        "AND embedding_next != NONE;",
+                        {"bucket": bucket, "to_model": to_model},
+                    ),
+                    ("UPDATE $record SET heartbeat = time::now();", {"record": record}),
+                ]
+            )
+        logger.info(f"Swapped in {to_model} vectors of {table}")
+    if dimension:
+        await rebuild_vector_indexes(dimension, to_model)
+        if numpy_backend_enabled():
+            await rebuild_numpy_index(dimension, to_model)
+
+    await repo_query(
+        "UPDATE $record SET status = 'complete', completed = $completed;",
+        {"record": record, "completed": datetime.now(timezone.utc)},
+    )
+    logger.info(f"Re-embedding complete, search now uses {to_model}")
+    return True
+
+
+async def claim_catch_up() -> bool:
+    """
+    Whether a running migration has been left without a worker.
+
+    Rows written after the last shard finished its final pass are never picked
+    up, and a worker stopped before cutover never swaps the vectors in. Once no
+    shard has made progress for _SHARD_STALE, this claims a catch-up for the
+    caller, which should queue one reembed_corpus job: it re-embeds whatever is
+    left and cuts over. At most one claim is granted per _SHARD_STALE.
+    """
+    claimed = await repo_query(
+        "UPDATE $record SET catch_up = time::now() "
+        "WHERE status = 'running' "
+        f"AND started < time::now() - {_SHARD_STALE} "
+        f"AND (catch_up = NONE OR catch_up < time::now() - {_SHARD_STALE}) "
+        "AND count((SELECT id FROM reembed_checkpoint "
+        f"WHERE updated > time::now() - {_SHARD_STALE})) = 0;",
+        {"record": ensure_record_id(MIGRATION_RECORD)},
+        record_id_paths=["id"],
+    )
+    return bool(claimed)
+
+
+async def get_migration_status() -> Dict[str, Any]:
+    """The migration record, rows left per table, checkpoints and given-up rows."""
+    migration = await get_migration()
+    if not migration:
+        return {"migration": None, "remaining": {}, "checkpoints": [], "failures": []}
+    remaining = (
+        await remaining_rows(migration["to_model"])
+        if migration.get("status") != "complete"
+        else {table: 0 for table in REEMBED_TABLES}
+    )
+    return {
+        "migration": migration,
+        "remaining": remaining,
+        "checkpoints": await get_checkpoints(),
+        "failures": await get_failures(),
+    }
@@ -7,6 +7,7 @@ from esperanto import (
     SpeechToTextModel,
     TextToSpeechModel,
 )
+from loguru import logger
 
 from open_notebook.database.repository import repo_query
 from open_notebook.domain.base import ObjectModel, RecordModel
@@ -53,6 +54,7 @@ class ModelManager:
             self._initialized = True
             self._model_cache: Dict[str, ModelType] = {}
             self._default_models = None
+            self._warned_model_mismatch: Optional[str] = None
 
     async def get_model(self, model_id: str, **kwargs) -> Optional[ModelType]:
         if not model_id:
@@ -152,9 +154,8 @@ class ModelManager:
         return model
 
     async def get_embedding_model(self, **kwargs) -> Optional[EmbeddingModel]:
-        """Get the default embedding model"""
-        defaults = await self.get_defaults()
-        model_id = defaults.default_embedding_model
+        """Get the embedding model that stored vectors belong to (see below)"""
+        model_id = await self.get_embedding_model_id()
         if not model_id:
             return None
         model = await self.get_model(model_id, **kwargs)
@@ -163,6 +164,38 @@ class ModelManager:
         )
         return model
 
+    async def get_embedding_model_id(self) -> Optional[str]:
+        """
+        Get the id of the active embedding model.
+
+        This is the model recorded with the vector indexes, i.e. the one existing
+        vectors were made with, so queries and new writes stay in the same space
+        after the default changes. It becomes the default once the corpus has been
+        re-embedded (see embedding_migration). Without stored vectors it is the
+        default embedding model.
+        """
+        from open_notebook.database.vector_index import get_vector_index_state
+
+        defaults = await self.get_defaults()
+        default_id = defaults.default_embedding_model
+        state = await get_vector_index_state()
+        active_id = state.get("model_id") if state else None
+        if not active_id or active_id == default_id:
+            return default_id
+        if self._warned_model_mismatch != default_id:
+            self._warned_model_mismatch = default_id
+            logger.warning(
+                f"Default embedding model {default_id} differs from {active_id}, which "
+                "existing vectors were made with. Search keeps using the latter "
+                "until the corpus is re-embedded (POST /api/embed/reembed)."
+            )
+        return active_id
+
+    async def get_default_embedding_model_id(self) -> Optional[str]:
+        """Get the id of the configured default embedding model"""
+        defaults = await self.get_defaults()
+        return defaults.default_embedding_model
+
     async def get_default_model(self, model_type: str, **kwargs) -> Optional[ModelType]:
         """
         Get the default model for a specific type.
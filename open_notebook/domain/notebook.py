@@ -1,15 +1,32 @@
 import asyncio
+import os
+import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any, ClassVar, Dict, List, Literal, Optional, Tuple
+from typing import Any, ClassVar, Dict, List, Literal, Optional, Tuple, Union
 
 from loguru import logger
 from pydantic import BaseModel, Field, field_validator
 
-from open_notebook.database.repository import ensure_record_id, repo_query
+from open_notebook.database.numpy_index import (
+    index_embeddings,
+    numpy_backend_enabled,
+    numpy_search,
+    remove_embeddings,
+)
+from open_notebook.database.repository import (
+    Statement,
+    ensure_record_id,
+    repo_batch,
+    repo_batch_insert,
+    repo_query,
+)
+from open_notebook.database.vector_index import ensure_vector_indexes, knn_search
 from open_notebook.domain.base import ObjectModel
+from open_notebook.domain.embedding import embed_stream
+from open_notebook.domain.embedding_cache import cached_embed
 from open_notebook.domain.models import model_manager
 from open_notebook.exceptions import DatabaseOperationError, InvalidInputError
-from open_notebook.utils import split_text
+from open_notebook.processing import iter_chunk_spans, log_stage
 
 
 class Notebook(ObjectModel):
@@ -36,7 +53,11 @@ class Notebook(ObjectModel):
             """,
                 {"id": ensure_record_id(self.id)},
             )
-            return [Source(**src["source"]) for src in srcs] if srcs else []
+            return (
+                [Source.from_projection(src["source"], ["full_text"]) for src in srcs]
+                if srcs
+                else []
+            )
         except Exception as e:
             logger.error(f"Error fetching sources for notebook {self.id}: {str(e)}")
             logger.exception(e)
@@ -46,14 +67,18 @@ class Notebook(ObjectModel):
         try:
             srcs = await repo_query(
                 """
-            select * omit note.content, note.embedding from (
+            select * omit note.embedding from (
                 select in as note from artifact where out=$id
                 fetch note
             ) order by note.updated desc
             """,
                 {"id": ensure_record_id(self.id)},
             )
-            return [Note(**src["note"]) for src in srcs] if srcs else []
+            return (
+                [Note.from_projection(src["note"], ["embedding"]) for src in srcs]
+                if srcs
+                else []
+            )
         except Exception as e:
             logger.error(f"Error fetching notes for notebook {self.id}: {str(e)}")
             logger.exception(e)
@@ -92,17 +117,20 @@ class Asset(BaseModel):
 
 class SourceEmbedding(ObjectModel):
     table_name: ClassVar[str] = "source_embedding"
+    heavy_fields: ClassVar[List[str]] = ["embedding"]
     content: str
 
     async def get_source(self) -> "Source":
         try:
             src = await repo_query(
                 """
-            select source.* from $id fetch source
+            select * omit source.full_text from (
+                select source from $id fetch source
+            )
             """,
                 {"id": ensure_record_id(self.id)},
             )
-            return Source(**src[0]["source"])
+            return Source.from_projection(src[0]["source"], ["full_text"])
         except Exception as e:
             logger.error(f"Error fetching source for embedding {self.id}: {str(e)}")
             logger.exception(e)
@@ -111,6 +139,7 @@ class SourceEmbedding(ObjectModel):
 
 class SourceInsight(ObjectModel):
     table_name: ClassVar[str] = "source_insight"
+    heavy_fields: ClassVar[List[str]] = ["embedding"]
     insight_type: str
     content: str
 
@@ -118,11 +147,13 @@ class SourceInsight(ObjectModel):
         try:
             src = await repo_query(
                 """
-            select source.* from $id fetch source
+            select * omit source.full_text from (
+                select source from $id fetch source
+            )
             """,
                 {"id": ensure_record_id(self.id)},
             )
-            return Source(**src[0]["source"])
+            return Source.from_projection(src[0]["source"], ["full_text"])
         except Exception as e:
             logger.error(f"Error fetching source for insight {self.id}: {str(e)}")
             logger.exception(e)
@@ -134,18 +165,18 @@ class SourceInsight(ObjectModel):
             title=f"{self.insight_type} from source {source.title}",
             content=self.content,
         )
-        await note.save()
-        if notebook_id:
-            await note.add_to_notebook(notebook_id)
+        await note.save(relations=[("artifact", notebook_id)] if notebook_id else None)
         return note
 
 
 class Source(ObjectModel):
     table_name: ClassVar[str] = "source"
+    heavy_fields: ClassVar[List[str]] = ["full_text"]
     asset: Optional[Asset] = None
     title: Optional[str] = None
     topics: Optional[List[str]] = Field(default_factory=list)
     full_text: Optional[str] = None
+    fingerprint: Optional[str] = None
 
     async def get_context(
         self, context_size: Literal["short", "long"] = "short"
@@ -153,6 +184,7 @@ class Source(ObjectModel):
         insights_list = await self.get_insights()
         insights = [insight.model_dump() for insight in insights_list]
         if context_size == "long":
+            await self.load_fields("full_text")
             return dict(
                 id=self.id,
                 title=self.title,
@@ -182,11 +214,14 @@ class Source(ObjectModel):
         try:
             result = await repo_query(
                 """
-                SELECT * FROM source_insight WHERE source=$id
+                SELECT * OMIT embedding FROM source_insight WHERE source=$id
                 """,
                 {"id": ensure_record_id(self.id)},
             )
-            return [SourceInsight(**insight) for insight in result]
+            return [
+                SourceInsight.from_projection(insight, ["embedding"])
+                for insight in result
+            ]
         except Exception as e:
             logger.error(f"Error fetching insights for source {self.id}: {str(e)}")
             logger.exception(e)
@@ -197,64 +232,123 @@ class Source(ObjectModel):
             raise InvalidInputError("Notebook ID must be provided")
         return await self.relate("reference", notebook_id)
 
+    async def delete(self) -> bool:
+        # The source_delete event removes chunks and insights with the source;
+        # their ids are read first so they also leave the in-process index
+        indexed: List[str] = []
+        if self.id and numpy_backend_enabled():
+            for table in ("source_embedding", "source_insight"):
+                rows = await repo_query(
+                    f"SELECT VALUE id FROM {table} WHERE source = $id;",
+                    {"id": ensure_record_id(self.id)},
+                )
+                indexed.extend(str(rid) for rid in rows)
+        result = await super().delete()
+        await remove_embeddings(indexed)
+        return result
+
     async def vectorize(self) -> None:
+        """
+        Chunk and embed the source, skipping chunks already embedded.
+
+        The whole full_text is held in memory while the source is chunked and
+        embedded; it is not streamed from the database. Only chunk offsets and
+        hashes are kept next to it, not a second copy of the text.
+        """
         logger.info(f"Starting vectorization for source {self.id}")
         EMBEDDING_MODEL = await model_manager.get_embedding_model()
 
         try:
+            await self.load_fields("full_text")
             if not self.full_text:
                 logger.warning(f"No text to vectorize for source {self.id}")
                 return
 
-            chunks = split_text(
-                self.full_text,
-            )
-            chunk_count = len(chunks)
+            # Chunks are produced lazily and only their offsets and hashes are
+            # kept; the text of a chunk is sliced again when it is embedded, so
+            # memory does not grow with a second copy of the document
+            text = self.full_text
+            spans: List[Tuple[int, int]] = []
+            hashes: List[str] = []
+            with log_stage("chunk", self.id):
+                async for start, end, chunk_hash in iter_chunk_spans(text):
+                    spans.append((start, end))
+                    hashes.append(chunk_hash)
+            chunk_count = len(spans)
             logger.info(f"Split into {chunk_count} chunks for source {self.id}")
 
             if chunk_count == 0:
                 logger.warning("No chunks created after splitting")
                 return
 
-            # Process chunks concurrently using async gather
-            logger.info("Starting concurrent processing of chunks")
-
-            async def process_chunk(
-                idx: int, chunk: str
-            ) -> Tuple[int, List[float], str]:
-                logger.debug(f"Processing chunk {idx}/{chunk_count}")
-                try:
-                    embedding = (await EMBEDDING_MODEL.aembed([chunk]))[0]
-                    cleaned_content = chunk
-                    logger.debug(f"Successfully processed chunk {idx}")
-                    return (idx, embedding, cleaned_content)
-                except Exception as e:
-                    logger.error(f"Error processing chunk {idx}: {str(e)}")
-                    raise
-
-            # Create tasks for all chunks and process them concurrently
-            tasks = [process_chunk(idx, chunk) for idx, chunk in enumerate(chunks)]
-            results = await asyncio.gather(*tasks)
-
-            logger.info(f"Parallel processing complete. Got {len(results)} results")
-
-            # Insert results in order (they're already ordered by index)
-            for idx, embedding, content in results:
-                logger.debug(f"Inserting chunk {idx} into database")
+            def chunk_text(idx: int) -> str:
+                return text[spans[idx][0] : spans[idx][1]]
+
+            model_id = await model_manager.get_embedding_model_id()
+            source_id = ensure_record_id(self.id)
+            with log_stage("sync chunks", self.id):
+                to_embed = await self._sync_existing_chunks(hashes, model_id)
+            logger.info(
+                f"{len(to_embed)} of {chunk_count} chunks of source {self.id} need embedding"
+            )
+            await self._set_embedding_progress(
+                {
+                    "embedded": 0,
+                    "total": len(to_embed),
+                    "failed": 0,
+                    "status": "running",
+                }
+            )
+
+            async def persist_batch(
+                indexes: List[int], embeddings: List[List[float]]
+            ) -> None:
+                # Each batch is stored as soon as it is embedded, so a failure
+                # later on does not lose the work already paid for
+                await ensure_vector_indexes(len(embeddings[0]), model_id)
+                inserted = await repo_batch_insert(
+                    "source_embedding",
+                    [
+                        {
+                            "source": source_id,
+                            "order": i,
+                            "content": chunk_text(i),
+                            "content_hash": hashes[i],
+                            "embedding_model": model_id,
+                            "embedding_dimension": len(embedding),
+                            "embedding": embedding,
+                        }
+                        for i, embedding in zip(indexes, embeddings)
+                    ],
+                )
+                await index_embeddings(
+                    [(row["id"], row["embedding"]) for row in inserted], model_id
+                )
                 await repo_query(
-                    """
-                    CREATE source_embedding CONTENT {
-                            "source": $source_id,
-                            "order": $order,
-                            "content": $content,
-                            "embedding": $embedding,
-                    };""",
-                    {
-                        "source_id": ensure_record_id(self.id),
-                        "order": idx,
-                        "content": content,
-                        "embedding": embedding,
-                    },
+                    "UPDATE $id SET embedding_progress.embedded += $count;",
+                    {"id": source_id, "count": len(indexes)},
+                )
+                logger.debug(f"Embedded {len(indexes)} chunks of source {self.id}")
+
+            with log_stage(f"embed {len(to_embed)} chunks", self.id):
+                failed = await embed_stream(
+                    EMBEDDING_MODEL,
+                    ((idx, chunk_text(idx)) for idx in to_embed),
+                    persist_batch,
+                )
+
+            await repo_query(
+                "UPDATE $id SET embedding_progress.failed = $failed, "
+                "embedding_progress.status = $status;",
+                {
+                    "id": source_id,
+                    "failed": len(failed),
+                    "status": "partial" if failed else "complete",
+                },
+            )
+            if failed:
+                raise DatabaseOperationError(
+                    f"{len(failed)} of {len(to_embed)} chunks could not be embedded"
                 )
 
             logger.info(f"Vectorization complete for source {self.id}")
@@ -262,8 +356,148 @@ class Source(ObjectModel):
         except Exception as e:
             logger.error(f"Error vectorizing source {self.id}: {str(e)}")
             logger.exception(e)
+            try:
+                await repo_query(
+                    "UPDATE $id SET embedding_progress.status = 'failed' "
+                    "WHERE embedding_progress.status = 'running';",
+                    {"id": ensure_record_id(self.id)},
+                )
+            except Exception:
+                pass
             raise DatabaseOperationError(e)
 
+    async def _sync_existing_chunks(
+        self, hashes: List[str], model_id: Optional[str]
+    ) -> List[int]:
+        """
+        Reconcile stored chunks with a fresh split of the text.
+
+        Rows whose content hash is still present and that were embedded by the
+        current model are kept (their order is updated if it moved). Every
+        other row is deleted. Returns the positions of chunks that still need
+        embedding.
+        """
+        source_id = ensure_record_id(self.id)
+        # Rows written before hashes were stored get them computed on the fly
+        existing = await repo_query(
+            """
+            SELECT id, `order`, embedding_model,
+                (content_hash OR crypto::sha256(content)) AS content_hash
+            FROM source_embedding WHERE source = $id
+            """,
+            {"id": source_id},
+            record_id_paths=[],
+        )
+
+        available: Dict[str, List[Dict[str, Any]]] = {}
+        stale: List[Any] = []
+        for row in existing:
+            if model_id and row.get("embedding_model") == model_id:
+                available.setdefault(row["content_hash"], []).append(row)
+            else:
+                stale.append(row["id"])
+
+        to_embed: List[int] = []
+        reorder: List[Statement] = []
+        for idx, chunk_hash in enumerate(hashes):
+            matches = available.get(chunk_hash)
+            if not matches:
+                to_embed.append(idx)
+                continue
+            row = matches.pop()
+            if row.get("order") != idx:
+                reorder.append(
+                    ("UPDATE $id SET `order` = $order;", {"id": row["id"], "order": idx})
+                )
+        stale.extend(row["id"] for rows in available.values() for row in rows)
+
+        if stale:
+            await repo_query("DELETE $ids;", {"ids": stale})
+            await remove_embeddings([str(rid) for rid in stale])
+        if reorder:
+            await repo_batch(reorder)
+        logger.debug(
+            f"Source {self.id}: kept {len(hashes) - len(to_embed)} chunks, "
+            f"removed {len(stale)}, reordered {len(reorder)}"
+        )
+        return to_embed
+
+    async def _set_embedding_progress(self, progress: Dict[str, Any]) -> None:
+        await repo_query(
+            "UPDATE $id SET embedding_progress = $progress;",
+            {"id": ensure_record_id(self.id), "progress": progress},
+        )
+
+    async def set_processing_status(
+        self,
+        status: str,
+        stage: Optional[str] = None,
+        error: Optional[str] = None,
+        source_id: Optional[str] = None,
+    ) -> None:
+        """
+        Record where background processing of this source is.
+
+        source_id is set when the status is "reused": the existing source that
+        has the same content and was used instead of this one.
+        """
+        processing: Dict[str, Any] = {"status": status, "stage": stage, "error": error}
+        if source_id:
+            processing["source_id"] = source_id
+        await repo_query(
+            "UPDATE $id SET processing = $processing;",
+            {"id": ensure_record_id(self.id), "processing": processing},
+        )
+
+    async def get_processing_status(self) -> Optional[Dict[str, Any]]:
+        """Status and stage of background processing, if the source had any."""
+        result = await repo_query(
+            "SELECT VALUE processing FROM ONLY $id;",
+            {"id": ensure_record_id(self.id)},
+        )
+        return result if isinstance(result, dict) else None
+
+    async def record_transformation_failure(
+        self, transformation_id: str, name: str, error: str
+    ) -> None:
+        """Remember a transformation that failed so it can be retried alone."""
+        await repo_query(
+            "UPSERT type::thing('transformation_failure', [$source, $transformation]) "
+            "CONTENT { source: $source, transformation: $transformation, "
+            "name: $name, error: $error, failed_at: time::now() };",
+            {
+                "source": ensure_record_id(self.id),
+                "transformation": ensure_record_id(transformation_id),
+                "name": name,
+                "error": error,
+            },
+        )
+
+    async def clear_transformation_failure(self, transformation_id: str) -> None:
+        await repo_query(
+            "DELETE type::thing('transformation_failure', [$source, $transformation]);",
+            {
+                "source": ensure_record_id(self.id),
+                "transformation": ensure_record_id(transformation_id),
+            },
+        )
+
+    async def get_transformation_failures(self) -> List[Dict[str, Any]]:
+        """Transformations whose last run on this source failed."""
+        return await repo_query(
+            "SELECT transformation, name, error, failed_at "
+            "FROM transformation_failure WHERE source = $source ORDER BY failed_at;",
+            {"source": ensure_record_id(self.id)},
+        )
+
+    async def get_embedding_progress(self) -> Optional[Dict[str, Any]]:
+        """Chunks embedded / total for the latest vectorize run, if any."""
+        result = await repo_query(
+            "SELECT VALUE embedding_progress FROM ONLY $id;",
+            {"id": ensure_record_id(self.id)},
+        )
+        return result if isinstance(result, dict) else None
+
     async def add_insight(self, insight_type: str, content: str) -> Any:
         EMBEDDING_MODEL = await model_manager.get_embedding_model()
         if not EMBEDDING_MODEL:
@@ -272,24 +506,35 @@ class Source(ObjectModel):
         if not insight_type or not content:
             raise InvalidInputError("Insight type and content must be provided")
         try:
+            model_id = await model_manager.get_embedding_model_id()
             embedding = (
-                (await EMBEDDING_MODEL.aembed([content]))[0] if EMBEDDING_MODEL else []
+                await cached_embed(EMBEDDING_MODEL, model_id, content)
+                if EMBEDDING_MODEL
+                else []
             )
-            return await repo_query(
+            await ensure_vector_indexes(len(embedding), model_id)
+            result = await repo_query(
                 """
                 CREATE source_insight CONTENT {
                         "source": $source_id,
                         "insight_type": $insight_type,
                         "content": $content,
                         "embedding": $embedding,
+                        "embedding_model": $embedding_model,
+                        "embedding_dimension": $embedding_dimension,
                 };""",
                 {
                     "source_id": ensure_record_id(self.id),
                     "insight_type": insight_type,
                     "content": content,
                     "embedding": embedding,
+                    "embedding_model": model_id if embedding else None,
+                    "embedding_dimension": len(embedding),
                 },
             )
+            if result:
+                await index_embeddings([(result[0]["id"], embedding)], model_id)
+            return result
         except Exception as e:
             logger.error(f"Error adding insight to source {self.id}: {str(e)}")
             raise  # DatabaseOperationError(e)
@@ -297,6 +542,7 @@ class Source(ObjectModel):
 
 class Note(ObjectModel):
     table_name: ClassVar[str] = "note"
+    heavy_fields: ClassVar[List[str]] = ["embedding"]
     title: Optional[str] = None
     note_type: Optional[Literal["human", "ai"]] = None
     content: Optional[str] = None
@@ -331,6 +577,30 @@ class Note(ObjectModel):
     def get_embedding_content(self) -> Optional[str]:
         return self.content
 
+    async def vectorize(self) -> None:
+        """(Re-)embed the note content without rewriting the rest of the note."""
+        content = self.get_embedding_content()
+        if not content:
+            logger.warning(f"No content to embed for note {self.id}")
+            return
+        EMBEDDING_MODEL = await model_manager.get_embedding_model()
+        if not EMBEDDING_MODEL:
+            raise InvalidInputError("No embedding model configured")
+        model_id = await model_manager.get_embedding_model_id()
+        embedding = await cached_embed(EMBEDDING_MODEL, model_id, content)
+        await ensure_vector_indexes(len(embedding), model_id)
+        await repo_query(
+            "UPDATE $id SET embedding = $embedding, embedding_model = $model_id, "
+            "embedding_dimension = $dimension;",
+            {
+                "id": ensure_record_id(self.id),
+                "embedding": embedding,
+                "model_id": model_id,
+                "dimension": len(embedding),
+            },
+        )
+        await index_embeddings([(str(self.id), embedding)], model_id)
+
 
 class ChatSession(ObjectModel):
     table_name: ClassVar[str] = "chat_session"
@@ -342,20 +612,68 @@ class ChatSession(ObjectModel):
         return await self.relate("refers_to", notebook_id)
 
 
+NotebookScope = Optional[Union[str, List[str]]]
+
+
+async def resolve_notebook_scope(
+    notebook_ids: Union[str, List[str]], source: bool = True, note: bool = True
+) -> Tuple[List[Any], List[Any]]:
+    """Return the (source ids, note ids) that belong to the given notebooks."""
+    if isinstance(notebook_ids, str):
+        notebook_ids = [notebook_ids]
+    if not notebook_ids:
+        raise InvalidInputError("At least one notebook ID must be provided")
+    # No record_id_paths: ids stay RecordIDs so they bind back into the search
+    result = await repo_query(
+        "RETURN fn::notebook_scope($notebook_ids);",
+        {"notebook_ids": [ensure_record_id(nb) for nb in notebook_ids]},
+        record_id_paths=[],
+    )
+    scope: Dict[str, Any] = result[0] if isinstance(result, list) else result
+    return (
+        scope.get("sources", []) if source else [],
+        scope.get("notes", []) if note else [],
+    )
+
+
 async def text_search(
-    keyword: str, results: int, source: bool = True, note: bool = True
+    keyword: str,
+    results: int,
+    source: bool = True,
+    note: bool = True,
+    notebook_ids: NotebookScope = None,
 ):
     if not keyword:
         raise InvalidInputError("Search keyword cannot be empty")
     try:
+        if notebook_ids:
+            source_ids, note_ids = await resolve_notebook_scope(
+                notebook_ids, source, note
+            )
+            return await repo_query(
+                """
+                select *
+                from fn::scoped_text_search($keyword, $results, $source_ids, $note_ids)
+                """,
+                {
+                    "keyword": keyword,
+                    "results": results,
+                    "source_ids": source_ids,
+                    "note_ids": note_ids,
+                },
+                record_id_paths=["id", "parent_id"],
+            )
         results = await repo_query(
             """
             select *
             from fn::text_search($keyword, $results, $source, $note)
             """,
             {"keyword": keyword, "results": results, "source": source, "note": note},
+            record_id_paths=["id", "parent_id"],
         )
         return results
+    except InvalidInputError:
+        raise
     except Exception as e:
         logger.error(f"Error performing text search: {str(e)}")
         logger.exception(e)
@@ -368,15 +686,65 @@ async def vector_search(
     source: bool = True,
     note: bool = True,
     minimum_score=0.2,
+    notebook_ids: NotebookScope = None,
 ):
     if not keyword:
         raise InvalidInputError("Search keyword cannot be empty")
     try:
         EMBEDDING_MODEL = await model_manager.get_embedding_model()
-        embed = (await EMBEDDING_MODEL.aembed([keyword]))[0]
+        model_id = await model_manager.get_embedding_model_id()
+        embed = await cached_embed(EMBEDDING_MODEL, model_id, keyword, query=True)
+        if notebook_ids:
+            # Scoped searches scan only the notebook's rows, which beats a
+            # corpus-wide ANN index that would have to be post-filtered
+            source_ids, note_ids = await resolve_notebook_scope(
+                notebook_ids, source, note
+            )
+            return await repo_query(
+                """
+                SELECT * FROM fn::scoped_vector_search(
+                    $embed, $results, $source_ids, $note_ids, $minimum_score, $model_id
+                );
+                """,
+                {
+                    "embed": embed,
+                    "results": results,
+                    "source_ids": source_ids,
+                    "note_ids": note_ids,
+                    "minimum_score": minimum_score,
+                    "model_id": model_id,
+                },
+                record_id_paths=["id", "parent_id"],
+            )
+        indexed_results = None
+        if numpy_backend_enabled():
+            try:
+                indexed_results = await numpy_search(
+                    embed,
+                    results,
+                    source=source,
+                    note=note,
+                    minimum_score=minimum_score,
+                    model_id=model_id,
+                )
+            except Exception as e:
+                logger.warning(f"In-process vector search failed, falling back: {e}")
+        if indexed_results is None:
+            indexed_results = await knn_search(
+                embed,
+                results,
+                source=source,
+                note=note,
+                minimum_score=minimum_score,
+                model_id=model_id,
+            )
+        if indexed_results is not None:
+            return indexed_results
         results = await repo_query(
             """
-            SELECT * FROM fn::vector_search($embed, $results, $source, $note, $minimum_score);
+            SELECT * FROM fn::vector_search(
+                $embed, $results, $source, $note, $minimum_score, $model_id
+            );
             """,
             {
                 "embed": embed,
@@ -384,10 +752,97 @@ async def vector_search(
                 "source": source,
                 "note": note,
                 "minimum_score": minimum_score,
+                "model_id": model_id,
             },
+            record_id_paths=["id", "parent_id"],
         )
         return results
+    except InvalidInputError:
+        raise
     except Exception as e:
         logger.error(f"Error performing vector search: {str(e)}")
         logger.exception(e)
         raise DatabaseOperationError(e)
+
+
+def reciprocal_rank_fusion(
+    legs: Dict[str, List[Dict[str, Any]]], score_keys: Dict[str, str], k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists into one list keyed on parent_id.
+
+    Each parent scores sum(1 / (k + rank)) over the lists it appears in, where
+    rank is its best (1-based) position in that list. The best row per list is
+    kept as the per-signal score and rank.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for leg, rows in legs.items():
+        rank = 0
+        for row in rows:
+            parent_id = row.get("parent_id") or row.get("id")
+            if not parent_id:
+                continue
+            item = fused.setdefault(
+                parent_id,
+                {
+                    "id": parent_id,
+                    "parent_id": parent_id,
+                    "title": row.get("title"),
+                    "score": 0.0,
+                    "matches": [],
+                },
+            )
+            matches = row.get("matches") or [row.get("content")]
+            item["matches"].extend(m for m in matches if m and m not in item["matches"])
+            if f"{leg}_rank" in item:
+                continue
+            rank += 1
+            item[f"{leg}_rank"] = rank
+            item[f"{leg}_score"] = row.get(score_keys[leg])
+            item["score"] += 1 / (k + rank)
+
+    return sorted(fused.values(), key=lambda item: item["score"], reverse=True)
+
+
+async def hybrid_search(
+    keyword: str,
+    results: int,
+    source: bool = True,
+    note: bool = True,
+    minimum_score=0.2,
+    notebook_ids: NotebookScope = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """
+    Run text and vector search concurrently and fuse them by reciprocal rank.
+
+    Returns the fused results and the wall time of each leg in milliseconds.
+    """
+    if not keyword:
+        raise InvalidInputError("Search keyword cannot be empty")
+
+    timings: Dict[str, float] = {}
+
+    async def timed(leg: str, search) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            return await search or []
+        finally:
+            timings[leg] = round((time.perf_counter() - start) * 1000, 2)
+
+    start = time.perf_counter()
+    text_results, vector_results = await asyncio.gather(
+        timed("text", text_search(keyword, results, source, note, notebook_ids)),
+        timed(
+            "vector",
+            vector_search(
+                keyword, results, source, note, minimum_score, notebook_ids
+            ),
+        ),
+    )
+    fused = reciprocal_rank_fusion(
+        {"text": text_results, "vector": vector_results},
+        {"text": "relevance", "vector": "similarity"},
+        k=int(os.getenv("HYBRID_SEARCH_RRF_K", "60")),
+    )
+    timings["total"] = round((time.perf_counter() - start) * 1000, 2)
+    return fused[:results], timings
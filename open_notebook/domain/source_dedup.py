@@ -0,0 +1,238 @@
+"""
+Detect and merge sources with the same content.
+
+A source's fingerprint is the sha256 of its text after Unicode (NFKC) and
+whitespace normalization, so the same paper extracted twice, or uploaded once
+and fetched once by URL, gets the same value. save_source reuses a source with
+a matching fingerprint (SOURCE_DEDUP, on by default) and only adds the new
+notebook reference; merge_duplicate_sources cleans up duplicates created before
+fingerprints existed or by concurrent ingestion, and the placeholders of
+asynchronously processed sources that turned out to be duplicates.
+"""
+
+import hashlib
+import os
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from open_notebook.database.numpy_index import remove_embeddings
+from open_notebook.database.repository import (
+    Statement,
+    ensure_record_id,
+    repo_query,
+    repo_transaction,
+)
+from open_notebook.domain.notebook import Source
+
+
+def dedup_enabled() -> bool:
+    return os.getenv("SOURCE_DEDUP", "true").lower() not in ("false", "0", "no")
+
+
+def source_fingerprint(text: Optional[str]) -> Optional[str]:
+    """Hex sha256 of the normalized text, or None for empty text."""
+    if not text:
+        return None
+    normalized = " ".join(unicodedata.normalize("NFKC", text).split())
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+async def find_source_by_fingerprint(fingerprint: str) -> Optional[Source]:
+    """The oldest source with this fingerprint, without its full text."""
+    result = await repo_query(
+        "SELECT * OMIT full_text FROM source WHERE fingerprint = $fingerprint "
+        "ORDER BY created LIMIT 1;",
+        {"fingerprint": fingerprint},
+    )
+    if not result:
+        return None
+    return Source.from_projection(result[0], ["full_text"])
+
+
+async def add_reference(source_id: Any, notebook_id: str) -> bool:
+    """Relate a source to a notebook unless it already is; True if related now."""
+    existing = await repo_query(
+        "SELECT VALUE id FROM reference WHERE in = $source AND out = $notebook;",
+        {
+            "source": ensure_record_id(source_id),
+            "notebook": ensure_record_id(notebook_id),
+        },
+    )
+    if existing:
+        return False
+    await repo_query(
+        "RELATE $source->reference->$notebook;",
+        {
+            "source": ensure_record_id(source_id),
+            "notebook": ensure_record_id(notebook_id),
+        },
+    )
+    return True
+
+
+async def redirect_source(source_id: Any, existing_id: Any) -> None:
+    """
+    Turn a source created ahead of processing into a pointer to its duplicate.
+
+    It is taken out of its notebooks and its processing status becomes
+    "reused" with the existing source's id; delete_redirected_sources removes
+    it later.
+    """
+    await repo_query(
+        "DELETE reference WHERE in = $source;",
+        {"source": ensure_record_id(source_id)},
+    )
+    await Source(id=str(source_id)).set_processing_status(
+        "reused", source_id=str(existing_id)
+    )
+
+
+async def delete_redirected_sources() -> int:
+    """Delete the pointers left by redirect_source; returns how many."""
+    deleted = await repo_query(
+        "DELETE source WHERE processing.status = 'reused' RETURN BEFORE;"
+    )
+    return len(deleted or [])
+
+
+async def backfill_fingerprints(batch_size: int = 100) -> int:
+    """Compute the fingerprint of sources saved without one."""
+    updated = 0
+    last_id = None
+    while True:
+        rows = await repo_query(
+            "SELECT id, full_text FROM source WHERE fingerprint IS NONE "
+            + ("AND id > $last_id " if last_id is not None else "")
+            + "ORDER BY id LIMIT $limit;",
+            {"last_id": last_id, "limit": batch_size},
+            record_id_paths=[],
+        )
+        if not rows:
+            return updated
+        statements: List[Statement] = [
+            (
+                "UPDATE $id SET fingerprint = $fingerprint;",
+                {"id": row["id"], "fingerprint": source_fingerprint(row["full_text"])},
+            )
+            for row in rows
+            if row.get("full_text")
+        ]
+        if statements:
+            await repo_transaction(statements)
+            updated += len(statements)
+        last_id = rows[-1]["id"]
+        logger.info(f"Fingerprinted {updated} sources")
+
+
+async def find_duplicate_groups() -> List[List[Any]]:
+    """Ids of sources sharing a fingerprint, oldest first, one list per group."""
+    rows = await repo_query(
+        "SELECT id, fingerprint FROM source WHERE fingerprint IS NOT NONE "
+        "ORDER BY created;",
+        record_id_paths=[],
+    )
+    groups: Dict[str, List[Any]] = {}
+    for row in rows:
+        groups.setdefault(row["fingerprint"], []).append(row["id"])
+    return [ids for ids in groups.values() if len(ids) > 1]
+
+
+async def merge_sources(keep_id: Any, duplicate_ids: List[Any]) -> Dict[str, int]:
+    """
+    Fold duplicates into one source and delete them.
+
+    The kept source gains the duplicates' notebook references and any insight
+    type it lacks, and their chunks if it has none of its own. Everything else
+    is removed with the duplicate.
+    """
+    keep = ensure_record_id(keep_id)
+    stats = {"references": 0, "insights": 0, "chunks": 0, "deleted": 0}
+    notebooks = set(
+        str(nb)
+        for nb in await repo_query(
+            "SELECT VALUE out FROM reference WHERE in = $keep;",
+            {"keep": keep},
+            record_id_paths=[],
+        )
+    )
+    insight_types = set(
+        await repo_query(
+            "SELECT VALUE insight_type FROM source_insight WHERE source = $keep;",
+            {"keep": keep},
+        )
+    )
+    has_chunks = bool(
+        await repo_query(
+            "SELECT VALUE id FROM source_embedding WHERE source = $keep LIMIT 1;",
+            {"keep": keep},
+        )
+    )
+
+    for duplicate_id in duplicate_ids:
+        duplicate = ensure_record_id(duplicate_id)
+        statements: List[Statement] = []
+
+        references = await repo_query(
+            "SELECT VALUE out FROM reference WHERE in = $duplicate;",
+            {"duplicate": duplicate},
+            record_id_paths=[],
+        )
+        for notebook in references:
+            if str(notebook) not in notebooks:
+                notebooks.add(str(notebook))
+                statements.append(
+                    (
+                        "RELATE $keep->reference->$notebook;",
+                        {"keep": keep, "notebook": notebook},
+                    )
+                )
+                stats["references"] += 1
+
+        insights = await repo_query(
+            "SELECT id, insight_type FROM source_insight WHERE source = $duplicate;",
+            {"duplicate": duplicate},
+            record_id_paths=[],
+        )
+        moved = []
+        dropped = []
+        for insight in insights:
+            if insight["insight_type"] not in insight_types:
+                insight_types.add(insight["insight_type"])
+                moved.append(insight["id"])
+            else:
+                dropped.append(insight["id"])
+        if moved:
+            statements.append(
+                ("UPDATE $ids SET source = $keep;", {"ids": moved, "keep": keep})
+            )
+            stats["insights"] += len(moved)
+
+        chunks = await repo_query(
+            "SELECT VALUE id FROM source_embedding WHERE source = $duplicate;",
+            {"duplicate": duplicate},
+            record_id_paths=[],
+        )
+        if chunks and not has_chunks:
+            statements.append(
+                (
+                    "UPDATE source_embedding SET source = $keep "
+                    "WHERE source = $duplicate;",
+                    {"keep": keep, "duplicate": duplicate},
+                )
+            )
+            has_chunks = True
+            stats["chunks"] += len(chunks)
+            chunks = []
+
+        # The source_delete event removes the remaining chunks and insights
+        statements.append(("DELETE $duplicate;", {"duplicate": duplicate}))
+        await repo_transaction(statements)
+        if chunks or dropped:
+            await remove_embeddings([str(rid) for rid in [*chunks, *dropped]])
+        stats["deleted"] += 1
+        logger.info(f"Merged source {duplicate} into {keep}")
+    return stats
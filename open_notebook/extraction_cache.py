@@ -0,0 +1,177 @@
+"""
+On-disk cache of content extraction results.
+
+Extracting a PDF with docling or crawling a page can take minutes, and the
+same paper is often added to several notebooks. Results are stored as JSON in
+DATA_FOLDER/extraction_cache, keyed by sha256 of the uploaded file (or the URL)
+together with the engine settings and output format, so changing an engine
+never serves a stale result. The cache is capped at EXTRACTION_CACHE_MAX_MB
+(0 disables it); a hit refreshes the file's mtime and the least recently used
+files are evicted first.
+
+Pages change over time, so URL entries expire after EXTRACTION_CACHE_URL_TTL
+seconds (0 never caches URLs), and URLs containing any of the comma-separated
+EXTRACTION_CACHE_URL_EXCLUDE patterns are always extracted again.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from open_notebook.config import DATA_FOLDER
+from open_notebook.processing import extract_content_offloaded
+
+CACHE_FOLDER = f"{DATA_FOLDER}/extraction_cache"
+
+# Settings that change what extraction returns for the same input
+KEY_SETTINGS = ("url_engine", "document_engine", "output_format")
+
+_evict_lock = threading.Lock()
+
+
+def cache_max_bytes() -> int:
+    try:
+        return max(0, int(float(os.getenv("EXTRACTION_CACHE_MAX_MB", "1024")) * 2**20))
+    except ValueError:
+        logger.warning("Invalid value for EXTRACTION_CACHE_MAX_MB, using 1024")
+        return 1024 * 2**20
+
+
+def url_ttl() -> float:
+    try:
+        return max(0.0, float(os.getenv("EXTRACTION_CACHE_URL_TTL", "86400")))
+    except ValueError:
+        logger.warning("Invalid value for EXTRACTION_CACHE_URL_TTL, using 86400")
+        return 86400.0
+
+
+def url_excluded(url: str) -> bool:
+    patterns = os.getenv("EXTRACTION_CACHE_URL_EXCLUDE", "")
+    return any(p.strip() and p.strip() in url for p in patterns.split(","))
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(content_state: Dict[str, Any], input_hash: str) -> str:
+    settings = {name: content_state.get(name) for name in KEY_SETTINGS}
+    payload = json.dumps({"input": input_hash, **settings}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """JSON files of extraction results with size-bounded LRU eviction."""
+
+    def __init__(self, folder: str = CACHE_FOLDER, max_bytes: Optional[int] = None):
+        self.folder = folder
+        self.max_bytes = cache_max_bytes() if max_bytes is None else max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.json")
+
+    def get(self, key: str, ttl: float = 0) -> Optional[Dict[str, Any]]:
+        """The cached result, if present and younger than ttl seconds (0: any age)."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            if ttl and time.time() - entry["stored"] > ttl:
+                os.remove(path)
+                return None
+            os.utime(path)  # mark as recently used
+            return entry["result"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable extraction cache entry {key}: {e}")
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stored": time.time(), "result": result}, f, default=str)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits max_bytes."""
+        with _evict_lock:
+            entries: List[os.stat_result] = []
+            names: List[str] = []
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        try:
+                            entries.append(entry.stat())
+                            names.append(entry.name)
+                        except FileNotFoundError:
+                            pass
+            total = sum(stat.st_size for stat in entries)
+            order = sorted(range(len(names)), key=lambda i: entries[i].st_mtime)
+            for i in order:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.folder, names[i]))
+                except FileNotFoundError:
+                    pass
+                total -= entries[i].st_size
+
+
+def _lookup(content_state: Dict[str, Any]) -> Optional[Tuple[str, float]]:
+    """(key, ttl) to cache this extraction under, or None if it is not cached."""
+    if content_state.get("file_path"):
+        return cache_key(content_state, file_hash(content_state["file_path"])), 0
+    url = content_state.get("url")
+    if url and url_ttl() and not url_excluded(url):
+        return cache_key(content_state, f"url:{url}"), url_ttl()
+    return None  # pasted text needs no extraction
+
+
+async def extract_content_cached(content_state: Dict[str, Any]) -> Dict[str, Any]:
+    """extract_content_offloaded, served from the cache when possible."""
+    cache = ExtractionCache()
+    if not cache.max_bytes:
+        return await extract_content_offloaded(content_state)
+
+    try:
+        lookup = await asyncio.to_thread(_lookup, content_state)
+    except OSError as e:
+        logger.warning(f"Extraction cache lookup failed: {e}")
+        lookup = None
+    if lookup is None:
+        return await extract_content_offloaded(content_state)
+
+    key, ttl = lookup
+    cached = await asyncio.to_thread(cache.get, key, ttl)
+    if cached is not None:
+        logger.info(f"Extraction cache hit for {content_state.get('url') or key}")
+        # The same document may have been uploaded under another name
+        cached["file_path"] = content_state.get("file_path")
+        cached["url"] = content_state.get("url")
+        if content_state.get("file_path") and content_state.get("delete_source"):
+            try:
+                os.remove(content_state["file_path"])
+            except OSError as e:
+                logger.warning(f"Could not delete {content_state['file_path']}: {e}")
+        return cached
+
+    result = await extract_content_offloaded(content_state)
+    try:
+        await asyncio.to_thread(cache.put, key, result)
+    except OSError as e:
+        logger.warning(f"Could not store extraction result in the cache: {e}")
+    return result
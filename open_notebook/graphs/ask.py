@@ -1,5 +1,5 @@
 import operator
-from typing import Annotated, List
+from typing import Annotated, List, Optional, Union
 
 from ai_prompter import Prompter
 from langchain_core.output_parsers.pydantic import PydanticOutputParser
@@ -21,6 +21,7 @@ class SubGraphState(TypedDict):
     instructions: str
     results: dict
     answer: str
+    notebook_ids: Optional[Union[str, List[str]]]
 
 
 class Search(BaseModel):
@@ -43,6 +44,7 @@ class Strategy(BaseModel):
 
 class ThreadState(TypedDict):
     question: str
+    notebook_ids: Optional[Union[str, List[str]]]
     strategy: Strategy
     answers: Annotated[list, operator.add]
     final_answer: str
@@ -81,6 +83,7 @@ async def trigger_queries(state: ThreadState, config: RunnableConfig):
                 "question": state["question"],
                 "instructions": s.instructions,
                 "term": s.term,
+                "notebook_ids": state.get("notebook_ids"),
                 # "type": s.type,
             },
         )
@@ -93,7 +96,9 @@ async def provide_answer(state: SubGraphState, config: RunnableConfig) -> dict:
     # if state["type"] == "text":
     #     results = text_search(state["term"], 10, True, True)
     # else:
-    results = await vector_search(state["term"], 10, True, True)
+    results = await vector_search(
+        state["term"], 10, True, True, notebook_ids=state.get("notebook_ids")
+    )
     if len(results) == 0:
         return {"answers": []}
     payload["results"] = results
@@ -1,27 +1,44 @@
+import asyncio
 import operator
+import os
+import weakref
 from typing import Any, Dict, List, Optional
 
-from content_core import extract_content
 from content_core.common import ProcessSourceState
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
 from langgraph.types import Send
 from loguru import logger
-from typing_extensions import Annotated, TypedDict
+from typing_extensions import Annotated, NotRequired, TypedDict
 
 from open_notebook.domain.content_settings import ContentSettings
+from open_notebook.domain.embedding import embedding_in_background
 from open_notebook.domain.notebook import Asset, Source
+from open_notebook.domain.source_dedup import (
+    add_reference,
+    dedup_enabled,
+    find_source_by_fingerprint,
+    redirect_source,
+    source_fingerprint,
+)
 from open_notebook.domain.transformation import Transformation
+from open_notebook.extraction_cache import extract_content_cached
 from open_notebook.graphs.transformation import graph as transform_graph
+from open_notebook.jobs import submit_embedding_job
+from open_notebook.processing import log_stage
 
 
 class SourceState(TypedDict):
     content_state: ProcessSourceState
     apply_transformations: List[Transformation]
-    notebook_id: str
-    source: Source
-    transformation: Annotated[list, operator.add]
+    notebook_id: Optional[str]
     embed: bool
+    # Set when the source was created ahead of processing (see process_source)
+    source_id: NotRequired[Optional[str]]
+    # Written by the graph's nodes
+    source: NotRequired[Source]
+    transformation: NotRequired[Annotated[list, operator.add]]
+    embedding_job_id: NotRequired[Optional[str]]
 
 
 class TransformationState(TypedDict):
@@ -29,7 +46,14 @@ class TransformationState(TypedDict):
     transformation: Transformation
 
 
+async def _report_stage(source_id: Optional[str], stage: str) -> None:
+    """Update the processing status of a source created ahead of processing."""
+    if source_id:
+        await Source(id=source_id).set_processing_status("running", stage)
+
+
 async def content_process(state: SourceState) -> dict:
+    await _report_stage(state.get("source_id"), "extract")
     content_settings = ContentSettings()
     content_state: Dict[str, Any] = state["content_state"]
 
@@ -41,29 +65,93 @@ async def content_process(state: SourceState) -> dict:
     )
     content_state["output_format"] = "markdown"
 
-    processed_state = await extract_content(content_state)
-    return {"content_state": processed_state}
+    subject = content_state.get("url") or content_state.get("file_path") or "text"
+    with log_stage("extract", subject):
+        processed_state = await extract_content_cached(content_state)
+    return {"content_state": ProcessSourceState(**processed_state)}
+
+
+async def _embed_source(source: Source) -> Optional[str]:
+    """Embed a source on the worker, or inline; returns the job id if queued."""
+    assert source.id, "Source must be saved before it is embedded"
+    logger.debug("Embedding content for vector search")
+    if embedding_in_background():
+        try:
+            return await submit_embedding_job("source", source.id)
+        except Exception as e:
+            logger.warning(f"Could not queue embedding, embedding inline: {e}")
+    await source.vectorize()
+    return None
+
+
+async def _reuse_source(state: SourceState, source: Source) -> dict:
+    """Add an existing source with the same content to the notebook."""
+    logger.info(f"Content matches existing source {source.id}, reusing it")
+    if state["notebook_id"]:
+        await add_reference(source.id, state["notebook_id"])
+
+    embedding_job_id = None
+    if state["embed"] and not await source.get_embedded_chunks():
+        embedding_job_id = await _embed_source(source)
+
+    # Insights the source already has are not generated again
+    existing = {insight.insight_type for insight in await source.get_insights()}
+    transformations = [
+        t for t in state.get("apply_transformations") or [] if t.title not in existing
+    ]
+    return {
+        "source": source,
+        "embedding_job_id": embedding_job_id,
+        "apply_transformations": transformations,
+    }
 
 
 async def save_source(state: SourceState) -> dict:
     content_state = state["content_state"]
+    source_id = state.get("source_id")
+    await _report_stage(source_id, "save")
 
-    source = Source(
-        asset=Asset(url=content_state.url, file_path=content_state.file_path),
-        full_text=content_state.content,
-        title=content_state.title,
-    )
-    await source.save()
+    fingerprint = await asyncio.to_thread(source_fingerprint, content_state.content)
+    if fingerprint and dedup_enabled():
+        existing = await find_source_by_fingerprint(fingerprint)
+        if existing and existing.id != source_id:
+            result = await _reuse_source(state, existing)
+            if source_id:
+                # Kept as a pointer so clients polling it are not left with a 404
+                await redirect_source(source_id, existing.id)
+            return result
 
-    if state["notebook_id"]:
-        logger.debug(f"Adding source to notebook {state['notebook_id']}")
-        await source.add_to_notebook(state["notebook_id"])
+    if source_id:
+        # The placeholder has no text yet; loading the field keeps save() from
+        # treating it as left out of the projection
+        source = await Source.get(source_id, include=["full_text"])
+        source.full_text = content_state.content
+        source.title = source.title or content_state.title
+        source.fingerprint = fingerprint
+        with log_stage("save", source.title):
+            await source.save()
+    else:
+        source = Source(
+            asset=Asset(url=content_state.url, file_path=content_state.file_path),
+            full_text=content_state.content,
+            title=content_state.title,
+            fingerprint=fingerprint,
+        )
+        with log_stage("save", content_state.title):
+            if state["notebook_id"]:
+                logger.debug(f"Adding source to notebook {state['notebook_id']}")
+                await source.save(relations=[("reference", state["notebook_id"])])
+            else:
+                await source.save()
 
+    embedding_job_id = None
     if state["embed"]:
-        logger.debug("Embedding content for vector search")
-        await source.vectorize()
+        await _report_stage(source_id, "embed")
+        embedding_job_id = await _embed_source(source)
+    if state.get("apply_transformations"):
+        await _report_stage(source_id, "transform")
 
-    return {"source": source}
+    return {"source": source, "embedding_job_id": embedding_job_id}
 
 
 def trigger_transformations(state: SourceState, config: RunnableConfig) -> List[Send]:
@@ -85,28 +173,134 @@ def trigger_transformations(state: SourceState, config: RunnableConfig) -> List[
     ]
 
 
+def transformation_concurrency() -> int:
+    """LLM calls for transformations allowed at once in this process."""
+    try:
+        return max(1, int(os.getenv("TRANSFORMATION_CONCURRENCY", "3")))
+    except ValueError:
+        logger.warning("Invalid value for TRANSFORMATION_CONCURRENCY, using 3")
+        return 3
+
+
+def transformation_max_retries() -> int:
+    try:
+        return max(0, int(os.getenv("TRANSFORMATION_MAX_RETRIES", "2")))
+    except ValueError:
+        logger.warning("Invalid value for TRANSFORMATION_MAX_RETRIES, using 2")
+        return 2
+
+
+# One semaphore per event loop, shared by every graph run on it
+_transformation_slots: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _transformation_slots.get(loop)
+    if slots is None:
+        slots = asyncio.Semaphore(transformation_concurrency())
+        _transformation_slots[loop] = slots
+    return slots
+
+
+async def run_transformation(source: Source, transformation: Transformation) -> str:
+    """Apply a transformation to the source text, retrying transient failures."""
+    content = source.full_text or ""
+    attempts = transformation_max_retries() + 1
+    attempt = 1
+    while True:
+        try:
+            # Only the LLM call holds a slot, not the backoff
+            async with _slots():
+                with log_stage(f"transformation {transformation.name}", source.id):
+                    result = await transform_graph.ainvoke(
+                        dict(input_text=content, transformation=transformation)
+                    )
+            return result["output"]
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            delay = 2 ** (attempt - 1)
+            logger.warning(
+                f"Transformation {transformation.name} failed on {source.id} "
+                f"(attempt {attempt}/{attempts}), retrying in {delay}s: {e}"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
 async def transform_content(state: TransformationState) -> Optional[dict]:
     source = state["source"]
+    await source.load_fields("full_text")
     content = source.full_text
     if not content:
         return None
     transformation: Transformation = state["transformation"]
+    # Failures are tracked per transformation id, so both must be saved records
+    assert source.id and transformation.id, "Source and transformation must be saved"
 
     logger.debug(f"Applying transformation {transformation.name}")
-    result = await transform_graph.ainvoke(
-        dict(input_text=content, transformation=transformation)
-    )
-    await source.add_insight(transformation.title, result["output"])
+    try:
+        output = await run_transformation(source, transformation)
+    except Exception as e:
+        # Other transformations and the saved source are kept; this one can be
+        # retried alone with retry_failed_transformations
+        logger.error(f"Transformation {transformation.name} failed on {source.id}: {e}")
+        await source.record_transformation_failure(
+            transformation.id, transformation.name, str(e)
+        )
+        return {
+            "transformation": [
+                {"error": str(e), "transformation_name": transformation.name}
+            ]
+        }
+
+    # Stored as soon as it completes, whatever happens to the others
+    await source.add_insight(transformation.title, output)
+    await source.clear_transformation_failure(transformation.id)
     return {
         "transformation": [
             {
-                "output": result["output"],
+                "output": output,
                 "transformation_name": transformation.name,
             }
         ]
     }
 
 
+async def retry_failed_transformations(
+    source_id: str, transformation_ids: Optional[List[str]] = None
+) -> Dict[str, List[str]]:
+    """
+    Run again the transformations that failed on a source.
+
+    Only the transformations are repeated; the source is not extracted or
+    embedded again. Returns the names that succeeded and that failed again.
+    """
+    source = await Source.get(source_id)
+    failures = await source.get_transformation_failures()
+    wanted = {str(t) for t in transformation_ids} if transformation_ids else None
+    transformations = [
+        await Transformation.get(str(failure["transformation"]))
+        for failure in failures
+        if wanted is None or str(failure["transformation"]) in wanted
+    ]
+    results = await asyncio.gather(
+        *(
+            transform_content({"source": source, "transformation": t})
+            for t in transformations
+        )
+    )
+    outcome: Dict[str, List[str]] = {"succeeded": [], "failed": []}
+    for result in results:
+        for entry in (result or {}).get("transformation", []):
+            key = "failed" if "error" in entry else "succeeded"
+            outcome[key].append(entry["transformation_name"])
+    return outcome
+
+
 # Create and compile the workflow
 workflow = StateGraph(SourceState)
 
@@ -3,7 +3,9 @@ from langchain_core.language_models.chat_models import BaseChatModel
 from loguru import logger
 
 from open_notebook.domain.models import model_manager
-from open_notebook.utils import token_count
+from open_notebook.utils import exceeds_token_limit
+
+LARGE_CONTEXT_TOKENS = 105_000
 
 
 async def provision_langchain_model(
@@ -11,15 +13,14 @@ async def provision_langchain_model(
 ) -> BaseChatModel:
     """
     Returns the best model to use based on the context size and on whether there is a specific model being requested in Config.
-    If context > 105_000, returns the large_context_model
+    If context > LARGE_CONTEXT_TOKENS, returns the large_context_model
     If model_id is specified in Config, returns that model
     Otherwise, returns the default model for the given type
     """
-    tokens = token_count(content)
-
-    if tokens > 105_000:
+    if exceeds_token_limit(content, LARGE_CONTEXT_TOKENS):
         logger.debug(
-            f"Using large context model because the content has {tokens} tokens"
+            f"Using large context model because the content has more than "
+            f"{LARGE_CONTEXT_TOKENS} tokens"
         )
         model = await model_manager.get_default_model("large_context", **kwargs)
     elif model_id:
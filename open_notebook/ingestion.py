@@ -0,0 +1,357 @@
+"""
+Bulk source ingestion as a staged pipeline.
+
+A batch runs its items through extract -> save -> embed -> transform. Every
+stage has its own pool of workers (INGEST_<STAGE>_CONCURRENCY) fed by a
+bounded queue, so a slow stage (e.g. LLM transformations) applies
+backpressure to the stages before it instead of piling up extracted text in
+memory, and a fast stage keeps working while others wait. Each item's state
+is written to source_batch_item as it moves, so clients can poll or stream
+it; a failing item is marked failed and does not stop the batch.
+
+Batches run in the process that created them, which records a heartbeat on
+the batch while it runs. A batch whose heartbeat stops (the process died) is
+marked interrupted the next time its status is read, and a cancelled batch is
+marked cancelled; either way its unfinished items are marked failed.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from open_notebook.database.repository import (
+    Statement,
+    ensure_record_id,
+    repo_create,
+    repo_insert,
+    repo_query,
+    repo_transaction,
+)
+from open_notebook.domain.embedding import embedding_in_background
+from open_notebook.domain.notebook import Source
+from open_notebook.domain.transformation import Transformation
+from open_notebook.graphs.source import (
+    SourceState,
+    content_process,
+    save_source,
+    transform_content,
+)
+from open_notebook.jobs import submit_embedding_job
+from open_notebook.processing import log_stage
+
+STAGE_CONCURRENCY = {"extract": 4, "save": 4, "embed": 2, "transform": 2}
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Seconds between heartbeats of a running batch, and missed heartbeats after
+# which its process is assumed gone
+HEARTBEAT_INTERVAL = 30
+_STALE_AFTER = f"{HEARTBEAT_INTERVAL * 4}s"
+
+_running: Set[asyncio.Task] = set()
+
+
+def stage_concurrency(stage: str) -> int:
+    name = f"INGEST_{stage.upper()}_CONCURRENCY"
+    default = STAGE_CONCURRENCY[stage]
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid value for {name}, using default {default}")
+        return default
+
+
+@dataclass
+class BatchItem:
+    id: Any
+    content_state: Any  # input dict, then the extracted ProcessSourceState
+    title: Optional[str] = None
+    source: Optional[Source] = None
+    transformations: List[Transformation] = field(default_factory=list)
+    updates: Dict[str, Any] = field(default_factory=dict)
+
+
+async def _update_item(item_id: Any, data: Dict[str, Any]) -> None:
+    data["updated"] = datetime.now(timezone.utc)
+    await repo_query(
+        "UPDATE $id MERGE $data;", {"id": ensure_record_id(item_id), "data": data}
+    )
+
+
+async def create_batch(
+    items: List[Dict[str, Any]],
+    notebook_id: Optional[str],
+    transformation_ids: List[str],
+    embed: bool,
+) -> Tuple[str, List[BatchItem]]:
+    """
+    Record a batch and its items, all queued.
+
+    Each item is a dict with the content_state to extract, plus an optional
+    title and a label shown in the item's status.
+    """
+    batch = await repo_create(
+        "source_batch",
+        {
+            "notebook_id": notebook_id,
+            "transformations": transformation_ids,
+            "embed": embed,
+            "total": len(items),
+            "status": "running",
+            "heartbeat": datetime.now(timezone.utc),
+        },
+    )
+    batch = batch[0] if isinstance(batch, list) else batch
+    now = datetime.now(timezone.utc)
+    rows = await repo_insert(
+        "source_batch_item",
+        [
+            {
+                "batch": ensure_record_id(batch["id"]),
+                "position": position,
+                "label": item.get("label"),
+                "status": "queued",
+                "stage": None,
+                "created": now,
+                "updated": now,
+            }
+            for position, item in enumerate(items)
+        ],
+    )
+    rows = sorted(rows, key=lambda row: row["position"])
+    return batch["id"], [
+        BatchItem(
+            id=row["id"], content_state=item["content_state"], title=item.get("title")
+        )
+        for row, item in zip(rows, items)
+    ]
+
+
+async def _finish_batch(batch_id: Any, status: str, reason: Optional[str]) -> None:
+    """Set the batch status; with a reason, unfinished items fail with it."""
+    statements: List[Statement] = [
+        (
+            "UPDATE $id SET status = $status, updated = time::now();",
+            {"id": ensure_record_id(batch_id), "status": status},
+        )
+    ]
+    if reason:
+        statements.append(
+            (
+                "UPDATE source_batch_item SET status = 'failed', error = $reason, "
+                "updated = time::now() "
+                "WHERE batch = $id AND status NOT IN $terminal;",
+                {
+                    "id": ensure_record_id(batch_id),
+                    "reason": reason,
+                    "terminal": list(TERMINAL_STATUSES),
+                },
+            )
+        )
+    await repo_transaction(statements)
+
+
+async def _heartbeat(batch_id: Any) -> None:
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        try:
+            await repo_query(
+                "UPDATE $id SET heartbeat = time::now();",
+                {"id": ensure_record_id(batch_id)},
+            )
+        except Exception as e:
+            logger.warning(f"Could not record heartbeat of batch {batch_id}: {e}")
+
+
+async def run_batch(
+    batch_id: str,
+    items: List[BatchItem],
+    notebook_id: Optional[str],
+    transformations: List[Transformation],
+    embed: bool,
+) -> None:
+    """Run the items of a batch through the pipeline stages."""
+
+    def source_state(item: BatchItem) -> SourceState:
+        # Embedding and transformations run as stages of their own
+        return {
+            "content_state": item.content_state,
+            "notebook_id": notebook_id,
+            "apply_transformations": transformations,
+            "embed": False,
+        }
+
+    async def extract(item: BatchItem) -> None:
+        result = await content_process(source_state(item))
+        item.content_state = result["content_state"]
+        if item.title:
+            item.content_state.title = item.title
+
+    async def save(item: BatchItem) -> None:
+        result = await save_source(source_state(item))
+        source: Source = result["source"]
+        assert source.id is not None
+        item.source = source
+        # A reused source skips the transformations it already has insights for
+        item.transformations = result.get("apply_transformations", transformations)
+        item.content_state = None  # the text now lives in the source
+        item.updates["source"] = ensure_record_id(source.id)
+
+    async def embed_source(item: BatchItem) -> None:
+        assert item.source is not None and item.source.id is not None
+        if embedding_in_background():
+            try:
+                item.updates["embedding_job_id"] = await submit_embedding_job(
+                    "source", item.source.id
+                )
+                return
+            except Exception as e:
+                logger.warning(f"Could not queue embedding, embedding inline: {e}")
+        await item.source.vectorize()
+
+    async def transform(item: BatchItem) -> None:
+        source = item.source
+        assert source is not None
+        results = await asyncio.gather(
+            *(
+                transform_content({"source": source, "transformation": t})
+                for t in item.transformations
+            )
+        )
+        # Failed transformations leave the item completed; they can be retried
+        failed = [
+            entry["transformation_name"]
+            for result in results
+            for entry in (result or {}).get("transformation", [])
+            if "error" in entry
+        ]
+        if failed:
+            item.updates["error"] = f"Transformations failed: {', '.join(failed)}"
+
+    stages: List[Tuple[str, Callable[[BatchItem], Awaitable[None]]]] = [
+        ("extract", extract),
+        ("save", save),
+    ]
+    if embed:
+        stages.append(("embed", embed_source))
+    if transformations:
+        stages.append(("transform", transform))
+
+    caps = [stage_concurrency(name) for name, _ in stages]
+    queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=cap) for cap in caps]
+
+    async def feed() -> None:
+        for item in items:
+            await queues[0].put(item)
+        for _ in range(caps[0]):
+            await queues[0].put(None)
+
+    async def worker(index: int) -> None:
+        name, handler = stages[index]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        while True:
+            item = await inbox.get()
+            if item is None:
+                return
+            try:
+                await _update_item(item.id, {"status": "running", "stage": name})
+                with log_stage(name, item.id):
+                    await handler(item)
+                if outbox is None:
+                    item.updates.update(status="completed", stage=None)
+                if item.updates:
+                    await _update_item(item.id, item.updates)
+                    item.updates = {}
+            except Exception as e:
+                logger.error(f"Batch {batch_id} item {item.id} failed at {name}: {e}")
+                try:
+                    await _update_item(
+                        item.id, {"status": "failed", "stage": name, "error": str(e)}
+                    )
+                except Exception as db_error:
+                    logger.error(f"Could not record failure of {item.id}: {db_error}")
+                continue
+            if outbox is not None:
+                await outbox.put(item)
+
+    async def run_stage(index: int) -> None:
+        await asyncio.gather(*(worker(index) for _ in range(caps[index])))
+        if index + 1 < len(stages):
+            for _ in range(caps[index + 1]):
+                await queues[index + 1].put(None)
+
+    heartbeat = asyncio.create_task(_heartbeat(batch_id))
+    status, reason = "completed", None
+    try:
+        with log_stage(f"batch of {len(items)} sources", batch_id):
+            await asyncio.gather(feed(), *(run_stage(i) for i in range(len(stages))))
+    except asyncio.CancelledError:
+        status, reason = "cancelled", "Batch was cancelled"
+        raise
+    except Exception as e:
+        logger.error(f"Batch {batch_id} failed: {e}")
+        status, reason = "failed", f"Batch failed: {e}"
+        raise
+    finally:
+        heartbeat.cancel()
+        try:
+            await _finish_batch(batch_id, status, reason)
+        except Exception as db_error:
+            logger.error(f"Could not record the end of batch {batch_id}: {db_error}")
+
+
+def start_batch(
+    batch_id: str,
+    items: List[BatchItem],
+    notebook_id: Optional[str],
+    transformations: List[Transformation],
+    embed: bool,
+) -> asyncio.Task:
+    """Run a batch in the background of the current event loop."""
+    task = asyncio.create_task(
+        run_batch(batch_id, items, notebook_id, transformations, embed)
+    )
+    # The loop only keeps weak references to tasks
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return task
+
+
+async def get_batch_status(batch_id: str) -> Optional[Dict[str, Any]]:
+    """
+    The batch record with its items in order and a count per status.
+
+    A running batch whose heartbeat stopped is marked interrupted first.
+    """
+    interrupted = await repo_query(
+        "UPDATE $id SET status = 'interrupted' WHERE status = 'running' "
+        f"AND (heartbeat IS NONE OR heartbeat < time::now() - {_STALE_AFTER});",
+        {"id": ensure_record_id(batch_id)},
+    )
+    if interrupted:
+        logger.warning(f"Batch {batch_id} stopped without finishing")
+        await _finish_batch(
+            batch_id, "interrupted", "Batch was interrupted before this item finished"
+        )
+    batch = await repo_query(
+        "SELECT * FROM ONLY $id;",
+        {"id": ensure_record_id(batch_id)},
+        record_id_paths=["id"],
+    )
+    if not isinstance(batch, dict):
+        return None
+    items = await repo_query(
+        "SELECT id, position, label, status, stage, error, source, "
+        "embedding_job_id, updated FROM source_batch_item "
+        "WHERE batch = $id ORDER BY position;",
+        {"id": ensure_record_id(batch_id)},
+        record_id_paths=["id", "source"],
+    )
+    counts: Dict[str, int] = {}
+    for item in items:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+    return {**batch, "items": items, "counts": counts}
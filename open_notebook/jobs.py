@@ -0,0 +1,27 @@
+"""
+Queueing surreal-commands jobs from library code.
+
+submit_command validates the command against the registry of the calling
+process, so the commands package must already be imported: the API does so at
+startup and the worker loads it to run jobs. This module does not import it,
+because the commands themselves import the domain and graph modules that queue
+jobs. API routes use CommandService.
+"""
+
+import asyncio
+from typing import Any, Dict, Literal
+
+from loguru import logger
+from surreal_commands import submit_command
+
+
+async def submit_job(command_name: str, args: Dict[str, Any]) -> str:
+    """Queue an open_notebook command and return its job id."""
+    job_id = await asyncio.to_thread(submit_command, "open_notebook", command_name, args)
+    logger.info(f"Submitted {command_name} job {job_id}")
+    return str(job_id)
+
+
+async def submit_embedding_job(kind: Literal["source", "note"], item_id: str) -> str:
+    """Queue an embed_source / embed_note command and return its job id."""
+    return await submit_job(f"embed_{kind}", {f"{kind}_id": str(item_id)})
@@ -0,0 +1,151 @@
+"""
+Process pool for CPU-bound source processing.
+
+Content extraction (PDF/office parsing in content_core) and chunking hold the
+GIL for seconds on large documents, which stalls the event loop of the API
+and the worker. They run in a pool of PROCESSING_POOL_WORKERS processes
+instead; with 0 they run in a thread, which keeps the loop responsive but
+still competes for the GIL. Chunking sends the document to the pool one
+window at a time and streams the chunk offsets back in document order.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from loguru import logger
+
+from open_notebook.text_splitter import RecursiveTokenSplitter, window_bounds
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def pool_workers() -> int:
+    default = min(4, os.cpu_count() or 1)
+    try:
+        return max(0, int(os.getenv("PROCESSING_POOL_WORKERS", default)))
+    except (TypeError, ValueError):
+        logger.warning(
+            f"Invalid value for PROCESSING_POOL_WORKERS, using default {default}"
+        )
+        return default
+
+
+def get_process_pool() -> Optional[Executor]:
+    """The shared pool, created on first use; None when disabled."""
+    global _pool
+    workers = pool_workers()
+    if not workers:
+        return None
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"Started processing pool with {workers} workers")
+    return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def run_cpu_bound(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a picklable function in the pool, or in a thread if it is disabled."""
+    pool = get_process_pool()
+    if pool is None:
+        return await asyncio.to_thread(fn, *args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); start a fresh pool next time
+        logger.error("Processing pool broke, it will be restarted")
+        shutdown_process_pool()
+        raise
+
+
+@contextmanager
+def log_stage(stage: str, subject: Any = None) -> Iterator[None]:
+    """Log how long a processing stage took."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        target = f" for {subject}" if subject else ""
+        logger.info(f"Stage {stage}{target} took {elapsed:.0f} ms")
+
+
+def _extract(content_state: Dict[str, Any]) -> Dict[str, Any]:
+    from content_core import extract_content
+
+    result = asyncio.run(extract_content(content_state))
+    return result.model_dump() if hasattr(result, "model_dump") else dict(result)
+
+
+async def extract_content_offloaded(content_state: Dict[str, Any]) -> Dict[str, Any]:
+    """content_core.extract_content, run off the event loop."""
+    return await run_cpu_bound(_extract, dict(content_state))
+
+
+def _chunk_window(window: str, chunk_size: int) -> List[Tuple[int, int, str]]:
+    from open_notebook.domain.embedding_cache import content_hash
+
+    return [
+        (chunk.start, chunk.end, content_hash(chunk.text))
+        for chunk in RecursiveTokenSplitter(chunk_size).split(window)
+    ]
+
+
+async def iter_chunk_spans(
+    text: str, chunk_size: int = 500
+) -> AsyncIterator[Tuple[int, int, str]]:
+    """
+    Yield (start, end, content hash) of each chunk of text, in order.
+
+    Gives the same chunks as RecursiveTokenSplitter.iter_split. Windows are
+    chunked in parallel, with at most one window per pool worker in flight.
+    """
+    in_flight: Deque[Tuple[int, asyncio.Future]] = deque()
+    windows = window_bounds(text)
+    limit = max(1, pool_workers())
+    while True:
+        while len(in_flight) < limit:
+            bounds = next(windows, None)
+            if bounds is None:
+                break
+            start, end = bounds
+            future: asyncio.Future = asyncio.ensure_future(
+                run_cpu_bound(_chunk_window, text[start:end], chunk_size)
+            )
+            in_flight.append((start, future))
+        if not in_flight:
+            return
+        offset, future = in_flight.popleft()
+        try:
+            spans = await future
+        except BaseException:
+            for _, pending in in_flight:
+                pending.cancel()
+            raise
+        for start, end, chunk_hash in spans:
+            yield offset + start, offset + end, chunk_hash
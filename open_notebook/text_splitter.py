@@ -0,0 +1,268 @@
+"""
+Token-aware recursive text splitting that encodes the document only once.
+
+Follows the algorithm of langchain's RecursiveCharacterTextSplitter with a token
+length function (split on the first separator present, keep the separator at
+the start of the next piece, merge pieces up to chunk_size with chunk_overlap,
+recurse into oversized pieces), but works on character offsets into the
+original text. Token counts come from a single tokenization of the whole
+document: a span's length is the number of tokens that start inside it, found
+with a binary search over the token offsets. Chunk boundaries therefore match
+the langchain splitter except where a token straddles a piece boundary, and
+each chunk carries its exact position in the document.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_ENCODING = "o200k_base"
+
+SEPARATORS = [
+    "\n\n",
+    "\n",
+    ".",
+    ",",
+    " ",
+    "\u200b",  # Zero-width space
+    "\uff0c",  # Fullwidth comma
+    "\u3001",  # Ideographic comma
+    "\uff0e",  # Fullwidth full stop
+    "\u3002",  # Ideographic full stop
+    "",
+]
+
+# Characters tokenized at a time by iter_split
+STREAM_WINDOW_CHARS = 1_000_000
+
+# (start, end, tokens) of a piece of the document
+Span = Tuple[int, int, int]
+
+_byte_lengths: Dict[str, np.ndarray] = {}
+
+
+@dataclass
+class TextChunk:
+    text: str
+    start: int
+    end: int
+    tokens: int
+
+
+def get_encoding(name: str = DEFAULT_ENCODING) -> Any:
+    import tiktoken
+
+    return tiktoken.get_encoding(name)
+
+
+def _token_byte_lengths(encoding: Any) -> np.ndarray:
+    """Byte length of every token of the vocabulary, computed once per encoding."""
+    lengths = _byte_lengths.get(encoding.name)
+    if lengths is None:
+        lengths = np.zeros(encoding.n_vocab, dtype=np.int64)
+        for token in range(encoding.n_vocab):
+            try:
+                lengths[token] = len(encoding.decode_single_token_bytes(token))
+            except KeyError:
+                pass  # unused ids between the regular and special tokens
+        _byte_lengths[encoding.name] = lengths
+    return lengths
+
+
+class TokenizedText:
+    """A document encoded once, with the character offset of every token."""
+
+    def __init__(self, text: str, encoding: Optional[Any] = None):
+        encoding = encoding or get_encoding()
+        self.text = text
+        tokens = encoding.encode_to_numpy(text, disallowed_special=())
+        self.token_count = len(tokens)
+
+        # Byte offsets of the tokens, then characters: a character starts at
+        # every byte that is not a UTF-8 continuation byte, and a token starting
+        # inside a character belongs to that character. surrogatepass gives lone
+        # surrogates the same 3 bytes as the U+FFFD tiktoken encodes.
+        raw = np.frombuffer(text.encode("utf-8", "surrogatepass"), dtype=np.uint8)
+        byte_starts = np.zeros(len(tokens), dtype=np.int64)
+        if len(tokens) > 1:
+            np.cumsum(_token_byte_lengths(encoding)[tokens[:-1]], out=byte_starts[1:])
+        continuation = np.flatnonzero((raw & 0xC0) == 0x80)
+        self.offsets = byte_starts - np.searchsorted(
+            continuation, byte_starts, side="right"
+        )
+
+    def count(self, start: int, end: int) -> int:
+        """Tokens that start in text[start:end]."""
+        left, right = np.searchsorted(self.offsets, (start, end))
+        return int(right - left)
+
+    def spans(self, bounds: Sequence[int]) -> List[Span]:
+        """Consecutive non-empty spans between the given boundaries."""
+        counts = np.diff(np.searchsorted(self.offsets, bounds))
+        return [
+            (start, end, int(count))
+            for start, end, count in zip(bounds[:-1], bounds[1:], counts)
+            if end > start
+        ]
+
+
+class RecursiveTokenSplitter:
+    """
+    Split text into chunks of at most chunk_size tokens.
+
+    Args:
+        chunk_size: Maximum tokens per chunk.
+        chunk_overlap: Tokens shared by consecutive chunks; defaults to 15%.
+        separators: Boundaries to split on, most preferred first.
+        encoding: tiktoken encoding; defaults to o200k_base.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        chunk_overlap: Optional[int] = None,
+        separators: Optional[List[str]] = None,
+        encoding: Optional[Any] = None,
+    ):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = (
+            int(chunk_size * 0.15) if chunk_overlap is None else chunk_overlap
+        )
+        self.separators = separators if separators is not None else SEPARATORS
+        self.encoding = encoding
+
+    def split(self, text: str) -> List[TextChunk]:
+        if not text:
+            return []
+        doc = TokenizedText(text, self.encoding)
+        chunks = []
+        for start, end in self._split(doc, 0, len(text), self.separators):
+            chunks.append(TextChunk(text[start:end], start, end, doc.count(start, end)))
+        return chunks
+
+    def iter_split(
+        self, text: str, window_chars: int = STREAM_WINDOW_CHARS
+    ) -> Iterator[TextChunk]:
+        """
+        Yield chunks lazily, tokenizing at most about window_chars at a time.
+
+        Windows end on a paragraph (else line, else word) boundary and are
+        split independently, so memory stays proportional to the window rather
+        than the document. Texts shorter than a window give the same chunks as
+        split(); longer ones differ only in that no chunk spans or overlaps a
+        window boundary.
+        """
+        for start, end in window_bounds(text, window_chars):
+            window = text[start:end]
+            doc = TokenizedText(window, self.encoding)
+            for s, e in self._split(doc, 0, len(window), self.separators):
+                yield TextChunk(window[s:e], start + s, start + e, doc.count(s, e))
+
+    def _split(
+        self, doc: TokenizedText, start: int, end: int, separators: List[str]
+    ) -> List[Tuple[int, int]]:
+        text = doc.text
+        separator = separators[-1]
+        remaining: List[str] = []
+        for i, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator = candidate
+                remaining = separators[i + 1 :]
+                break
+
+        # The separator stays at the start of the piece that follows it
+        if separator:
+            bounds = [start]
+            position = text.find(separator, start, end)
+            while position != -1:
+                bounds.append(position)
+                position = text.find(separator, position + len(separator), end)
+            bounds.append(end)
+        else:
+            bounds = list(range(start, end + 1))
+
+        chunks: List[Tuple[int, int]] = []
+        good: List[Span] = []
+        for span in doc.spans(bounds):
+            if span[2] < self.chunk_size:
+                good.append(span)
+                continue
+            if good:
+                chunks.extend(self._merge(text, good))
+                good = []
+            if remaining:
+                chunks.extend(self._split(doc, span[0], span[1], remaining))
+            else:
+                chunks.append((span[0], span[1]))
+        if good:
+            chunks.extend(self._merge(text, good))
+        return chunks
+
+    def _merge(self, text: str, spans: List[Span]) -> List[Tuple[int, int]]:
+        """Combine consecutive small spans into chunks, keeping the overlap."""
+        chunks = []
+        first = 0  # spans[first:last] form the current chunk
+        total = 0
+        for last, (_, _, tokens) in enumerate(spans):
+            if total + tokens > self.chunk_size and last > first:
+                chunk = self._strip(text, spans[first][0], spans[last - 1][1])
+                if chunk:
+                    chunks.append(chunk)
+                while total > self.chunk_overlap or (
+                    total + tokens > self.chunk_size and total > 0
+                ):
+                    total -= spans[first][2]
+                    first += 1
+            total += tokens
+        chunk = self._strip(text, spans[first][0], spans[-1][1])
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def _strip(text: str, start: int, end: int) -> Optional[Tuple[int, int]]:
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return (start, end) if end > start else None
+
+
+def split_text_chunks(
+    text: str, chunk_size: int = 500, encoding: Optional[Any] = None
+) -> List[TextChunk]:
+    """Split text into chunks with their offsets and token counts."""
+    return RecursiveTokenSplitter(chunk_size, encoding=encoding).split(text)
+
+
+def window_bounds(
+    text: str, window_chars: int = STREAM_WINDOW_CHARS
+) -> Iterator[Tuple[int, int]]:
+    """
+    Cut text into windows of at most window_chars, chunked independently.
+
+    A window ends before the last paragraph (else line, else word) separator
+    in its second half, so the separator starts the next window.
+    """
+    start = 0
+    while start < len(text):
+        end = min(start + window_chars, len(text))
+        if end < len(text):
+            for separator in ("\n\n", "\n", " "):
+                position = text.rfind(separator, start + window_chars // 2, end)
+                if position != -1:
+                    end = position
+                    break
+        yield start, end
+        start = end
+
+
+def iter_text_chunks(
+    text: str, chunk_size: int = 500, encoding: Optional[Any] = None
+) -> Iterator[TextChunk]:
+    """Lazily split text into chunks, with bounded memory for any text size."""
+    return RecursiveTokenSplitter(chunk_size, encoding=encoding).iter_split(text)
@@ -1,19 +1,37 @@
+import hashlib
 import re
+import threading
 import unicodedata
+from collections import OrderedDict
 from importlib.metadata import PackageNotFoundError, version
 from typing import Tuple
 from urllib.parse import urlparse
 
 import requests
 import tomli
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from packaging.version import parse as parse_version
 
+from open_notebook.text_splitter import split_text_chunks
+
+# Exact counts of large texts, keyed by content hash (see token_count)
+_TOKEN_COUNT_CACHE_SIZE = 256
+_MEMOIZE_MIN_CHARS = 10_000
+_token_counts: "OrderedDict[str, int]" = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+# Empirical ceiling on characters per o200k token. Prose, code, markup and CJK
+# text average 1-5 characters per token; only long runs of repeated characters
+# (whitespace, rulers like "=====") exceed 8.
+MAX_CHARS_PER_TOKEN = 8
+
 
 def token_count(input_string) -> int:
     """
     Count the number of tokens in the input string using the 'o200k_base' encoding.
 
+    Counts of texts of 10k characters or more are memoized by content hash, so
+    counting the same source or payload again costs a sha256 instead of an encode.
+
     Args:
         input_string (str): The input string to count tokens for.
 
@@ -22,12 +40,61 @@ def token_count(input_string) -> int:
     """
     import tiktoken
 
+    key = None
+    if len(input_string) >= _MEMOIZE_MIN_CHARS:
+        key = hashlib.sha256(input_string.encode("utf-8", "surrogatepass")).hexdigest()
+        with _token_counts_lock:
+            if key in _token_counts:
+                _token_counts.move_to_end(key)
+                return _token_counts[key]
+
     encoding = tiktoken.get_encoding("o200k_base")
     tokens = encoding.encode(input_string)
     token_count = len(tokens)
+
+    if key:
+        with _token_counts_lock:
+            _token_counts[key] = token_count
+            while len(_token_counts) > _TOKEN_COUNT_CACHE_SIZE:
+                _token_counts.popitem(last=False)
     return token_count
 
 
+def token_bounds(input_string) -> Tuple[int, int]:
+    """
+    Bound the token count of a string without tokenizing it.
+
+    The upper bound is the UTF-8 byte length and always holds: every token
+    covers at least one byte. The lower bound is the character count divided by
+    MAX_CHARS_PER_TOKEN; it is empirical and only fails for text made mostly of
+    long repeated-character runs. For English prose the true count is typically
+    about a quarter of the upper bound and twice the lower bound.
+
+    Returns:
+        Tuple[int, int]: (lower, upper) estimate of the token count.
+    """
+    upper = len(input_string.encode("utf-8", "surrogatepass"))
+    return len(input_string) // MAX_CHARS_PER_TOKEN, upper
+
+
+def exceeds_token_limit(input_string, limit: int) -> bool:
+    """
+    Whether the string has more than limit tokens, tokenizing only when needed.
+
+    Texts whose bounds fall on one side of the limit are decided from the
+    bounds alone; only texts of more than limit bytes and at most
+    8 * limit characters are counted exactly, via the memoized token_count.
+    The answer is exact except for texts past 8 * limit characters that average
+    more than 8 characters per token, which are reported as over the limit.
+    """
+    lower, upper = token_bounds(input_string)
+    if upper <= limit:
+        return False
+    if lower > limit:
+        return True
+    return token_count(input_string) > limit
+
+
 def token_cost(token_count, cost_per_million=0.150) -> float:
     """
     Calculate the cost of tokens based on the token count and cost per million tokens.
@@ -44,37 +111,19 @@ def token_cost(token_count, cost_per_million=0.150) -> float:
 
 def split_text(txt: str, chunk_size=500):
     """
-    Split the input text into chunks.
+    Split the input text into chunks of at most chunk_size tokens.
+
+    Chunks overlap by 15% and prefer paragraph, line and sentence boundaries;
+    see open_notebook.text_splitter, which tokenizes the text only once.
 
     Args:
         txt (str): The input text to be split.
-        chunk (int): The size of each chunk. Default is 1000.
-        overlap (int): The number of characters to overlap between chunks. Default is 0.
-        separator (str): The separator to use when splitting the text. Default is " ".
+        chunk_size (int): The maximum number of tokens per chunk. Default is 500.
 
     Returns:
         list: A list of text chunks.
     """
-    overlap = int(chunk_size * 0.15)
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=overlap,
-        length_function=token_count,
-        separators=[
-            "\n\n",
-            "\n",
-            ".",
-            ",",
-            " ",
-            "\u200b",  # Zero-width space
-            "\uff0c",  # Fullwidth comma
-            "\u3001",  # Ideographic comma
-            "\uff0e",  # Fullwidth full stop
-            "\u3002",  # Ideographic full stop
-            "",
-        ],
-    )
-    return text_splitter.split_text(txt)
+    return [chunk.text for chunk in split_text_chunks(txt, chunk_size)]
 
 
 def remove_non_ascii(text) -> str:
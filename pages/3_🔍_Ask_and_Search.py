@@ -122,12 +122,14 @@ with search_tab:
             )
             search_type = "Text Search"
         else:
-            search_type = st.radio("Search Type", ["Text Search", "Vector Search"])
+            search_type = st.radio(
+                "Search Type", ["Text Search", "Vector Search", "Hybrid Search"]
+            )
         search_sources = st.checkbox("Search Sources", value=True)
         search_notes = st.checkbox("Search Notes", value=True)
         if st.button("Search"):
             st.write(f"Searching for {search_term}")
-            search_type_api = "text" if search_type == "Text Search" else "vector"
+            search_type_api = search_type.split()[0].lower()
             st.session_state["search_results"] = search_service.search(
                 query=search_term,
                 search_type=search_type_api,
@@ -110,6 +110,7 @@ def add_source(notebook_id):
                         url=source_link,
                         transformations=transformation_ids,
                         embed=run_embed,
+                        async_processing=True,
                     )
                 elif source_type == "Upload":
                     sources_service.create_source(
@@ -118,6 +119,7 @@ def add_source(notebook_id):
                         file_path=req["file_path"],
                         transformations=transformation_ids,
                         embed=run_embed,
+                        async_processing=True,
                         delete_source=req.get("delete_source", False),
                     )
                 else:  # Text
@@ -127,6 +129,7 @@ def add_source(notebook_id):
                         content=source_text,
                         transformations=transformation_ids,
                         embed=run_embed,
+                        async_processing=True,
                     )
             except UnsupportedTypeException as e:
                 st.warning(
@@ -0,0 +1,102 @@
+"""
+Measure peak memory of chunking and embedding a large document.
+
+Compares the previous pipeline shape (split the whole document into a list of
+chunk strings, then embed) with the streaming one Source.vectorize uses now
+(iter_text_chunks keeps only offsets and hashes, chunk text is sliced again
+while a bounded number of batches are embedded). Embedding is simulated with a
+fake model returning 1536-float vectors, and peak allocations are taken from
+tracemalloc, excluding the document itself.
+
+Usage:
+    uv run python -m scripts.benchmarks.chunking_memory
+    uv run python -m scripts.benchmarks.chunking_memory --size-mb 200 --encoding o200k_base
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import Any, Callable, List, Tuple
+
+import tiktoken
+
+from open_notebook.domain.embedding import embed_stream
+from open_notebook.domain.embedding_cache import content_hash
+from open_notebook.text_splitter import RecursiveTokenSplitter
+from scripts.benchmarks.text_splitter import make_document
+
+
+class FakeEmbeddingModel:
+    def __init__(self, dimension: int = 1536):
+        self.dimension = dimension
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(0)
+        return [[0.0] * self.dimension for _ in texts]
+
+
+async def discard(keys: List[int], embeddings: List[List[float]]) -> None:
+    pass
+
+
+async def list_pipeline(text: str, splitter: RecursiveTokenSplitter) -> int:
+    chunks = [chunk.text for chunk in splitter.split(text)]
+    hashes = [content_hash(chunk) for chunk in chunks]
+    await embed_stream(FakeEmbeddingModel(), enumerate(chunks), discard)
+    return len(hashes)
+
+
+async def streaming_pipeline(text: str, splitter: RecursiveTokenSplitter) -> int:
+    spans: List[Tuple[int, int]] = []
+    hashes: List[str] = []
+    for chunk in splitter.iter_split(text):
+        spans.append((chunk.start, chunk.end))
+        hashes.append(content_hash(chunk.text))
+    await embed_stream(
+        FakeEmbeddingModel(),
+        ((i, text[start:end]) for i, (start, end) in enumerate(spans)),
+        discard,
+    )
+    return len(hashes)
+
+
+def measure(pipeline: Callable[..., Any], *args: Any) -> Tuple[float, float, int]:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    chunks = asyncio.run(pipeline(*args))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1_000_000, elapsed, chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--size-mb", type=float, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--encoding", default="o200k_base")
+    args = parser.parse_args()
+
+    splitter = RecursiveTokenSplitter(
+        args.chunk_size, encoding=tiktoken.get_encoding(args.encoding)
+    )
+    splitter.split("warm up")  # vocab table
+
+    print(
+        f"{'MB':>6}{'chunks':>9}{'list peak MB':>14}{'s':>7}"
+        f"{'stream peak MB':>16}{'s':>7}"
+    )
+    for size in args.size_mb:
+        text = make_document(size, seed=int(size))
+        list_peak, list_time, chunks = measure(list_pipeline, text, splitter)
+        stream_peak, stream_time, _ = measure(streaming_pipeline, text, splitter)
+        print(
+            f"{size:>6g}{chunks:>9,}{list_peak:>14.1f}{list_time:>7.1f}"
+            f"{stream_peak:>16.1f}{stream_time:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark for parse_record_ids on realistic query results.
+
+Compares the previous recursive decoder with the iterative one on rows shaped
+like source_insight / source_embedding results (1536-float embeddings) and on
+search results without embeddings.
+
+Usage:
+    uv run python -m scripts.benchmarks.parse_record_ids
+"""
+
+import copy
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from surrealdb import RecordID  # type: ignore
+
+from open_notebook.database.repository import parse_record_ids
+
+
+def legacy_parse_record_ids(obj: Any) -> Any:
+    """The recursive implementation this benchmark measures against."""
+    if isinstance(obj, dict):
+        return {k: legacy_parse_record_ids(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_parse_record_ids(item) for item in obj]
+    elif isinstance(obj, RecordID):
+        return str(obj)
+    return obj
+
+
+def embedding_rows(count: int, dimensions: int = 1536) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": RecordID("source_insight", f"row{i}"),
+            "source": RecordID("source", f"src{i % 50}"),
+            "insight_type": "Dense Summary",
+            "content": "lorem ipsum " * 40,
+            "embedding": [random.random() for _ in range(dimensions)],
+        }
+        for i in range(count)
+    ]
+
+
+def search_rows(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": RecordID("source_embedding", f"chunk{i}"),
+            "parent_id": RecordID("source", f"src{i % 50}"),
+            "title": f"Document {i % 50}",
+            "similarity": random.random(),
+            "matches": ["lorem ipsum " * 20, "dolor sit amet " * 10],
+        }
+        for i in range(count)
+    ]
+
+
+def measure(fn: Callable[[Any], Any], data: Any, repeat: int) -> float:
+    # Decoding mutates/copies the input, so each run gets a fresh result set
+    copies = [copy.deepcopy(data) for _ in range(repeat)]
+    start = time.perf_counter()
+    for item in copies:
+        fn(item)
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    random.seed(42)
+    scenarios = [
+        ("200 insights with embeddings", embedding_rows(200), 5, None),
+        ("2000 chunks with embeddings", embedding_rows(2000), 2, None),
+        ("1000 search results", search_rows(1000), 20, None),
+        ("1000 search results (paths)", search_rows(1000), 20, ["id", "parent_id"]),
+    ]
+    print(f"{'scenario':<32}{'legacy rows/s':>16}{'new rows/s':>16}{'speedup':>10}")
+    for name, data, repeat, paths in scenarios:
+        legacy = measure(legacy_parse_record_ids, data, repeat)
+        new = measure(lambda rows: parse_record_ids(rows, paths), data, repeat)
+        rows = len(data)
+        print(
+            f"{name:<32}{rows / legacy:>16,.0f}{rows / new:>16,.0f}{legacy / new:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark the encode-once splitter against the previous langchain splitter.
+
+Generates documents of the given sizes (paragraphs of mixed English, accented
+and CJK text) and times RecursiveTokenSplitter, which tokenizes the document
+once, against RecursiveCharacterTextSplitter with the old token_count length
+function, which re-encodes every candidate piece. The baseline is skipped above
+--baseline-max-mb because it takes minutes there. For each run the share of
+chunks identical to the baseline is reported.
+
+Usage:
+    uv run python -m scripts.benchmarks.text_splitter
+    uv run python -m scripts.benchmarks.text_splitter --sizes-mb 1 5 50 --baseline-max-mb 50
+"""
+
+import argparse
+import random
+import time
+from typing import List, Optional
+
+import tiktoken
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from open_notebook.text_splitter import SEPARATORS, RecursiveTokenSplitter
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or "
+    "notebook source embedding vector search research paper model context data "
+    "résumé naïve café über straße 東京 研究 データ 検索 模型 向量"
+).split()
+
+
+def make_document(size_mb: float, seed: int) -> str:
+    rng = random.Random(seed)
+    target = int(size_mb * 1_000_000)
+    paragraphs: List[str] = []
+    length = 0
+    while length < target:
+        sentences = []
+        for _ in range(rng.randint(2, 10)):
+            words = rng.choices(WORDS, k=rng.randint(5, 30))
+            sentences.append(" ".join(words) + rng.choice([".", ".", ",", "。"]))
+        paragraph = " ".join(sentences)
+        if rng.random() < 0.2:
+            paragraph += "\n" + " ".join(rng.choices(WORDS, k=12))
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def baseline_split(text: str, chunk_size: int, encoding_name: str) -> List[str]:
+    def token_count(value: str) -> int:
+        # What utils.token_count did: look the encoding up and encode each call
+        return len(tiktoken.get_encoding(encoding_name).encode(value))
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=int(chunk_size * 0.15),
+        length_function=token_count,
+        separators=SEPARATORS,
+    )
+    return splitter.split_text(text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 5, 10, 50])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--encoding", default="o200k_base")
+    parser.add_argument("--baseline-max-mb", type=float, default=10)
+    args = parser.parse_args()
+
+    encoding = tiktoken.get_encoding(args.encoding)
+    RecursiveTokenSplitter(encoding=encoding).split("warm up")  # vocab table
+
+    print(f"chunk_size={args.chunk_size} encoding={args.encoding}")
+    print(
+        f"{'MB':>6}{'chunks':>9}{'new s':>9}{'MB/s':>8}"
+        f"{'old s':>10}{'speedup':>9}{'identical':>11}"
+    )
+    for size in args.sizes_mb:
+        text = make_document(size, seed=int(size * 10))
+
+        start = time.perf_counter()
+        chunks = RecursiveTokenSplitter(args.chunk_size, encoding=encoding).split(text)
+        new_time = time.perf_counter() - start
+
+        old_time: Optional[float] = None
+        identical = ""
+        if size <= args.baseline_max_mb:
+            start = time.perf_counter()
+            old_chunks = baseline_split(text, args.chunk_size, args.encoding)
+            old_time = time.perf_counter() - start
+            same = sum(a == b.text for a, b in zip(old_chunks, chunks))
+            identical = f"{same / max(len(old_chunks), len(chunks)):.1%}"
+
+        print(
+            f"{size:>6g}{len(chunks):>9,}{new_time:>9.2f}{size / new_time:>8.1f}"
+            + (
+                f"{old_time:>10.2f}{old_time / new_time:>8.1f}x"
+                if old_time is not None
+                else f"{'-':>10}{'-':>9}"
+            )
+            + f"{identical:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
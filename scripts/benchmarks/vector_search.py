@@ -0,0 +1,101 @@
+"""
+Benchmark the in-process NumPy vector index against SurrealDB brute force.
+
+Builds a NumpyVectorIndex of random unit vectors in a temporary folder and
+times top-k queries at each size. With --surreal, the same vectors are also
+loaded into a scratch SurrealDB table (bench_vector) and searched with
+vector::similarity::cosine, the way fn::vector_search does; this needs a
+running database configured through the usual SURREAL_* variables and is slow
+to seed at 1M rows.
+
+Usage:
+    uv run python -m scripts.benchmarks.vector_search
+    uv run python -m scripts.benchmarks.vector_search --sizes 10000 100000 --dim 1536 --surreal
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from open_notebook.database.numpy_index import NumpyVectorIndex
+from open_notebook.database.repository import repo_batch_insert, repo_query
+
+
+def random_vectors(count: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((count, dim), dtype=np.float32)
+
+
+def build_index(folder: str, vectors: np.ndarray, chunk: int = 50_000) -> NumpyVectorIndex:
+    index = NumpyVectorIndex(folder)
+    index.reset(vectors.shape[1])
+    for start in range(0, len(vectors), chunk):
+        block = vectors[start : start + chunk]
+        index.add([(f"source_embedding:r{start + i}", v) for i, v in enumerate(block)])
+    return index
+
+
+def time_numpy(index: NumpyVectorIndex, queries: np.ndarray, k: int) -> float:
+    index.search(queries[0], k)  # page the matrix in
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, k, minimum_score=-1.0)
+    return (time.perf_counter() - start) / len(queries)
+
+
+async def time_surreal(vectors: np.ndarray, queries: np.ndarray, k: int) -> float:
+    await repo_query("REMOVE TABLE IF EXISTS bench_vector;")
+    await repo_batch_insert(
+        "bench_vector", [{"embedding": v.tolist()} for v in vectors], batch_size=500
+    )
+    start = time.perf_counter()
+    for query in queries:
+        await repo_query(
+            """
+            SELECT id, vector::similarity::cosine(embedding, $query) as similarity
+            FROM bench_vector ORDER BY similarity DESC LIMIT $k
+            """,
+            {"query": query.tolist(), "k": k},
+        )
+    elapsed = (time.perf_counter() - start) / len(queries)
+    await repo_query("REMOVE TABLE IF EXISTS bench_vector;")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--surreal", action="store_true")
+    args = parser.parse_args()
+
+    queries = random_vectors(args.queries, args.dim, seed=1)
+    header = f"{'vectors':>10}{'build s':>10}{'numpy ms':>12}"
+    if args.surreal:
+        header += f"{'surreal ms':>14}{'speedup':>10}"
+    print(f"dim={args.dim} k={args.k} queries={args.queries}")
+    print(header)
+
+    for size in args.sizes:
+        vectors = random_vectors(size, args.dim, seed=size)
+        with tempfile.TemporaryDirectory() as folder:
+            start = time.perf_counter()
+            index = build_index(folder, vectors)
+            build = time.perf_counter() - start
+            numpy_time = time_numpy(index, queries, args.k)
+
+        line: List[str] = [f"{size:>10,}", f"{build:>10.1f}", f"{numpy_time * 1000:>12.2f}"]
+        if args.surreal:
+            surreal_time = asyncio.run(time_surreal(vectors, queries, args.k))
+            line += [f"{surreal_time * 1000:>14.2f}", f"{surreal_time / numpy_time:>9.1f}x"]
+        print("".join(line))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Checks for partial loading and dirty tracking in ObjectModel.
+
+The database calls are replaced with in-memory fakes, so these run without
+SurrealDB:
+
+    uv run python -m unittest tests.test_object_model
+"""
+
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+from loguru import logger
+
+from open_notebook.domain.notebook import Note, Source
+
+ROW: Dict[str, Any] = {
+    "id": "source:one",
+    "title": "A paper",
+    "topics": [],
+    "fingerprint": None,
+}
+
+
+class HeavyFieldSaveTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.updates: Dict[str, Any] = {}
+
+        async def fake_query(query: str, vars: Any = None, **kwargs: Any) -> Any:
+            return [dict(ROW)]
+
+        async def fake_update(table: str, id: str, data: Dict[str, Any]) -> Any:
+            self.updates = data
+            return [{**ROW, **data}]
+
+        patches = [
+            mock.patch("open_notebook.domain.base.repo_query", fake_query),
+            mock.patch("open_notebook.domain.base.repo_update", fake_update),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def test_assigned_heavy_field_is_saved(self) -> None:
+        source = await Source.get("source:one")
+        self.assertIn("full_text", source._unloaded_fields)
+
+        source.full_text = "extracted text"
+        self.assertIn("full_text", source.dirty_fields())
+        await source.save()
+
+        self.assertEqual(self.updates.get("full_text"), "extracted text")
+        self.assertNotIn("full_text", source._unloaded_fields)
+
+    async def test_unloaded_heavy_field_is_not_saved(self) -> None:
+        source = await Source.get("source:one")
+        source.title = "Renamed"
+        await source.save()
+
+        self.assertEqual(self.updates.get("title"), "Renamed")
+        self.assertNotIn("full_text", self.updates)
+
+    async def test_reading_unloaded_heavy_field_warns(self) -> None:
+        messages: List[str] = []
+        handler = logger.add(messages.append, level="WARNING", format="{message}")
+        self.addCleanup(logger.remove, handler)
+
+        source = await Source.get("source:one")
+        self.assertIsNone(source.full_text)
+        self.assertEqual(len(messages), 1)
+        self.assertIn("Source.full_text", messages[0])
+
+        await source.load_fields("full_text")
+        source.full_text
+        self.assertEqual(len(messages), 1)
+
+
+class EmbeddingSnapshotTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.written: Dict[str, Any] = {}
+
+        async def fake_create(table: str, data: Dict[str, Any]) -> Any:
+            self.written = data
+            return [{**data, "id": "note:one"}]
+
+        async def fake_update(table: str, id: str, data: Dict[str, Any]) -> Any:
+            self.written = data
+            return [{**data, "id": id}]
+
+        self.model: Any = None
+        manager = "open_notebook.domain.models.model_manager"
+        patches = [
+            mock.patch("open_notebook.domain.base.repo_create", fake_create),
+            mock.patch("open_notebook.domain.base.repo_update", fake_update),
+            mock.patch("open_notebook.domain.base.ensure_vector_indexes"),
+            mock.patch("open_notebook.domain.base.index_embeddings"),
+            mock.patch(
+                f"{manager}.get_embedding_model", side_effect=lambda: self.model
+            ),
+            mock.patch(
+                f"{manager}.get_embedding_model_id", return_value="model:embed"
+            ),
+            mock.patch(
+                "open_notebook.domain.embedding_cache.cached_embed",
+                return_value=[0.1, 0.2],
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def test_content_saved_without_a_model_is_embedded_later(self) -> None:
+        note = Note(title="Draft", content="some text")
+        await note.save()
+        self.assertEqual(self.written["embedding"], [])
+        self.assertIsNone(note._embedded_content)
+
+        self.model = object()
+        await note.save()
+        self.assertEqual(self.written["embedding"], [0.1, 0.2])
+        self.assertEqual(note._embedded_content, note.get_embedding_content())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Checks for the token estimates in open_notebook.utils.
+
+The bound checks compare against the real o200k_base encoding and are skipped
+when tiktoken cannot load it (e.g. offline without a cached encoding):
+
+    uv run python -m unittest tests.test_token_estimates
+"""
+
+import unittest
+from typing import List
+from unittest import mock
+
+from open_notebook import utils
+
+
+def _load_encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+ENCODING = _load_encoding()
+
+SAMPLES = {
+    "ascii": "The quick brown fox jumps over the lazy dog. " * 200
+    + "def f(x):\n    return x ** 2\n" * 50,
+    "cjk": "自然语言处理是人工智能的一个分支。" * 200 + "日本語のテキストも含める。" * 100,
+    "whitespace": ("word " + " " * 12 + "\n\n\t\t") * 300,
+    "mixed": "Résumé naïve café — 東京 🚀 " * 150,
+}
+
+
+@unittest.skipIf(ENCODING is None, "o200k_base encoding is not available")
+class TokenBoundsTest(unittest.TestCase):
+    def test_bounds_contain_exact_count(self) -> None:
+        for name, text in SAMPLES.items():
+            with self.subTest(name):
+                lower, upper = utils.token_bounds(text)
+                actual = len(ENCODING.encode(text))
+                self.assertLessEqual(lower, actual)
+                self.assertLessEqual(actual, upper)
+
+    def test_exceeds_token_limit_matches_exact_count_near_limit(self) -> None:
+        for name, text in SAMPLES.items():
+            actual = len(ENCODING.encode(text))
+            for limit in (actual - 2, actual - 1, actual, actual + 1, actual + 2):
+                with self.subTest(name, limit=limit):
+                    self.assertEqual(
+                        utils.exceeds_token_limit(text, limit), actual > limit
+                    )
+
+
+class FakeEncoding:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def encode(self, text: str) -> List[str]:
+        self.calls += 1
+        return text.split()
+
+
+class TokenCountMemoTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.encoding = FakeEncoding()
+        patcher = mock.patch("tiktoken.get_encoding", return_value=self.encoding)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        saved = utils._token_counts.copy()
+        utils._token_counts.clear()
+        self.addCleanup(utils._token_counts.update, saved)
+        self.addCleanup(utils._token_counts.clear)
+
+    def _large(self, i: int) -> str:
+        return f"text {i} " * (utils._MEMOIZE_MIN_CHARS // 6 + 1)
+
+    def test_large_texts_are_counted_once(self) -> None:
+        text = self._large(0)
+        first = utils.token_count(text)
+        self.assertEqual(utils.token_count(text), first)
+        self.assertEqual(self.encoding.calls, 1)
+
+    def test_small_texts_are_not_memoized(self) -> None:
+        utils.token_count("a few words")
+        utils.token_count("a few words")
+        self.assertEqual(self.encoding.calls, 2)
+        self.assertEqual(len(utils._token_counts), 0)
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        with mock.patch.object(utils, "_TOKEN_COUNT_CACHE_SIZE", 2):
+            utils.token_count(self._large(0))
+            utils.token_count(self._large(1))
+            utils.token_count(self._large(0))  # refresh 0, so 1 is oldest
+            utils.token_count(self._large(2))
+            self.assertEqual(len(utils._token_counts), 2)
+            self.assertEqual(self.encoding.calls, 3)
+
+            utils.token_count(self._large(0))
+            self.assertEqual(self.encoding.calls, 3)
+            utils.token_count(self._large(1))
+            self.assertEqual(self.encoding.calls, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()